@@ -0,0 +1,122 @@
+import asyncio
+import enum
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Priority(enum.IntEnum):
+    """Admission priority, lower values are admitted first"""
+    INTERACTIVE = 0  # live WebSocket and /interact turns
+    BATCH = 1  # roadmap generation, session summaries
+
+class AdmissionTimeout(Exception):
+    """Raised when a request waited longer than the queue timeout for a slot"""
+
+class AdmissionController:
+    """
+    Bounds the number of in-flight upstream calls. Callers over the limit wait in a
+    priority queue (FIFO within a priority) until a slot is released or their timeout expires.
+    """
+
+    def __init__(self, max_in_flight: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiters = []
+        self._counter = itertools.count()
+        self._stats = {
+            priority: {
+                "queued": 0,
+                "admitted": 0,
+                "timeouts": 0,
+                "wait_seconds_total": 0.0,
+                "wait_seconds_max": 0.0
+            }
+            for priority in Priority
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE, timeout: Optional[float] = None):
+        """Hold an upstream slot for the duration of the block"""
+        await self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE, timeout: Optional[float] = None) -> None:
+        """Wait for a free slot, raising AdmissionTimeout after the queue timeout"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        stats = self._stats[priority]
+
+        # Live waiters only exist while every slot is taken, so a free slot can be claimed directly
+        if self._in_flight < self.max_in_flight:
+            self._in_flight += 1
+            self._record_admission(priority, 0.0)
+            return
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        stats["queued"] += 1
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed to us as we gave up, pass it on
+                self.release()
+            else:
+                future.cancel()
+                stats["queued"] -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                stats["timeouts"] += 1
+                logger.warning(f"Upstream admission timed out after {timeout}s (priority {priority.name})")
+                raise AdmissionTimeout(f"No upstream slot available within {timeout} seconds")
+            raise
+
+        self._record_admission(priority, time.monotonic() - started)
+
+    def release(self) -> None:
+        """Release a slot, handing it directly to the highest-priority waiter"""
+        while self._waiters:
+            priority, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._stats[priority]["queued"] -= 1
+            future.set_result(None)
+            return
+        self._in_flight -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current in-flight count plus queue depth and wait times per priority"""
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_timeout": self.queue_timeout,
+            "priorities": {
+                priority.name.lower(): {
+                    **stats,
+                    "wait_seconds_avg": stats["wait_seconds_total"] / stats["admitted"] if stats["admitted"] else 0.0
+                }
+                for priority, stats in self._stats.items()
+            }
+        }
+
+    def _record_admission(self, priority: Priority, waited: float) -> None:
+        stats = self._stats[priority]
+        stats["admitted"] += 1
+        stats["wait_seconds_total"] += waited
+        stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+
+# Shared controller for all ElevenLabs conversations in this process
+upstream_admission = AdmissionController(
+    max_in_flight=settings.ELEVENLABS_MAX_CONCURRENCY,
+    queue_timeout=settings.ELEVENLABS_QUEUE_TIMEOUT_SECONDS
+)
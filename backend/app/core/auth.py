@@ -1,31 +1,63 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.core.database import get_db
-from app.services.user_service import get_user_by_email
-from app.schemas.user import User
+from app.core.database import get_async_db
+from app.core.security import principal_cache
+from app.services.user_service import get_user_by_email, is_user_active
+from app.schemas.user import User, Principal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Get the current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def decode_token(token: str) -> dict:
+    """Decode and validate a JWT, returning its claims"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
         raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
+    """
+    Get the current authenticated user from JWT token
+    The user lookup is skipped while the principal is cached
+    """
+    email = decode_token(token)["sub"]
     
-    user = get_user_by_email(db, email=email)
+    user = principal_cache.get(email)
     if user is None:
+        db_user = await get_user_by_email(db, email=email)
+        if db_user is None:
+            raise credentials_exception
+        user = User.from_orm(db_user)
+        principal_cache.set(email, user)
+    
+    if not user.is_active:
         raise credentials_exception
     
     return user
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """
+    Get the id and role of the authenticated user for read-only routes
+    Uses the claims embedded in the token when present (JWT_EMBED_PRINCIPAL), checking only that the
+    user is still active, otherwise falls back to get_current_user
+    """
+    payload = decode_token(token)
+    
+    if "uid" in payload and "role" in payload:
+        if not await is_user_active(db, payload["uid"]):
+            raise credentials_exception
+        return Principal(id=payload["uid"], email=payload["sub"], role=payload["role"])
+    
+    user = await get_current_user(token, db)
+    return Principal(id=user.id, email=user.email, role=user.role)
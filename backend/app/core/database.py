@@ -1,14 +1,48 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_metrics import pool_metrics, InstrumentedQueuePool, InstrumentedAsyncQueuePool
 
-# Create SQLAlchemy engine
-engine = create_engine(settings.DATABASE_URL)
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto the matching asyncio driver"""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+def get_pool_options(url: str, poolclass) -> dict:
+    """Settings-driven connection pool options; SQLite keeps its own pool classes"""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING
+    }
+
+# Create SQLAlchemy engine (sync path for scripts such as init_db and thread-offloaded work)
+engine = create_engine(settings.DATABASE_URL, **get_pool_options(settings.DATABASE_URL, InstrumentedQueuePool))
+pool_metrics.instrument("sync", engine.pool)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async engine used by the async request handlers
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **get_pool_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool))
+pool_metrics.instrument("async", async_engine.sync_engine.pool)
+
+# Create AsyncSessionLocal class; objects stay usable after commit since lazy loads can't run implicitly
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Create Base class
 Base = declarative_base()
 
@@ -19,3 +53,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,125 @@
+import bisect
+import contextvars
+import re
+import threading
+import time
+from typing import Dict, Any
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from app.core.config import settings
+
+# Route of the request currently using the database, set by the HTTP middleware
+current_route: contextvars.ContextVar = contextvars.ContextVar("current_route", default="background")
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is unbounded
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+def route_label(method: str, path: str) -> str:
+    """Collapse numeric path segments so per-route metrics stay low-cardinality"""
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+class PoolMetrics:
+    """Checkout wait histogram, live checkouts and long-held connections per route"""
+
+    def __init__(self, long_held_seconds: float):
+        self.long_held_seconds = long_held_seconds
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._checked_out = {}
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._wait_count = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._checkout_timeouts = 0
+        self._long_held = {}
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+            self._wait_count += 1
+            self._wait_seconds_total += seconds
+            self._wait_seconds_max = max(self._wait_seconds_max, seconds)
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self._checkout_timeouts += 1
+
+    def instrument(self, name: str, pool) -> None:
+        """Track checkouts and checkins of a pool"""
+        if not isinstance(pool, QueuePool):
+            # SQLite's singleton/null pools have no size to report
+            return
+        self._pools[name] = pool
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self._checked_out[id(connection_record)] = (current_route.get(), time.monotonic())
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            checkout = self._checked_out.pop(id(connection_record), None)
+            if checkout is None:
+                return
+            route, started = checkout
+            held = time.monotonic() - started
+            if held >= self.long_held_seconds:
+                stats = self._long_held.setdefault(route, {"count": 0, "max_seconds": 0.0})
+                stats["count"] += 1
+                stats["max_seconds"] = max(stats["max_seconds"], held)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            in_use_by_route = {}
+            for route, started in self._checked_out.values():
+                entry = in_use_by_route.setdefault(route, {"count": 0, "oldest_seconds": 0.0})
+                entry["count"] += 1
+                entry["oldest_seconds"] = max(entry["oldest_seconds"], now - started)
+
+            labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["le_inf"]
+            return {
+                "pools": {
+                    name: {
+                        "size": pool.size(),
+                        "checked_out": pool.checkedout(),
+                        "idle": pool.checkedin(),
+                        "overflow": pool.overflow()
+                    }
+                    for name, pool in self._pools.items()
+                },
+                "checkout_wait": {
+                    "count": self._wait_count,
+                    "timeouts": self._checkout_timeouts,
+                    "seconds_total": self._wait_seconds_total,
+                    "seconds_max": self._wait_seconds_max,
+                    "histogram": dict(zip(labels, self._wait_buckets))
+                },
+                "in_use_by_route": in_use_by_route,
+                "long_held_threshold_seconds": self.long_held_seconds,
+                "long_held_by_route": {route: dict(stats) for route, stats in self._long_held.items()}
+            }
+
+pool_metrics = PoolMetrics(long_held_seconds=settings.DB_LONG_HELD_CONNECTION_SECONDS)
+
+class _CheckoutWaitTimer:
+    """Times how long a checkout waits for a pooled connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.observe_timeout()
+            raise
+        finally:
+            pool_metrics.observe_wait(time.perf_counter() - started)
+
+class InstrumentedQueuePool(_CheckoutWaitTimer, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_CheckoutWaitTimer, AsyncAdaptedQueuePool):
+    pass
@@ -1,38 +1,23 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime
 import logging
-from app.core.config import settings
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.email_delivery import email_delivery
 
 logger = logging.getLogger(__name__)
 
 async def send_email(to_email: str, subject: str, html_content: str) -> bool:
-    """Send an email using configured SMTP settings"""
+    """
+    Queue an email for delivery in its own transaction
+    Returns once the message is stored in the outbox, not when it is sent
+    """
     try:
-        message = MIMEMultipart("alternative")
-        message["Subject"] = subject
-        message["From"] = settings.EMAIL_SENDER
-        message["To"] = to_email
-        
-        # Add HTML content
-        html_part = MIMEText(html_content, "html")
-        message.attach(html_part)
-        
-        # Connect to SMTP server and send email
-        with smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT) as server:
-            server.starttls()
-            server.login(settings.EMAIL_SENDER, settings.EMAIL_PASSWORD)
-            server.sendmail(settings.EMAIL_SENDER, to_email, message.as_string())
-            
-        logger.info(f"Email sent successfully to {to_email}")
+        await email_delivery.enqueue(to_email, subject, html_content)
         return True
     except Exception as e:
-        logger.error(f"Failed to send email: {str(e)}")
+        logger.error(f"Failed to queue email: {str(e)}")
         return False
 
-async def send_session_confirmation(to_email: str, session_data: dict) -> bool:
-    """Send session confirmation email"""
+def session_confirmation_email(session_data: dict) -> tuple:
+    """Subject and HTML body of the session confirmation email"""
     session_time = session_data["scheduled_time"].strftime("%A, %B %d, %Y at %I:%M %p")
     session_type = session_data["session_type"]
     
@@ -60,10 +45,22 @@ async def send_session_confirmation(to_email: str, session_data: dict) -> bool:
     """
     
     subject = f"Confirmation: {session_type} Counseling Session - {session_time}"
-    return await send_email(to_email, subject, html_content)
+    return subject, html_content
 
-async def send_session_reminder(to_email: str, session_data: dict) -> bool:
-    """Send session reminder email"""
+async def send_session_confirmation(to_email: str, session_data: dict) -> bool:
+    """Send session confirmation email"""
+    return await send_email(to_email, *session_confirmation_email(session_data))
+
+async def stage_session_confirmation(db: AsyncSession, to_email: str, session_data: dict) -> bool:
+    """Add the session confirmation email to the caller's transaction"""
+    subject, html_content = session_confirmation_email(session_data)
+    return await email_delivery.stage(
+        db, to_email, subject, html_content,
+        idempotency_key=f"session-confirmation:{session_data['id']}"
+    )
+
+def session_reminder_email(session_data: dict) -> tuple:
+    """Subject and HTML body of the session reminder email"""
     session_time = session_data["scheduled_time"].strftime("%I:%M %p")
     session_type = session_data["session_type"]
     
@@ -82,10 +79,22 @@ async def send_session_reminder(to_email: str, session_data: dict) -> bool:
     """
     
     subject = f"Reminder: Your Counseling Session Starts in 5 Minutes"
-    return await send_email(to_email, subject, html_content)
+    return subject, html_content
 
-async def send_session_summary(to_email: str, session_data: dict) -> bool:
-    """Send session summary email with roadmap"""
+async def send_session_reminder(to_email: str, session_data: dict) -> bool:
+    """Send session reminder email"""
+    return await send_email(to_email, *session_reminder_email(session_data))
+
+async def stage_session_reminder(db: AsyncSession, to_email: str, session_data: dict) -> bool:
+    """Add the session reminder email to the caller's transaction"""
+    subject, html_content = session_reminder_email(session_data)
+    return await email_delivery.stage(
+        db, to_email, subject, html_content,
+        idempotency_key=f"session-reminder:{session_data['id']}:{session_data['scheduled_time'].isoformat()}"
+    )
+
+def session_summary_email(session_data: dict) -> tuple:
+    """Subject and HTML body of the session summary email"""
     session_time = session_data["scheduled_time"].strftime("%A, %B %d, %Y")
     
     html_content = f"""
@@ -107,4 +116,16 @@ async def send_session_summary(to_email: str, session_data: dict) -> bool:
     """
     
     subject = f"Your Counseling Session Summary and Career Roadmap"
-    return await send_email(to_email, subject, html_content)
+    return subject, html_content
+
+async def send_session_summary(to_email: str, session_data: dict) -> bool:
+    """Send session summary email with roadmap"""
+    return await send_email(to_email, *session_summary_email(session_data))
+
+async def stage_session_summary(db: AsyncSession, to_email: str, session_data: dict) -> bool:
+    """Add the session summary email to the caller's transaction"""
+    subject, html_content = session_summary_email(session_data)
+    return await email_delivery.stage(
+        db, to_email, subject, html_content,
+        idempotency_key=f"session-summary:{session_data['id']}"
+    )
@@ -0,0 +1,332 @@
+import asyncio
+import logging
+import queue
+import re
+import smtplib
+import time
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Dict, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import EmailOutbox, EmailStatus
+
+logger = logging.getLogger(__name__)
+
+_MSGID_UNSAFE = re.compile(r"[^A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]")
+
+def message_id(key: str) -> str:
+    """Deterministic Message-ID for an outbox key"""
+    return f"<{_MSGID_UNSAFE.sub('-', key)}@{settings.EMAIL_SENDER.split('@')[-1]}>"
+
+class SMTPConnectionPool:
+    """
+    Keeps up to size authenticated SMTP connections open and reuses them across
+    messages. Blocking; called from worker threads.
+    """
+
+    def __init__(self, host: str, port: int, username: str, password: str,
+                 use_tls: bool, use_auth: bool, size: int, timeout: float, max_idle: float):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_auth = use_auth
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: "queue.LifoQueue[tuple]" = queue.LifoQueue()
+        self.connections_opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.use_auth:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        self.connections_opened += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self) -> tuple:
+        """An idle connection if one is fresh enough, else a new one; returns (server, reused)"""
+        while True:
+            try:
+                server, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(), False
+            if time.monotonic() - idle_since < self.max_idle:
+                return server, True
+            self._close(server)
+
+    def _checkin(self, server: smtplib.SMTP) -> None:
+        if self._idle.qsize() >= self.size:
+            self._close(server)
+        else:
+            self._idle.put((server, time.monotonic()))
+
+    def send(self, from_email: str, to_email: str, message: str) -> None:
+        server, reused = self._checkout()
+        try:
+            server.sendmail(from_email, to_email, message)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+            # Rejected message, the connection itself is still good
+            try:
+                server.rset()
+                self._checkin(server)
+            except Exception:
+                self._close(server)
+            raise
+        except OSError:
+            # SMTPServerDisconnected or a socket error
+            self._close(server)
+            if not reused:
+                raise
+            # The server dropped an idle connection, retry once on a fresh one
+            server = self._connect()
+            try:
+                server.sendmail(from_email, to_email, message)
+            except Exception:
+                self._close(server)
+                raise
+        except Exception:
+            self._close(server)
+            raise
+        self._checkin(server)
+
+    def close(self) -> None:
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+    def idle(self) -> int:
+        return self._idle.qsize()
+
+class EmailDelivery:
+    """
+    Transactional email outbox. Messages are staged as email_outbox rows in the same
+    transaction as the change that caused them; a dispatcher task claims due rows in
+    batches and sends them over pooled SMTP connections, retrying failures with
+    exponential backoff. Rows left pending by a stopped process are picked up again
+    once their lease expires.
+    """
+
+    def __init__(self, workers: int, batch_size: int, poll_interval: float, max_attempts: int,
+                 backoff: float, backoff_max: float, lease: float):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.smtp_pool = SMTPConnectionPool(
+            host=settings.EMAIL_HOST,
+            port=settings.EMAIL_PORT,
+            username=settings.EMAIL_SENDER,
+            password=settings.EMAIL_PASSWORD,
+            use_tls=settings.EMAIL_USE_TLS,
+            use_auth=settings.EMAIL_USE_AUTH,
+            size=workers,
+            timeout=settings.EMAIL_SMTP_TIMEOUT_SECONDS,
+            max_idle=settings.EMAIL_SMTP_MAX_IDLE_SECONDS
+        )
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"staged": 0, "batches": 0, "sent": 0, "retried": 0, "failed": 0}
+
+    async def stage(self, db: AsyncSession, to_email: str, subject: str, html_content: str,
+                    idempotency_key: Optional[str] = None) -> bool:
+        """
+        Add a message to the caller's transaction; it is delivered once the caller commits
+        and calls notify(). A message whose idempotency key is already in the outbox is skipped.
+        """
+        if idempotency_key is not None:
+            result = await db.execute(select(EmailOutbox.id).where(EmailOutbox.idempotency_key == idempotency_key))
+            if result.first() is not None:
+                logger.info(f"Email {idempotency_key} already in the outbox")
+                return False
+        db.add(EmailOutbox(
+            to_email=to_email,
+            subject=subject,
+            html_content=html_content,
+            idempotency_key=idempotency_key
+        ))
+        self._stats["staged"] += 1
+        return True
+
+    async def enqueue(self, to_email: str, subject: str, html_content: str,
+                      idempotency_key: Optional[str] = None) -> None:
+        """Store a message in the outbox in its own transaction and queue it for delivery"""
+        async with AsyncSessionLocal() as db:
+            await self.stage(db, to_email, subject, html_content, idempotency_key)
+            await db.commit()
+        await self.notify()
+
+    async def notify(self) -> None:
+        """Tell the dispatcher new mail was committed"""
+        if self._task is None:
+            # No dispatcher (scripts, tests): deliver right away
+            await self.drain()
+        else:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start the dispatcher; it immediately picks up mail left pending by a previous run"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Email dispatcher started with {self.workers} SMTP connections")
+
+    async def stop(self) -> None:
+        """Stop the dispatcher; undelivered mail stays pending in the outbox"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.smtp_pool.close)
+        logger.info("Email dispatcher stopped")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.error(f"Error draining email outbox: {str(e)}")
+
+    async def drain(self) -> int:
+        """Send due outbox rows batch by batch until none are left; returns the number sent"""
+        sent = 0
+        while True:
+            batch = await self._claim_batch()
+            if not batch:
+                return sent
+            self._stats["batches"] += 1
+            results = await asyncio.gather(*(self._send(email) for email in batch))
+            sent += sum(results)
+
+    async def _claim_batch(self) -> list:
+        """
+        Lease up to batch_size due rows by pushing their next_attempt_at past the lease, so
+        concurrent dispatchers (other workers, other hosts) skip them until the lease expires
+        """
+        now = datetime.utcnow()
+        due = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status == EmailStatus.PENDING, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(EmailOutbox)
+                .where(
+                    EmailOutbox.id.in_(due.scalar_subquery()),
+                    EmailOutbox.status == EmailStatus.PENDING,
+                    EmailOutbox.next_attempt_at <= now
+                )
+                .values(
+                    attempts=EmailOutbox.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=self.lease)
+                )
+                .returning(
+                    EmailOutbox.id,
+                    EmailOutbox.to_email,
+                    EmailOutbox.subject,
+                    EmailOutbox.html_content,
+                    EmailOutbox.idempotency_key,
+                    EmailOutbox.attempts
+                )
+                .execution_options(synchronize_session=False)
+            )
+            batch = result.all()
+            await db.commit()
+        return batch
+
+    async def _send(self, email) -> bool:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        message = MIMEMultipart("alternative")
+        message["Subject"] = email.subject
+        message["From"] = settings.EMAIL_SENDER
+        message["To"] = email.to_email
+        # Stable across retries so a message re-sent after a lost acknowledgement can be deduplicated
+        message["Message-ID"] = message_id(email.idempotency_key or f"outbox-{email.id}")
+        message.attach(MIMEText(email.html_content, "html"))
+
+        # No database connection is held while talking to the SMTP server
+        try:
+            async with self._slots:
+                await asyncio.to_thread(self.smtp_pool.send, settings.EMAIL_SENDER, email.to_email, message.as_string())
+        except Exception as e:
+            if email.attempts >= self.max_attempts:
+                await self._record(email.id, status=EmailStatus.FAILED, last_error=str(e))
+                self._stats["failed"] += 1
+                logger.error(f"Giving up on email {email.id} to {email.to_email} after {email.attempts} attempts: {str(e)}")
+                return False
+            delay = min(self.backoff * 2 ** (email.attempts - 1), self.backoff_max)
+            await self._record(email.id, next_attempt_at=datetime.utcnow() + timedelta(seconds=delay), last_error=str(e))
+            self._stats["retried"] += 1
+            logger.warning(f"Failed to send email {email.id}, retrying in {delay:g}s: {str(e)}")
+            return False
+
+        await self._record(email.id, status=EmailStatus.SENT, sent_at=datetime.utcnow(), last_error=None)
+        self._stats["sent"] += 1
+        logger.info(f"Email sent successfully to {email.to_email}")
+        return True
+
+    async def _record(self, email_id: int, **values) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(EmailOutbox).where(EmailOutbox.id == email_id).values(**values))
+            await db.commit()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "dispatcher_running": self._task is not None,
+            "smtp_connections_idle": self.smtp_pool.idle(),
+            "smtp_connections_opened": self.smtp_pool.connections_opened,
+            **self._stats
+        }
+
+email_delivery = EmailDelivery(
+    workers=settings.EMAIL_SMTP_POOL_SIZE,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    poll_interval=settings.EMAIL_OUTBOX_POLL_SECONDS,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    backoff=settings.EMAIL_RETRY_BACKOFF_SECONDS,
+    backoff_max=settings.EMAIL_RETRY_BACKOFF_MAX_SECONDS,
+    # An attempt that has not finished by then (crashed process) may be retried elsewhere
+    lease=settings.EMAIL_SMTP_TIMEOUT_SECONDS * 4
+)
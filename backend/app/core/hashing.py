@@ -0,0 +1,132 @@
+import asyncio
+import bisect
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from passlib.context import CryptContext
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the queue wait histogram buckets; the last bucket is unbounded
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+def build_crypt_context(rounds: int) -> CryptContext:
+    """bcrypt context whose hashes need an update whenever their cost differs from rounds"""
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds
+    )
+
+pwd_context = build_crypt_context(settings.BCRYPT_ROUNDS)
+
+# Module-level so they can be pickled into a process pool
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a dedicated pool of max_workers, so a
+    login storm queues here instead of tying up the request threadpool and event loop.
+    """
+
+    def __init__(self, max_workers: int, executor: str = "thread"):
+        self.max_workers = max_workers
+        self.executor = executor
+        self._pool: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._queued = 0
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._wait_count = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._hashes = 0
+        self._verifications = 0
+        self._rehashes = 0
+
+    async def hash(self, password: str) -> str:
+        """Hash a new password"""
+        self._hashes += 1
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password; on success also returns a fresh hash when the stored
+        one was made with different cost parameters, otherwise None
+        """
+        self._verifications += 1
+        verified, new_hash = await self._run(_verify_and_update, password, hashed_password)
+        if new_hash is not None:
+            self._rehashes += 1
+        return verified, new_hash
+
+    async def _run(self, func: Callable, *args) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        self._queued += 1
+        started = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+        self._observe_wait(time.perf_counter() - started)
+
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_pool(), func, *args)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.executor == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hasher")
+            logger.info(f"Password hasher started with {self.max_workers} {self.executor} workers")
+        return self._pool
+
+    def _observe_wait(self, seconds: float) -> None:
+        self._wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+        self._wait_count += 1
+        self._wait_seconds_total += seconds
+        self._wait_seconds_max = max(self._wait_seconds_max, seconds)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def metrics(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["le_inf"]
+        return {
+            "executor": self.executor,
+            "max_workers": self.max_workers,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "hashes": self._hashes,
+            "verifications": self._verifications,
+            "rehashes": self._rehashes,
+            "queue_wait": {
+                "count": self._wait_count,
+                "seconds_total": self._wait_seconds_total,
+                "seconds_max": self._wait_seconds_max,
+                "histogram": dict(zip(labels, self._wait_buckets))
+            }
+        }
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    executor=settings.PASSWORD_HASH_EXECUTOR
+)
@@ -2,6 +2,33 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt
 from app.core.config import settings
+from app.core.cache import TTLCache
+
+# Authenticated principals keyed by token subject (email), so authenticated requests skip the user lookup
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+# is_active per user id for claims-only authorization; other workers see a change within the TTL
+user_active_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+def invalidate_principal(*emails: str) -> None:
+    """Drop cached principals after the underlying user rows changed"""
+    for email in emails:
+        if email:
+            principal_cache.invalidate(email)
+
+def access_token_claims(user) -> dict:
+    """Claims for a user's access token; optionally embeds id and role for claims-only authorization"""
+    claims = {"sub": user.email}
+    if settings.JWT_EMBED_PRINCIPAL:
+        claims["uid"] = user.id
+        claims["role"] = user.role.value if hasattr(user.role, "value") else user.role
+    return claims
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
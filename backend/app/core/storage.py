@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, NamedTuple
+from fastapi import UploadFile
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured maximum size"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the maximum size of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+class StagedUpload(NamedTuple):
+    path: str  # temp file next to the final location
+    sha256: str
+    size: int
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+def _finish(out) -> None:
+    out.flush()
+    os.fsync(out.fileno())
+    out.close()
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+async def stream_upload(file: UploadFile, directory: str, max_bytes: int, chunk_size: int) -> StagedUpload:
+    """
+    Copy an upload chunk by chunk into a temp file in directory while hashing it, so at
+    most one chunk is held in memory. Stops and removes the temp file as soon as the upload
+    grows past max_bytes. All disk I/O runs in worker threads.
+    """
+    await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+    fd, temp_path = await asyncio.to_thread(tempfile.mkstemp, dir=directory, prefix=".upload-", suffix=".part")
+    out = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            await asyncio.to_thread(_write_chunk, out, digest, chunk)
+        await asyncio.to_thread(_finish, out)
+    except BaseException:
+        out.close()
+        await asyncio.to_thread(_remove_quietly, temp_path)
+        raise
+    return StagedUpload(temp_path, digest.hexdigest(), size)
+
+def content_path(directory: str, sha256: str, extension: str = ".pdf") -> str:
+    """Content-addressed location of a blob, fanned out by the first byte of its hash"""
+    return f"{directory}/{sha256[:2]}/{sha256}{extension}"
+
+def _move(source: str, destination: str) -> None:
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(source, destination)
+
+def store_blob(source: BinaryIO, directory: str, max_bytes: int, chunk_size: int) -> StagedUpload:
+    """
+    Blocking counterpart of stream_upload followed by commit_upload, for files read from
+    disk or an archive: copies source into its content-addressed path under directory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    out = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            _write_chunk(out, digest, chunk)
+        _finish(out)
+        sha256 = digest.hexdigest()
+        final_path = content_path(directory, sha256)
+        _move(temp_path, final_path)
+    except BaseException:
+        out.close()
+        _remove_quietly(temp_path)
+        raise
+    return StagedUpload(final_path, sha256, size)
+
+async def commit_upload(staged: StagedUpload, final_path: str) -> None:
+    """Atomically move a staged upload to its final path"""
+    await asyncio.to_thread(_move, staged.path, final_path)
+
+async def discard_file(path: str) -> None:
+    await asyncio.to_thread(_remove_quietly, path)
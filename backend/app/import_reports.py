@@ -0,0 +1,57 @@
+"""
+Bulk import of psychometric reports
+
+Reads a zip archive or a directory of report PDFs plus a CSV manifest mapping each
+file to a student (columns: file, and email or user_id), and prints one JSON
+progress line per report. An interrupted import is continued with --resume.
+
+Usage (from backend/):
+    python -m app.import_reports --manifest school.csv --source school.zip
+    python -m app.import_reports --manifest school.csv --source reports/
+    python -m app.import_reports --resume 12
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from app.core.database import AsyncSessionLocal
+from app.services.import_service import ManifestError, parse_manifest, create_import, run_import
+from app.services.report_extraction import report_extractor
+
+async def main_async(args) -> int:
+    async with AsyncSessionLocal() as db:
+        if args.resume is not None:
+            import_id = args.resume
+        else:
+            with open(args.manifest, encoding="utf-8-sig") as manifest:
+                rows = parse_manifest(manifest.read())
+            report_import = await create_import(db, os.path.abspath(args.source), rows)
+            import_id = report_import.id
+
+        status = None
+        async for event in run_import(db, import_id):
+            print(json.dumps(event, default=str), flush=True)
+            status = event.get("status") if event["event"] == "finished" else status
+    return 0 if status == "completed" else 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import psychometric reports")
+    parser.add_argument("--manifest", help="CSV with a file column and an email or user_id column")
+    parser.add_argument("--source", help="zip archive or directory holding the report files")
+    parser.add_argument("--resume", type=int, metavar="IMPORT_ID", help="continue an interrupted import")
+    args = parser.parse_args()
+    if args.resume is None and not (args.manifest and args.source):
+        parser.error("--manifest and --source are required unless resuming")
+
+    try:
+        code = asyncio.run(main_async(args))
+    except ManifestError as e:
+        parser.error(f"invalid manifest: {e}")
+    finally:
+        report_extractor.shutdown()
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,33 @@
-from app.core.database import Base, engine
-from app.models.user import User, PsychometricData, Session, SessionInteraction, CareerRoadmap
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from app.core.database import engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Revision matching the schema Base.metadata.create_all used to build
+INITIAL_REVISION = "0001"
+
+def get_alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    # Leave the application's logging configuration alone
+    config.attributes["configure_logger"] = False
+    return config
 
 def init_db():
-    # Create tables
-    Base.metadata.create_all(bind=engine)
+    config = get_alembic_config()
+    
+    # Databases created before migrations existed already have the initial schema
+    tables = inspect(engine).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        command.stamp(config, INITIAL_REVISION)
+    
+    # Apply pending migrations
+    command.upgrade(config, "head")
 
 if __name__ == "__main__":
-    print("Creating database tables...")
+    print("Migrating database...")
     init_db()
-    print("Database tables created!")
+    print("Database is up to date!")
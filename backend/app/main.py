@@ -2,7 +2,17 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.core.config import settings
-from app.routers import users, sessions, counseling, reports
+from app.core.db_metrics import current_route, route_label
+from app.core.hashing import password_hasher
+from app.core.email_delivery import email_delivery
+from app.routers import users, sessions, counseling, reports, metrics
+from app.services.interaction_writer import interaction_writer
+from app.services.reminder_scheduler import reminder_scheduler
+from app.services.report_extraction import report_extractor
+from app.services.report_service import cancel_extraction_jobs, reclaim_extraction_jobs
+from app.services.import_service import cancel_import_runs
+from app.services.roadmap_jobs import roadmap_jobs
+from app.services.rolling_summary import rolling_summaries
 
 app = FastAPI(
     title="AI Counselling Platform API",
@@ -19,6 +29,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def start_background_services():
+    await interaction_writer.start()
+    await email_delivery.start()
+    await reminder_scheduler.start()
+    await roadmap_jobs.start()
+    await rolling_summaries.start()
+    await reclaim_extraction_jobs()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await reminder_scheduler.stop()
+    await roadmap_jobs.stop()
+    await rolling_summaries.stop()
+    await interaction_writer.stop()
+    await cancel_extraction_jobs()
+    await cancel_import_runs()
+    await email_delivery.stop()
+    password_hasher.shutdown()
+    report_extractor.shutdown()
+
+# Tag database checkouts with the route that made them
+@app.middleware("http")
+async def track_route(request: Request, call_next):
+    token = current_route.set(route_label(request.method, request.url.path))
+    try:
+        return await call_next(request)
+    finally:
+        current_route.reset(token)
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -33,6 +73,7 @@ app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(sessions.router, prefix="/api/sessions", tags=["sessions"])
 app.include_router(counseling.router, prefix="/api/counseling", tags=["counseling"])
 app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
 
 @app.get("/")
 def read_root():
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text, JSON, Enum
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text, JSON, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -33,6 +33,10 @@ class User(Base):
 
 class PsychometricData(Base):
     __tablename__ = "psychometric_data"
+    __table_args__ = (
+        # Latest report per user
+        Index("ix_psychometric_data_user_id_uploaded_at", "user_id", "uploaded_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -43,11 +47,84 @@ class PsychometricData(Base):
     recommended_careers = Column(JSON)
     subjects_interested = Column(JSON)  # Added for subjects interested
     report_url = Column(String)  # URL to stored PDF report
+    report_sha256 = Column(String(64), index=True, nullable=True)  # ReportBlob holding the PDF
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="psychometric_data")
 
+class ReportBlob(Base):
+    """A stored report PDF, addressed by content hash and shared by identical uploads"""
+    __tablename__ = "report_blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    extracted_data = Column(JSON, nullable=True)  # Extraction result, reused for identical uploads
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ReportJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class ReportJob(Base):
+    """Background extraction of an uploaded report too large to process within the request"""
+    __tablename__ = "report_jobs"
+    
+    id = Column(String(32), primary_key=True)  # uuid4 hex, handed to the client
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    report_sha256 = Column(String(64), nullable=False)
+    status = Column(Enum(ReportJobStatus), default=ReportJobStatus.PENDING, nullable=False)
+    psychometric_data_id = Column(Integer, ForeignKey("psychometric_data.id"), nullable=True)  # Set on completion
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    lease_expires_at = Column(DateTime, nullable=True)  # Renewed while a worker extracts; a dead worker's lease runs out
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+class ReportImportStatus(str, enum.Enum):
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+
+class ReportImportItemStatus(str, enum.Enum):
+    PENDING = "pending"
+    IMPORTED = "imported"
+    FAILED = "failed"
+
+class ReportImport(Base):
+    """Bulk import of a school's reports from a zip archive or directory and a CSV manifest"""
+    __tablename__ = "report_imports"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)  # None when run from the CLI
+    source = Column(String, nullable=False)  # Zip archive or directory the reports are read from
+    status = Column(Enum(ReportImportStatus), default=ReportImportStatus.PROCESSING, nullable=False)
+    total = Column(Integer, default=0, nullable=False)
+    imported = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    lease_expires_at = Column(DateTime, nullable=True)  # Held by the run processing the import; a crashed run's lease runs out
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+class ReportImportItem(Base):
+    """One manifest row of a bulk import; pending rows are picked up again when an import is resumed"""
+    __tablename__ = "report_import_items"
+    __table_args__ = (
+        # Remaining rows of an import
+        Index("ix_report_import_items_import_id_status", "import_id", "status"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    import_id = Column(Integer, ForeignKey("report_imports.id"), nullable=False)
+    file_name = Column(String, nullable=False)  # Path inside the archive or directory
+    email = Column(String, nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    report_sha256 = Column(String(64), nullable=True)  # Set once the file is copied into report storage
+    status = Column(Enum(ReportImportItemStatus), default=ReportImportItemStatus.PENDING, nullable=False)
+    error = Column(Text, nullable=True)
+    psychometric_data_id = Column(Integer, ForeignKey("psychometric_data.id"), nullable=True)
+
 class SessionStatus(str, enum.Enum):
     SCHEDULED = "scheduled"
     IN_PROGRESS = "in_progress"
@@ -60,6 +137,12 @@ class SessionType(str, enum.Enum):
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Sessions of a user
+        Index("ix_sessions_user_id_scheduled_time", "user_id", "scheduled_time"),
+        # Upcoming sessions by status and start time window
+        Index("ix_sessions_status_scheduled_time", "status", "scheduled_time"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -70,6 +153,10 @@ class Session(Base):
     transcript = Column(Text)
     summary = Column(Text)
     recording_url = Column(String, nullable=True)  # URL to session recording
+    reminder_sent_at = Column(DateTime, nullable=True)  # Set when the reminder for scheduled_time is staged
+    rolling_summary = Column(Text, nullable=True)  # Kept up to date while the session is in progress
+    summarized_turns = Column(Integer, default=0, server_default="0", nullable=False)  # Interactions covered by rolling_summary
+    rolling_summary_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -79,6 +166,10 @@ class Session(Base):
 
 class SessionInteraction(Base):
     __tablename__ = "session_interactions"
+    __table_args__ = (
+        # Transcript of a session in order
+        Index("ix_session_interactions_session_id_timestamp", "session_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("sessions.id"))
@@ -91,17 +182,56 @@ class SessionInteraction(Base):
 
 class CareerRoadmap(Base):
     __tablename__ = "career_roadmaps"
+    __table_args__ = (
+        Index("ix_career_roadmaps_user_id_created_at", "user_id", "created_at"),
+        # Roadmaps reused for an unchanged profile
+        Index("ix_career_roadmaps_user_id_context_key", "user_id", "context_key"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     roadmap_data = Column(JSON)
+    context_key = Column(String(64), nullable=True)  # SHA-256 of the profile and psychometric context it was generated from
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="career_roadmaps")
 
+class RoadmapJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class RoadmapJob(Base):
+    """Queued career roadmap generation, processed by the roadmap job workers"""
+    __tablename__ = "roadmap_jobs"
+    __table_args__ = (
+        # Jobs due for a worker
+        Index("ix_roadmap_jobs_status_created_at", "status", "created_at"),
+        # At most one unfinished job per user and psychometric snapshot
+        Index("ix_roadmap_jobs_active_key", "active_key", unique=True),
+    )
+    
+    id = Column(String(32), primary_key=True)  # uuid4 hex, handed to the client
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    psychometric_data_id = Column(Integer, ForeignKey("psychometric_data.id"), nullable=False)
+    status = Column(Enum(RoadmapJobStatus), default=RoadmapJobStatus.PENDING, nullable=False)
+    active_key = Column(String, nullable=True)  # user_id:psychometric_data_id while unfinished, cleared when done
+    attempts = Column(Integer, default=0, nullable=False)
+    lease_expires_at = Column(DateTime, nullable=True)  # A running job past this is reclaimed (crashed worker)
+    roadmap_id = Column(Integer, ForeignKey("career_roadmaps.id"), nullable=True)
+    sections = Column(JSON, nullable=True)  # Roadmap sections finished so far while running
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
 class ForeignStudyRoadmap(Base):
     __tablename__ = "foreign_study_roadmaps"
+    __table_args__ = (
+        Index("ix_foreign_study_roadmaps_user_id_created_at", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -110,3 +240,30 @@ class ForeignStudyRoadmap(Base):
     
     # Relationships
     user = relationship("User")
+
+class EmailStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class EmailOutbox(Base):
+    """Outgoing email, written in the same transaction as the change that triggers it"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Pending mail due for (re)delivery
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+        # At most one message per triggering event
+        Index("ix_email_outbox_idempotency_key", "idempotency_key", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html_content = Column(Text, nullable=False)
+    idempotency_key = Column(String, nullable=True)  # e.g. session-confirmation:42
+    status = Column(Enum(EmailStatus), default=EmailStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
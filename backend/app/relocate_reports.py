@@ -0,0 +1,134 @@
+"""
+Relocate psychometric reports into the content-addressed layout
+
+Migration 0006 records existing reports as blobs where they are. This moves each blob's
+file to REPORTS_DIR/<xx>/<sha256>.pdf and points its psychometric data there, printing one
+JSON line per blob. Files are copied first and an original is only deleted after the
+database points away from it has been committed, and only if no row references it any
+more. Files no row references are never touched. Safe to run again, e.g. after an
+interruption or after an offline (--sql) upgrade, whose rows it also hashes.
+
+Usage (from backend/):
+    python -m app.relocate_reports
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from typing import List, Optional
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.storage import content_path, store_blob
+from app.models.user import PsychometricData, ReportBlob
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EXTRACTED_FIELDS = ("interests", "skills", "personality_type", "aptitude", "recommended_careers", "subjects_interested")
+
+def local(path: str) -> str:
+    """Report paths are stored relative to backend/; resolve them whatever the working directory"""
+    return os.path.join(BACKEND_DIR, path)
+
+def file_sha256(path: str) -> Optional[str]:
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as report:
+        for chunk in iter(lambda: report.read(settings.UPLOAD_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def copy_to_layout(source: str) -> str:
+    """Copy a report to its content-addressed path; returns the hash of what was copied"""
+    with open(source, "rb") as report:
+        staged = store_blob(report, local(settings.REPORTS_DIR), os.path.getsize(source), settings.UPLOAD_CHUNK_BYTES)
+    return staged.sha256
+
+def emit(event: str, **values) -> None:
+    print(json.dumps({"event": event, **values}, default=str), flush=True)
+
+async def backfill(db: AsyncSession) -> None:
+    """Hash the reports of rows without a blob, as migration 0006 does online"""
+    result = await db.execute(
+        select(PsychometricData)
+        .where(PsychometricData.report_sha256.is_(None), PsychometricData.report_url.is_not(None))
+        .order_by(PsychometricData.id)
+    )
+    for psychometric_data in result.scalars().all():
+        sha256 = await asyncio.to_thread(file_sha256, local(psychometric_data.report_url))
+        if sha256 is None:
+            emit("missing", psychometric_data_id=psychometric_data.id, path=psychometric_data.report_url)
+            continue
+        blob = await db.get(ReportBlob, sha256)
+        if blob is None:
+            blob = ReportBlob(
+                sha256=sha256,
+                path=psychometric_data.report_url,
+                size=os.path.getsize(local(psychometric_data.report_url)),
+                extracted_data={field: getattr(psychometric_data, field) for field in EXTRACTED_FIELDS}
+            )
+            db.add(blob)
+            await db.flush()
+        psychometric_data.report_sha256 = sha256
+        await db.commit()
+        emit("hashed", psychometric_data_id=psychometric_data.id, sha256=sha256)
+
+async def referenced(db: AsyncSession, path: str) -> bool:
+    rows = await db.scalar(select(func.count()).select_from(PsychometricData).where(PsychometricData.report_url == path))
+    blobs = await db.scalar(select(func.count()).select_from(ReportBlob).where(ReportBlob.path == path))
+    return bool(rows or blobs)
+
+async def relocate(db: AsyncSession, blob: ReportBlob) -> None:
+    target = content_path(settings.REPORTS_DIR, blob.sha256)
+    result = await db.execute(
+        select(PsychometricData.report_url).where(PsychometricData.report_sha256 == blob.sha256).distinct()
+    )
+    originals: List[str] = sorted({blob.path, *result.scalars().all()} - {target, None})
+    if not originals:
+        return
+
+    # Copy first; the originals stay until the database no longer points at them
+    if await asyncio.to_thread(file_sha256, local(target)) != blob.sha256:
+        for source in originals:
+            if await asyncio.to_thread(file_sha256, local(source)) == blob.sha256:
+                await asyncio.to_thread(copy_to_layout, local(source))
+                break
+        else:
+            emit("missing", sha256=blob.sha256, paths=originals)
+            return
+
+    blob.path = target
+    await db.execute(
+        update(PsychometricData)
+        .where(PsychometricData.report_sha256 == blob.sha256)
+        .values(report_url=target)
+    )
+    await db.commit()
+
+    removed = []
+    for path in originals:
+        # Keep files that still hold other content or are referenced elsewhere
+        if await referenced(db, path) or await asyncio.to_thread(file_sha256, local(path)) != blob.sha256:
+            continue
+        await asyncio.to_thread(os.remove, local(path))
+        removed.append(path)
+    emit("relocated", sha256=blob.sha256, path=target, removed=removed)
+
+async def main_async() -> int:
+    async with AsyncSessionLocal() as db:
+        await backfill(db)
+        result = await db.execute(select(ReportBlob).order_by(ReportBlob.sha256))
+        for blob in result.scalars().all():
+            await relocate(db, blob)
+    return 0
+
+def main():
+    sys.exit(asyncio.run(main_async()))
+
+if __name__ == "__main__":
+    main()
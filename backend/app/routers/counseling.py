@@ -1,28 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Response
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
 import base64
+import contextlib
+import enum
+import struct
 
-from app.core.database import get_db
+from app.core.database import get_async_db, AsyncSessionLocal
 from app.schemas.user import SessionInteraction, SessionInteractionCreate
 from app.services.counseling_service import process_user_message, get_session_interactions, end_counseling_session, get_user_context
 from app.services.elevenlabs_service import ElevenLabsConversationalAI
+from app.services.interaction_writer import interaction_writer
+from app.services.rolling_summary import rolling_summaries
 from app.models.user import Session as SessionModel, SessionStatus
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_principal
 
 router = APIRouter()
 
+class AudioFormat(str, enum.Enum):
+    BASE64 = "base64"
+    BINARY = "binary"
+
+# Binary audio frame header: turn id, sequence number within the turn, codec id
+AUDIO_FRAME_HEADER = struct.Struct("!IIB")
+AUDIO_CODEC_WAV = 1
+
+async def send_audio(websocket: WebSocket, audio: bytes, turn_id: int, seq: int, audio_format: AudioFormat) -> None:
+    """Send an audio chunk either as a binary frame or as a base64 audio_chunk JSON event"""
+    if audio_format == AudioFormat.BINARY:
+        await websocket.send_bytes(AUDIO_FRAME_HEADER.pack(turn_id, seq, AUDIO_CODEC_WAV) + audio)
+    else:
+        await websocket.send_json({
+            "type": "audio_chunk",
+            "turn_id": turn_id,
+            "seq": seq,
+            "audio": base64.b64encode(audio).decode("utf-8")
+        })
+
 @router.post("/interact", response_model=Dict[str, Any])
 async def interact_with_ai(
     interaction: SessionInteractionCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """
     Process a single interaction with the AI counselor
     """
     # Verify session belongs to user
-    session = db.query(SessionModel).filter(SessionModel.id == interaction.session_id).first()
+    session = await db.get(SessionModel, interaction.session_id)
     if not session or session.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -32,9 +57,10 @@ async def interact_with_ai(
     # Update session status if it's the first interaction
     if session.status == SessionStatus.SCHEDULED:
         session.status = SessionStatus.IN_PROGRESS
-        db.commit()
+        await db.commit()
     
     response = await process_user_message(db, interaction.session_id, interaction.question)
+    rolling_summaries.notify(interaction.session_id)
     
     return {
         "session_id": interaction.session_id,
@@ -46,14 +72,14 @@ async def interact_with_ai(
 @router.post("/interact-with-audio")
 async def interact_with_audio(
     interaction: SessionInteractionCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """
     Process a single interaction with the AI counselor and return audio
     """
     # Verify session belongs to user
-    session = db.query(SessionModel).filter(SessionModel.id == interaction.session_id).first()
+    session = await db.get(SessionModel, interaction.session_id)
     if not session or session.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -61,6 +87,7 @@ async def interact_with_audio(
         )
     
     response = await process_user_message(db, interaction.session_id, interaction.question)
+    rolling_summaries.notify(interaction.session_id)
     
     # If audio is available, return it
     if response["audio"]:
@@ -73,36 +100,36 @@ async def interact_with_audio(
         return {"text": response["text"]}
 
 @router.get("/interactions/{session_id}", response_model=List[SessionInteraction])
-def get_interactions(
+async def get_interactions(
     session_id: int, 
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
 ):
     """
     Get all interactions for a specific session
     """
     # Verify session belongs to user
-    session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+    session = await db.get(SessionModel, session_id)
     if not session or session.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this session"
         )
         
-    interactions = get_session_interactions(db, session_id)
+    interactions = await get_session_interactions(db, session_id)
     return interactions
 
 @router.post("/end-session/{session_id}")
 async def end_session(
     session_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """
     End a counseling session and generate a summary
     """
     # Verify session belongs to user
-    session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+    session = await db.get(SessionModel, session_id)
     if not session or session.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -115,48 +142,93 @@ async def end_session(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=result["message"]
         )
+    rolling_summaries.discard(session_id)
     return result
 
+async def relay_streamed_response(websocket: WebSocket, elevenlabs_ai: ElevenLabsConversationalAI, message: str, user_id: int, user_context: Dict[str, Any], turn_id: int, audio_format: AudioFormat) -> Dict[str, Any]:
+    """
+    Forward partial text and audio to the client as soon as ElevenLabs produces them
+    Returns the complete response and the number of audio chunks sent once the turn has finished
+    """
+    full_response = []
+    audio_frames = 0
+    
+    # Closed right away if the client goes away mid-turn, freeing the upstream connection and admission slot
+    async with contextlib.aclosing(elevenlabs_ai.stream_message(message, user_id, user_context)) as events:
+        async for event in events:
+            if event["type"] == "text":
+                full_response.append(event["text"])
+                await websocket.send_json({
+                    "type": "response_delta",
+                    "turn_id": turn_id,
+                    "text": event["text"]
+                })
+            elif event["type"] == "audio":
+                await send_audio(websocket, event["audio"], turn_id, audio_frames, audio_format)
+                audio_frames += 1
+            elif event["type"] == "error":
+                full_response = [event["text"]]
+    
+    return {
+        "text": "".join(full_response),
+        "audio": None,
+        "audio_frames": audio_frames
+    }
+
 @router.websocket("/ws/{session_id}")
-async def websocket_endpoint(websocket: WebSocket, session_id: int, db: Session = Depends(get_db)):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    session_id: int,
+    stream: bool = False,
+    audio: AudioFormat = AudioFormat.BASE64
+):
     """
     WebSocket endpoint for real-time AI counseling
+    With ?stream=true partial text (response_delta) and audio (audio_chunk) events
+    are sent while the agent responds, followed by the final response event.
+    With ?audio=binary audio is sent as binary frames prefixed by AUDIO_FRAME_HEADER
+    instead of base64 inside JSON; text and control events stay JSON.
     """
     await websocket.accept()
     
-    # Initialize ElevenLabs service
-    elevenlabs_ai = ElevenLabsConversationalAI()
+    # Initialize ElevenLabs service, keeping one upstream connection for the whole conversation
+    elevenlabs_ai = ElevenLabsConversationalAI(persistent=True)
     
     try:
-        # Get session to verify it exists and get user_id
-        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
-        if not session:
-            await websocket.send_json({"error": "Session not found"})
-            await websocket.close()
-            return
+        # Use a short-lived DB session so no connection is held while the conversation is idle
+        async with AsyncSessionLocal() as db:
+            # Get session to verify it exists and get user_id
+            session = await db.get(SessionModel, session_id)
+            if not session:
+                await websocket.send_json({"error": "Session not found"})
+                await websocket.close()
+                return
+                
+            user_id = session.user_id
             
-        user_id = session.user_id
-        
-        # Update session status if it's the first interaction
-        if session.status == SessionStatus.SCHEDULED:
-            session.status = SessionStatus.IN_PROGRESS
-            db.commit()
-        
-        # Get user context including psychometric data
-        user_context = await get_user_context(db, user_id)
+            # Update session status if it's the first interaction
+            if session.status == SessionStatus.SCHEDULED:
+                session.status = SessionStatus.IN_PROGRESS
+                await db.commit()
+            
+            # Get user context including psychometric data
+            user_context = await get_user_context(db, user_id)
         
         # Start conversation
-        await elevenlabs_ai.start_conversation(user_context)
+        await elevenlabs_ai.start_conversation(user_context, user_id=user_id)
         
         # Send initial message to client
         await websocket.send_json({
             "type": "system",
-            "text": "Connected to AI counselor. You can start your conversation now."
+            "text": "Connected to AI counselor. You can start your conversation now.",
+            "protocol": {"stream": stream, "audio": audio.value}
         })
         
+        turn_id = 0
         while True:
             # Receive message from client
             data = await websocket.receive_text()
+            turn_id += 1
             
             # Send typing indicator
             await websocket.send_json({
@@ -165,22 +237,27 @@ async def websocket_endpoint(websocket: WebSocket, session_id: int, db: Session
             })
             
             # Process message with ElevenLabs
-            response = await elevenlabs_ai.process_message(data, user_id, user_context)
+            if stream:
+                response = await relay_streamed_response(websocket, elevenlabs_ai, data, user_id, user_context, turn_id, audio)
+            else:
+                response = await elevenlabs_ai.process_message(data, user_id, user_context)
+                response["audio_frames"] = 0
+                if audio == AudioFormat.BINARY and response["audio"]:
+                    await send_audio(websocket, response["audio"], turn_id, 0, audio)
+                    response["audio"] = None
+                    response["audio_frames"] = 1
             
-            # Store interaction in database
-            db_interaction = SessionInteraction(
-                session_id=session_id,
-                question=data,
-                answer=response["text"]
-            )
-            db.add(db_interaction)
-            db.commit()
+            # Queue interaction for the next batched insert
+            interaction_writer.add(session_id, data, response["text"])
+            rolling_summaries.notify(session_id)
             
             # Send response back to client
             await websocket.send_json({
                 "type": "response",
+                "turn_id": turn_id,
                 "text": response["text"],
-                "audio": base64.b64encode(response["audio"]).decode("utf-8") if response["audio"] else None
+                "audio": base64.b64encode(response["audio"]).decode("utf-8") if response["audio"] else None,
+                "audio_frames": response["audio_frames"]
             })
             
     except WebSocketDisconnect:
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict, Any
+
+from app.core.admission import upstream_admission
+from app.core.db_metrics import pool_metrics
+from app.core.hashing import password_hasher
+from app.core.email_delivery import email_delivery
+from app.services.reminder_scheduler import reminder_scheduler
+from app.services.report_extraction import report_extractor
+from app.services.roadmap_jobs import roadmap_jobs
+from app.services.report_service import career_roadmap_cache, country_roadmap_cache
+from app.services.rolling_summary import rolling_summaries
+from app.core.auth import get_current_user
+from app.models.user import UserRole
+
+router = APIRouter()
+
+def require_admin(current_user = Depends(get_current_user)):
+    """Only admins may read operational metrics"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this resource"
+        )
+    return current_user
+
+@router.get("/upstream", response_model=Dict[str, Any])
+def get_upstream_metrics(current_user = Depends(require_admin)):
+    """
+    Get in-flight count, queue depth and wait times of ElevenLabs calls
+    """
+    return upstream_admission.metrics()
+
+@router.get("/database", response_model=Dict[str, Any])
+def get_database_metrics(current_user = Depends(require_admin)):
+    """
+    Get connection pool usage, checkout wait histogram and long-held connections per route
+    """
+    return pool_metrics.snapshot()
+
+@router.get("/hashing", response_model=Dict[str, Any])
+def get_hashing_metrics(current_user = Depends(require_admin)):
+    """
+    Get password hashing pool usage, queue wait histogram and rehash count
+    """
+    return password_hasher.metrics()
+
+@router.get("/email", response_model=Dict[str, Any])
+def get_email_metrics(current_user = Depends(require_admin)):
+    """
+    Get email delivery queue depth, retries and SMTP connection reuse
+    """
+    return email_delivery.metrics()
+
+@router.get("/reminders", response_model=Dict[str, Any])
+def get_reminder_metrics(current_user = Depends(require_admin)):
+    """
+    Get the number of pending reminder timers and how many reminders were fired and sent
+    """
+    return reminder_scheduler.metrics()
+
+@router.get("/extraction", response_model=Dict[str, Any])
+def get_extraction_metrics(current_user = Depends(require_admin)):
+    """
+    Get report extraction pool usage, deduplicated parses, timeouts and parse times
+    """
+    return report_extractor.metrics()
+
+@router.get("/roadmap-jobs", response_model=Dict[str, Any])
+def get_roadmap_job_metrics(current_user = Depends(require_admin)):
+    """
+    Get running roadmap jobs and how many were queued, deduplicated, answered from the roadmap cache, completed and failed
+    """
+    return roadmap_jobs.metrics()
+
+@router.get("/roadmap-cache", response_model=Dict[str, Any])
+def get_roadmap_cache_metrics(current_user = Depends(require_admin)):
+    """
+    Get size and hit/miss counts of the career roadmap cache; /roadmap-jobs counts the
+    requests answered from it, including roadmaps found in the database
+    """
+    return career_roadmap_cache.stats()
+
+@router.get("/foreign-study-cache", response_model=Dict[str, Any])
+def get_foreign_study_cache_metrics(current_user = Depends(require_admin)):
+    """
+    Get size and hit/miss counts of the per-country foreign study roadmap cache
+    """
+    return country_roadmap_cache.stats()
+
+@router.get("/rolling-summaries", response_model=Dict[str, Any])
+def get_rolling_summary_metrics(current_user = Depends(require_admin)):
+    """
+    Get running rolling session summary updates and how many were made, skipped and failed
+    """
+    return rolling_summaries.metrics()
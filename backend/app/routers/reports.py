@@ -1,43 +1,111 @@
+import json
+import asyncio
+import uuid
+import zipfile
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
-from app.schemas.user import PsychometricData, CareerRoadmap
-from app.services.report_service import upload_psychometric_report, generate_career_roadmap, get_user_roadmaps
-from app.core.auth import get_current_user
-from app.models.user import PsychometricData as PsychometricDataModel
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.models.user import CareerRoadmap as CareerRoadmapModel, PsychometricData as PsychometricDataModel, ReportJob as ReportJobModel, RoadmapJobStatus, UserRole
+from app.schemas.user import PsychometricData, CareerRoadmap, ReportJob, ReportImport, RoadmapJob, ForeignStudyRoadmap, ForeignStudyRoadmapRequest
+from app.services.report_service import upload_psychometric_report, get_user_roadmaps, get_latest_psychometric_data, get_report_job, generate_foreign_study_roadmap, get_user_foreign_study_roadmaps
+from app.core.auth import get_current_user, get_current_principal
+from app.services.roadmap_jobs import roadmap_jobs
+from app.services.import_service import ManifestError, parse_manifest, create_import, get_import, follow_import, unfollow_import
+from app.core.storage import UploadTooLarge, stream_upload, commit_upload, discard_file
 
 router = APIRouter()
 
-@router.post("/psychometric", response_model=PsychometricData)
+def require_staff(current_user = Depends(get_current_user)):
+    """Bulk imports are run by admins and counselors"""
+    if current_user.role not in (UserRole.ADMIN, UserRole.COUNSELOR):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this resource"
+        )
+    return current_user
+
+async def import_progress(import_id: int):
+    """Newline-delimited JSON progress events of an import running in the background"""
+    queue = follow_import(import_id)
+    try:
+        while (event := await queue.get()) is not None:
+            yield json.dumps(jsonable_encoder(event)) + "\n"
+    finally:
+        unfollow_import(import_id, queue)
+
+@router.post(
+    "/psychometric",
+    response_model=PsychometricData,
+    responses={status.HTTP_202_ACCEPTED: {"model": ReportJob, "description": "Large report, extraction continues in the background"}}
+)
 async def upload_report(
     file: UploadFile = File(...), 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """
-    Upload and process a psychometric test report
+    Upload and process a psychometric test report. Large reports are answered with 202
+    and a job to poll at /psychometric/jobs/{job_id}
     """
-    result = await upload_psychometric_report(db, current_user.id, file)
+    try:
+        result = await upload_psychometric_report(db, current_user.id, file)
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     if not result:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to process psychometric report"
         )
+    if isinstance(result, ReportJobModel):
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=jsonable_encoder(ReportJob.from_orm(result)),
+            headers={"Location": f"/api/reports/psychometric/jobs/{result.id}"}
+        )
     return result
 
+async def report_job_response(db: AsyncSession, job) -> ReportJob:
+    """A report job with its psychometric data once it is completed"""
+    result = ReportJob.from_orm(job)
+    if job.psychometric_data_id is not None:
+        result.psychometric_data = PsychometricData.from_orm(await db.get(PsychometricDataModel, job.psychometric_data_id))
+    return result
+
+@router.get("/psychometric/jobs/{job_id}", response_model=ReportJob)
+async def read_report_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
+):
+    """
+    Get the status of a background report extraction, with its psychometric data once completed
+    """
+    job = await get_report_job(db, job_id)
+    
+    if not job or (job.user_id != current_user.id and current_user.role not in (UserRole.ADMIN, UserRole.COUNSELOR)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report job not found"
+        )
+    return await report_job_response(db, job)
+
 @router.get("/psychometric/latest", response_model=PsychometricData)
-def get_latest_psychometric_data(
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+async def read_latest_psychometric_data(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
 ):
     """
     Get the latest psychometric data for the current user
     """
-    data = db.query(PsychometricDataModel).filter(
-        PsychometricDataModel.user_id == current_user.id
-    ).order_by(PsychometricDataModel.uploaded_at.desc()).first()
+    data = await get_latest_psychometric_data(db, current_user.id)
     
     if not data:
         raise HTTPException(
@@ -46,38 +114,75 @@ def get_latest_psychometric_data(
         )
     return data
 
-@router.post("/roadmap", response_model=CareerRoadmap)
+async def roadmap_job_response(db: AsyncSession, job) -> RoadmapJob:
+    """A roadmap job with its roadmap once it is completed"""
+    result = RoadmapJob.from_orm(job)
+    if job.roadmap_id is not None:
+        result.roadmap = CareerRoadmap.from_orm(await db.get(CareerRoadmapModel, job.roadmap_id))
+    return result
+
+@router.post(
+    "/roadmap",
+    response_model=RoadmapJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={status.HTTP_200_OK: {"model": RoadmapJob, "description": "Profile unchanged, completed job with the cached roadmap"}}
+)
 async def create_roadmap(
-    db: Session = Depends(get_db),
+    response: Response,
+    force_refresh: bool = False,
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """
-    Generate a career roadmap based on psychometric data
+    Queue generation of a career roadmap based on the latest psychometric data. Poll the
+    returned job at /roadmap/jobs/{job_id}; asking again while it is unfinished returns the same job.
+    While the profile is unchanged the last roadmap is returned right away (200) unless
+    force_refresh is set
     """
-    roadmap = await generate_career_roadmap(db, current_user.id)
-    if not roadmap:
+    job = await roadmap_jobs.submit(db, current_user.id, force_refresh=force_refresh)
+    if not job:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to generate career roadmap. Ensure psychometric data exists."
         )
-    return roadmap
+    response.headers["Location"] = f"/api/reports/roadmap/jobs/{job.id}"
+    if job.status == RoadmapJobStatus.COMPLETED:
+        response.status_code = status.HTTP_200_OK
+    return await roadmap_job_response(db, job)
+
+@router.get("/roadmap/jobs/{job_id}", response_model=RoadmapJob)
+async def read_roadmap_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
+):
+    """
+    Get the status of a roadmap generation job, with the roadmap once it is completed
+    """
+    job = await roadmap_jobs.get(db, job_id)
+    if not job or (job.user_id != current_user.id and current_user.role not in (UserRole.ADMIN, UserRole.COUNSELOR)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Roadmap job not found"
+        )
+    return await roadmap_job_response(db, job)
 
 @router.get("/roadmaps", response_model=List[CareerRoadmap])
-def get_roadmaps(
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+async def get_roadmaps(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
 ):
     """
     Get all career roadmaps for the current user
     """
-    roadmaps = get_user_roadmaps(db, current_user.id)
+    roadmaps = await get_user_roadmaps(db, current_user.id)
     return roadmaps
 
 @router.get("/roadmaps/{user_id}", response_model=List[CareerRoadmap])
-def get_user_roadmaps_admin(
+async def get_user_roadmaps_admin(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
 ):
     """
     Get all career roadmaps for a specific user (admin only)
@@ -89,5 +194,120 @@ def get_user_roadmaps_admin(
             detail="Not authorized to access this resource"
         )
         
-    roadmaps = get_user_roadmaps(db, user_id)
+    roadmaps = await get_user_roadmaps(db, user_id)
     return roadmaps
+
+@router.post("/foreign-study-roadmap", response_model=ForeignStudyRoadmap)
+async def create_foreign_study_roadmap(
+    request: ForeignStudyRoadmapRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Generate a foreign study roadmap for the target countries based on the latest
+    psychometric data. Countries are generated in parallel and reused from earlier
+    roadmaps of the same profile
+    """
+    if not request.target_countries or len(request.target_countries) > settings.FOREIGN_STUDY_MAX_COUNTRIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Choose between 1 and {settings.FOREIGN_STUDY_MAX_COUNTRIES} target countries"
+        )
+    
+    roadmap = await generate_foreign_study_roadmap(db, current_user.id, request.target_countries)
+    if not roadmap:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to generate foreign study roadmap. Ensure psychometric data exists."
+        )
+    return roadmap
+
+@router.get("/foreign-study-roadmaps", response_model=List[ForeignStudyRoadmap])
+async def get_foreign_study_roadmaps(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
+):
+    """
+    Get all foreign study roadmaps for the current user
+    """
+    return await get_user_foreign_study_roadmaps(db, current_user.id)
+
+@router.get("/foreign-study-roadmaps/{user_id}", response_model=List[ForeignStudyRoadmap])
+async def get_user_foreign_study_roadmaps_admin(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
+):
+    """
+    Get all foreign study roadmaps for a specific user (admins and counselors)
+    """
+    if current_user.role not in (UserRole.ADMIN, UserRole.COUNSELOR):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this resource"
+        )
+    return await get_user_foreign_study_roadmaps(db, user_id)
+
+@router.post("/imports")
+async def import_reports(
+    manifest: UploadFile = File(...),
+    archive: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(require_staff)
+):
+    """
+    Bulk import a zip archive of psychometric reports with a CSV manifest mapping each
+    file to a student (columns: file, and email or user_id). The import runs in the
+    background; the response streams newline-delimited JSON progress, one event per report
+    """
+    try:
+        rows = parse_manifest((await manifest.read()).decode("utf-8-sig"))
+    except (ManifestError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid manifest: {e}")
+    
+    try:
+        staged = await stream_upload(
+            archive,
+            settings.REPORT_IMPORTS_DIR,
+            max_bytes=settings.REPORT_IMPORT_MAX_BYTES,
+            chunk_size=settings.UPLOAD_CHUNK_BYTES
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    if not await asyncio.to_thread(zipfile.is_zipfile, staged.path):
+        await discard_file(staged.path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Archive is not a zip file")
+    
+    # Kept under its own name so the import can be resumed from it
+    source = f"{settings.REPORT_IMPORTS_DIR}/{uuid.uuid4().hex}.zip"
+    await commit_upload(staged, source)
+    report_import = await create_import(db, source, rows, created_by=current_user.id)
+    return StreamingResponse(import_progress(report_import.id), media_type="application/x-ndjson")
+
+@router.post("/imports/{import_id}/resume")
+async def resume_import(
+    import_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(require_staff)
+):
+    """
+    Continue an interrupted bulk import with the reports it has not finished. Streams
+    progress like the import itself
+    """
+    if not await get_import(db, import_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+    return StreamingResponse(import_progress(import_id), media_type="application/x-ndjson")
+
+@router.get("/imports/{import_id}", response_model=ReportImport)
+async def read_import(
+    import_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(require_staff)
+):
+    """
+    Get the progress of a bulk import
+    """
+    report_import = await get_import(db, import_id)
+    if not report_import:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+    return report_import
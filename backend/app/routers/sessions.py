@@ -1,20 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.schemas.user import Session as SessionSchema, SessionCreate, SessionUpdate
 from app.services.session_service import create_session, get_session, get_sessions_by_user, update_session, cancel_session
-from app.core.auth import get_current_user
-from app.models.user import UserRole
+from app.core.auth import get_current_user, get_current_principal
+from app.models.user import User, UserRole
 
 router = APIRouter()
 
 @router.post("/", response_model=SessionSchema, status_code=status.HTTP_201_CREATED)
 async def create_new_session(
     session: SessionCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """
@@ -29,10 +30,11 @@ async def create_new_session(
         
     # If counselor_id is provided, verify the counselor exists
     if session.counselor_id:
-        counselor = db.query(User).filter(
+        result = await db.execute(select(User).where(
             User.id == session.counselor_id,
             User.role == UserRole.COUNSELOR
-        ).first()
+        ))
+        counselor = result.scalars().first()
         
         if not counselor:
             raise HTTPException(
@@ -50,21 +52,21 @@ async def create_new_session(
     return await create_session(db=db, session=session)
 
 @router.get("/my", response_model=List[SessionSchema])
-def read_my_sessions(
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+async def read_my_sessions(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
 ):
     """
     Get all sessions for the current user
     """
-    sessions = get_sessions_by_user(db, user_id=current_user.id)
+    sessions = await get_sessions_by_user(db, user_id=current_user.id)
     return sessions
 
 @router.get("/user/{user_id}", response_model=List[SessionSchema])
-def read_user_sessions(
+async def read_user_sessions(
     user_id: int, 
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
 ):
     """
     Get all sessions for a specific user (admin or counselor only)
@@ -76,19 +78,19 @@ def read_user_sessions(
             detail="Not authorized to access this resource"
         )
         
-    sessions = get_sessions_by_user(db, user_id=user_id)
+    sessions = await get_sessions_by_user(db, user_id=user_id)
     return sessions
 
 @router.get("/{session_id}", response_model=SessionSchema)
-def read_session(
+async def read_session(
     session_id: int, 
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal)
 ):
     """
     Get a specific session
     """
-    db_session = get_session(db, session_id=session_id)
+    db_session = await get_session(db, session_id=session_id)
     if db_session is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -105,16 +107,16 @@ def read_session(
     return db_session
 
 @router.put("/{session_id}", response_model=SessionSchema)
-def update_session_info(
+async def update_session_info(
     session_id: int, 
     session: SessionUpdate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """
     Update a specific session
     """
-    db_session = get_session(db, session_id=session_id)
+    db_session = await get_session(db, session_id=session_id)
     if db_session is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -128,19 +130,19 @@ def update_session_info(
             detail="Not authorized to update this session"
         )
         
-    return update_session(db=db, session_id=session_id, session=session)
+    return await update_session(db=db, session_id=session_id, session=session)
 
 @router.post("/{session_id}/cancel", response_model=SessionSchema)
-def cancel_session_endpoint(
+async def cancel_session_endpoint(
     session_id: int,
     reason: str = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """
     Cancel a specific session
     """
-    db_session = get_session(db, session_id=session_id)
+    db_session = await get_session(db, session_id=session_id)
     if db_session is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -154,4 +156,4 @@ def cancel_session_endpoint(
             detail="Not authorized to cancel this session"
         )
         
-    return cancel_session(db=db, session_id=session_id, reason=reason)
+    return await cancel_session(db=db, session_id=session_id, reason=reason)
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import timedelta
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.schemas.user import User, UserCreate, UserUpdate, Token
-from app.services.user_service import create_user, get_user_by_email, get_user, get_users, update_user, authenticate_user
-from app.core.security import create_access_token
+from app.services.user_service import create_user, get_user_by_email, get_user, get_users, update_user, deactivate_user, authenticate_user
+from app.core.security import create_access_token, access_token_claims
 from app.core.config import settings
 from app.core.auth import get_current_user
 from app.models.user import UserRole
@@ -15,24 +15,24 @@ from app.models.user import UserRole
 router = APIRouter()
 
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
-def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_new_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new user
     """
-    db_user = get_user_by_email(db, email=user.email)
+    db_user = await get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    return create_user(db=db, user=user)
+    return await create_user(db=db, user=user)
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate user and provide access token
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,7 +42,7 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=access_token_claims(user), expires_delta=access_token_expires
     )
     
     return {
@@ -52,28 +52,28 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     }
 
 @router.get("/me", response_model=User)
-def read_current_user(current_user: User = Depends(get_current_user)):
+async def read_current_user(current_user: User = Depends(get_current_user)):
     """
     Get current authenticated user
     """
     return current_user
 
 @router.put("/me", response_model=User)
-def update_current_user(
+async def update_current_user(
     user: UserUpdate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Update current user
     """
-    return update_user(db=db, user_id=current_user.id, user=user)
+    return await update_user(db=db, user_id=current_user.id, user=user)
 
 @router.get("/", response_model=List[User])
-def read_users(
+async def read_users(
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -85,13 +85,13 @@ def read_users(
             detail="Not authorized to access this resource"
         )
         
-    users = get_users(db, skip=skip, limit=limit)
+    users = await get_users(db, skip=skip, limit=limit)
     return users
 
 @router.get("/{user_id}", response_model=User)
-def read_user(
+async def read_user(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -104,7 +104,7 @@ def read_user(
             detail="Not authorized to access this resource"
         )
         
-    db_user = get_user(db, user_id=user_id)
+    db_user = await get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -113,10 +113,10 @@ def read_user(
     return db_user
 
 @router.put("/{user_id}", response_model=User)
-def update_user_info(
+async def update_user_info(
     user_id: int, 
     user: UserUpdate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -128,10 +128,33 @@ def update_user_info(
             detail="Not authorized to update this user"
         )
         
-    db_user = get_user(db, user_id=user_id)
+    db_user = await get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return update_user(db=db, user_id=user_id, user=user)
+    return await update_user(db=db, user_id=user_id, user=user)
+
+@router.post("/{user_id}/deactivate", response_model=User)
+async def deactivate_user_account(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Deactivate a user (admin only)
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to deactivate users"
+        )
+        
+    db_user = await deactivate_user(db, user_id=user_id)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return db_user
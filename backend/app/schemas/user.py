@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, validator
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
-from app.models.user import UserRole, SessionStatus, SessionType
+from app.models.user import UserRole, SessionStatus, SessionType, ReportJobStatus, ReportImportStatus, RoadmapJobStatus
 
 # User schemas
 class UserBase(BaseModel):
@@ -39,6 +39,12 @@ class UserInDB(UserBase):
 class User(UserInDB):
     pass
 
+# Authenticated identity needed to authorize read-only routes
+class Principal(BaseModel):
+    id: int
+    email: str
+    role: UserRole
+
 # Token schemas
 class Token(BaseModel):
     token: str
@@ -67,6 +73,34 @@ class PsychometricData(PsychometricDataBase):
     class Config:
         orm_mode = True
 
+# Background report extraction
+class ReportJob(BaseModel):
+    id: str
+    status: ReportJobStatus
+    report_sha256: str
+    psychometric_data_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    psychometric_data: Optional[PsychometricData] = None  # Set once completed
+    
+    class Config:
+        orm_mode = True
+
+# Bulk report imports
+class ReportImport(BaseModel):
+    id: int
+    source: str
+    status: ReportImportStatus
+    total: int
+    imported: int
+    failed: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        orm_mode = True
+
 # Session schemas
 class SessionBase(BaseModel):
     session_type: SessionType
@@ -89,6 +123,9 @@ class Session(SessionBase):
     counselor_id: Optional[int] = None
     transcript: Optional[str] = None
     summary: Optional[str] = None
+    rolling_summary: Optional[str] = None  # Live summary while the session is in progress
+    summarized_turns: int = 0
+    rolling_summary_at: Optional[datetime] = None
     recording_url: Optional[str] = None
     created_at: datetime
     
@@ -128,7 +165,26 @@ class CareerRoadmap(CareerRoadmapBase):
     class Config:
         orm_mode = True
 
+# Roadmap job schemas
+class RoadmapJob(BaseModel):
+    id: str
+    status: RoadmapJobStatus
+    psychometric_data_id: int
+    roadmap_id: Optional[int] = None
+    sections: Optional[Dict[str, Any]] = None  # Finished sections while running, for progressive display
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    roadmap: Optional[CareerRoadmap] = None  # Set once completed
+    
+    class Config:
+        orm_mode = True
+
 # Foreign study roadmap schemas
+class ForeignStudyRoadmapRequest(BaseModel):
+    target_countries: List[str]
+
 class ForeignStudyRoadmapBase(BaseModel):
     roadmap_data: Dict[str, Any]
 
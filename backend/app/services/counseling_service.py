@@ -1,20 +1,38 @@
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import SessionInteraction, PsychometricData, User, Session as SessionModel
-from app.services.elevenlabs_service import ElevenLabsConversationalAI
-from app.core.email import send_session_summary
+from app.services.elevenlabs_service import ElevenLabsConversationalAI, UserContext
+from app.services.interaction_writer import interaction_writer
+from app.services.session_summary import SUMMARY_UNAVAILABLE, SummaryError, build_transcript, summarize_session, update_summary
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.email import stage_session_summary
+from app.core.email_delivery import email_delivery
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def process_user_message(db: Session, session_id: int, message: str) -> dict:
+# User/psychometric context per user id, shared by the HTTP and WebSocket counseling paths
+user_context_cache = TTLCache(
+    maxsize=settings.USER_CONTEXT_CACHE_SIZE,
+    ttl=settings.USER_CONTEXT_CACHE_TTL_SECONDS
+)
+
+def invalidate_user_context(user_id: int) -> None:
+    """
+    Drop the cached context of a user after their profile or psychometric data changed
+    """
+    user_context_cache.invalidate(user_id)
+
+async def process_user_message(db: AsyncSession, session_id: int, message: str) -> dict:
     """
     Process a user message using ElevenLabs Conversational AI and store the interaction
     """
     try:
         # Get session to verify it exists and get user_id
-        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        session = await db.get(SessionModel, session_id)
         if not session:
             logger.error(f"Session {session_id} not found")
             return {"text": "Session not found", "audio": None}
@@ -30,14 +48,8 @@ async def process_user_message(db: Session, session_id: int, message: str) -> di
         await elevenlabs_ai.start_conversation(user_context)
         response = await elevenlabs_ai.process_message(message, user_id, user_context)
         
-        # Store the interaction in the database
-        db_interaction = SessionInteraction(
-            session_id=session_id,
-            question=message,
-            answer=response["text"]
-        )
-        db.add(db_interaction)
-        db.commit()
+        # Queue the interaction for the next batched insert
+        interaction_writer.add(session_id, message, response["text"])
         
         logger.info(f"Stored interaction for session {session_id}")
         return response
@@ -49,66 +61,67 @@ async def process_user_message(db: Session, session_id: int, message: str) -> di
             "audio": None
         }
 
-def get_session_interactions(db: Session, session_id: int):
+async def get_session_interactions(db: AsyncSession, session_id: int):
     """
     Get all interactions for a specific session
     """
-    return db.query(SessionInteraction).filter(SessionInteraction.session_id == session_id).order_by(SessionInteraction.timestamp).all()
+    # Make queued interactions visible before reading
+    if interaction_writer.has_pending(session_id):
+        await interaction_writer.flush()
+    result = await db.execute(
+        select(SessionInteraction).where(SessionInteraction.session_id == session_id).order_by(SessionInteraction.timestamp, SessionInteraction.id)
+    )
+    return result.scalars().all()
 
-async def end_counseling_session(db: Session, session_id: int) -> dict:
+async def end_counseling_session(db: AsyncSession, session_id: int) -> dict:
     """
     End a counseling session and generate a summary
     """
     try:
+        # Write out queued interactions before building the transcript
+        await interaction_writer.flush()
+        
         # Get all interactions
-        interactions = get_session_interactions(db, session_id)
+        interactions = await get_session_interactions(db, session_id)
         
         if not interactions:
             logger.warning(f"No interactions found for session {session_id}")
             return {"success": False, "message": "No interactions found for this session"}
             
         # Get the session
-        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        session = await db.get(SessionModel, session_id)
         if not session:
             logger.error(f"Session {session_id} not found")
             return {"success": False, "message": "Session not found"}
             
-        # Build transcript
-        transcript = ""
-        for interaction in interactions:
-            transcript += f"Student: {interaction.question}\n"
-            transcript += f"Counselor: {interaction.answer}\n\n"
+        transcript = build_transcript(interactions)
         
         # Get user context
         user_id = session.user_id
         user_context = await get_user_context(db, user_id)
         
-        # Generate summary using ElevenLabs
-        elevenlabs_ai = ElevenLabsConversationalAI()
-        await elevenlabs_ai.start_conversation(user_context)
-        
-        summary_prompt = f"""
-        Please provide a concise summary of this counseling session. Focus on the main topics discussed,
-        advice given, and next steps recommended. Format it as a professional session summary that could
-        be shared with the student.
-        
-        Here's the transcript:
-        {transcript[:1000]}...
-        """
-        
-        summary_response = await elevenlabs_ai.process_message(summary_prompt, user_id, user_context)
-        summary = summary_response["text"]
+        # Fold the last turns into the rolling summary when there is one, else summarize
+        # the whole transcript, in parts for long sessions
+        try:
+            if session.rolling_summary and 0 < session.summarized_turns <= len(interactions):
+                recent = interactions[session.summarized_turns:]
+                summary = await update_summary(session.rolling_summary, recent, user_id, user_context, final=True)
+            else:
+                summary = await summarize_session(interactions, user_id, user_context)
+        except SummaryError as e:
+            # The session still ends; keep the summary written while it went on, if any
+            logger.error(f"Error summarizing session {session_id}: {str(e)}")
+            summary = session.rolling_summary or SUMMARY_UNAVAILABLE
         
         # Update session status and save transcript/summary
         session.status = "completed"
         session.transcript = transcript
         session.summary = summary
-        db.commit()
         
         # Get user details for email
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         
-        # Send session summary email
+        # Stage the session summary email in the same transaction; the dispatcher sends it after commit
         session_data = {
             "id": session.id,
             "user_id": user_id,
@@ -117,7 +130,9 @@ async def end_counseling_session(db: Session, session_id: int) -> dict:
             "summary": summary
         }
         
-        await send_session_summary(user.email, session_data)
+        await stage_session_summary(db, user.email, session_data)
+        await db.commit()
+        await email_delivery.notify()
         
         logger.info(f"Session {session_id} completed successfully")
         return {
@@ -130,27 +145,35 @@ async def end_counseling_session(db: Session, session_id: int) -> dict:
         logger.error(f"Error ending session {session_id}: {str(e)}")
         return {"success": False, "message": f"Error: {str(e)}"}
 
-async def get_user_context(db: Session, user_id: int) -> dict:
+async def get_user_context(db: AsyncSession, user_id: int) -> dict:
     """
     Get user context including psychometric data
+    Served from user_context_cache when possible; the returned dict is shared and must not be mutated
     """
+    context = user_context_cache.get(user_id)
+    if context is not None:
+        return context
+    
     # Get user details
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         logger.error(f"User {user_id} not found")
         return {}
     
     # Get psychometric data
-    psychometric_data = db.query(PsychometricData).filter(
-        PsychometricData.user_id == user_id
-    ).order_by(PsychometricData.uploaded_at.desc()).first()
+    result = await db.execute(
+        select(PsychometricData).where(
+            PsychometricData.user_id == user_id
+        ).order_by(PsychometricData.uploaded_at.desc()).limit(1)
+    )
+    psychometric_data = result.scalars().first()
     
     # Create context
-    context = {
+    context = UserContext({
         "name": user.full_name,
         "grade_class": user.grade_class,
         "expectations": user.expectations
-    }
+    })
     
     if psychometric_data:
         context.update({
@@ -162,4 +185,5 @@ async def get_user_context(db: Session, user_id: int) -> dict:
             "subjects_interested": psychometric_data.subjects_interested if hasattr(psychometric_data, 'subjects_interested') else []
         })
     
+    user_context_cache.set(user_id, context)
     return context
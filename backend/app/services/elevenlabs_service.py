@@ -2,31 +2,101 @@ import json
 import asyncio
 import websockets
 import base64
+import contextlib
 import uuid
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 from app.core.config import settings
+from app.core.admission import upstream_admission, Priority, AdmissionTimeout
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def build_context_data(user_context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the context payload sent with client_data"""
+    context_data = {
+        "career_counseling": True
+    }
+    
+    # Add user context if available
+    if user_context:
+        context_data["user_profile"] = {
+            "name": user_context.get("name", ""),
+            "grade_class": user_context.get("grade_class", ""),
+            "expectations": user_context.get("expectations", "")
+        }
+        
+        # Add psychometric data if available
+        if "interests" in user_context:
+            context_data["psychometric_data"] = {
+                "interests": user_context.get("interests", []),
+                "skills": user_context.get("skills", []),
+                "personality_type": user_context.get("personality_type", ""),
+                "aptitude": user_context.get("aptitude", {}),
+                "recommended_careers": user_context.get("recommended_careers", []),
+                "subjects_interested": user_context.get("subjects_interested", [])
+            }
+    
+    return context_data
+
+class UserContext(dict):
+    """
+    User and psychometric context that memoizes its serialized client_data context,
+    so cached contexts skip JSON serialization on every turn. Treat as read-only.
+    """
+    __slots__ = ("_context_json",)
+    
+    def context_json(self) -> str:
+        try:
+            return self._context_json
+        except AttributeError:
+            self._context_json = json.dumps(build_context_data(self))
+            return self._context_json
+
 class ElevenLabsConversationalAI:
     """Service for interacting with ElevenLabs Conversational AI"""
     
-    def __init__(self, agent_id: Optional[str] = None):
+    def __init__(self, agent_id: Optional[str] = None, persistent: bool = False, priority: Priority = Priority.INTERACTIVE):
         self.api_key = settings.ELEVENLABS_API_KEY
         self.agent_id = agent_id or settings.ELEVENLABS_AGENT_ID
-        self.websocket_url = f"wss://api.elevenlabs.io/v1/convai/conversation?agent_id={self.agent_id}"
+        self.websocket_url = f"{settings.ELEVENLABS_WS_URL}?agent_id={self.agent_id}"
         self.conversation_id = str(uuid.uuid4())
+        
+        # Persistent mode keeps one upstream socket open for the whole conversation
+        # instead of reconnecting (TLS + client_data handshake) on every message
+        self.persistent = persistent
+        self._websocket = None
+        self._user_id: Optional[int] = None
+        self._user_context: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+        
+        # Every upstream turn holds a slot of the shared admission controller
+        self.priority = priority
         logger.info(f"Initializing ElevenLabs Conversational AI with agent ID: {self.agent_id}")
     
-    async def start_conversation(self, user_data: Dict[str, Any]) -> str:
+    def is_configured(self) -> bool:
+        """Check whether real ElevenLabs credentials are configured"""
+        return self.api_key != "your-elevenlabs-api-key" and self.agent_id != "your-agent-id"
+    
+    async def start_conversation(self, user_data: Dict[str, Any], user_id: Optional[int] = None) -> str:
         """
         Initialize a conversation with the ElevenLabs agent
+        In persistent mode this opens the upstream WebSocket that following
+        process_message calls reuse
         Returns the conversation ID
         """
         logger.info(f"Starting conversation with user context: {user_data.keys()}")
+        self._user_context = user_data
+        self._user_id = user_id
+        
+        if self.persistent and user_id is not None and self.is_configured():
+            try:
+                await self._connect()
+            except Exception as e:
+                # process_message will retry the connection lazily
+                logger.error(f"Error opening ElevenLabs conversation {self.conversation_id}: {str(e)}")
+        
         return self.conversation_id
     
     async def process_message(self, message: str, user_id: int, user_context: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -34,120 +104,205 @@ class ElevenLabsConversationalAI:
         Process a text message through the ElevenLabs Conversational AI
         Returns the agent's response with audio data
         """
+        full_response = []
+        audio_chunks = []
+        
+        async with contextlib.aclosing(self.stream_message(message, user_id, user_context)) as events:
+            async for event in events:
+                if event["type"] == "text":
+                    full_response.append(event["text"])
+                elif event["type"] == "audio":
+                    audio_chunks.append(event["audio"])
+                elif event["type"] == "error":
+                    return {
+                        "text": event["text"],
+                        "audio": None
+                    }
+        
+        # Combine text fragments and audio chunks
+        return {
+            "text": "".join(full_response),
+            "audio": b''.join(audio_chunks) if audio_chunks else None
+        }
+    
+    async def stream_message(self, message: str, user_id: int, user_context: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a text message through the ElevenLabs Conversational AI, yielding
+        events as soon as they arrive from the agent:
+        {"type": "text", "text": ...}, {"type": "audio", "audio": bytes} or,
+        if the turn fails, a single {"type": "error", "text": ...}
+        """
         # Check if ElevenLabs API key is configured
-        if self.api_key == "your-elevenlabs-api-key" or self.agent_id == "your-agent-id":
+        if not self.is_configured():
             logger.warning("ElevenLabs API key or agent ID not configured. Using fallback response.")
-            return {
-                "text": f"I'm a career counselor AI. You asked: {message}\n\nTo get personalized responses, please configure ElevenLabs API key.",
-                "audio": None
+            yield {
+                "type": "text",
+                "text": f"I'm a career counselor AI. You asked: {message}\n\nTo get personalized responses, please configure ElevenLabs API key."
             }
+            return
             
         try:
             logger.info(f"Processing message from user {user_id}: {message[:50]}...")
             
-            # Connect to ElevenLabs WebSocket
-            headers = {"xi-api-key": self.api_key}
+            if self.persistent:
+                async with self._lock, upstream_admission.slot(self.priority):
+                    async with contextlib.aclosing(self._stream_persistent(message, user_id, user_context)) as events:
+                        async for event in events:
+                            yield event
+                return
             
-            async with websockets.connect(self.websocket_url, extra_headers=headers) as websocket:
-                # Prepare context data
-                context_data = {
-                    "career_counseling": True,
-                    "message": message
-                }
-                
-                # Add user context if available
-                if user_context:
-                    context_data["user_profile"] = {
-                        "name": user_context.get("name", ""),
-                        "grade_class": user_context.get("grade_class", ""),
-                        "expectations": user_context.get("expectations", "")
-                    }
-                    
-                    # Add psychometric data if available
-                    if "interests" in user_context:
-                        context_data["psychometric_data"] = {
-                            "interests": user_context.get("interests", []),
-                            "skills": user_context.get("skills", []),
-                            "personality_type": user_context.get("personality_type", ""),
-                            "aptitude": user_context.get("aptitude", {}),
-                            "recommended_careers": user_context.get("recommended_careers", []),
-                            "subjects_interested": user_context.get("subjects_interested", [])
-                        }
-                
-                # Initialize conversation with metadata
-                init_data = {
-                    "type": "client_data",
-                    "data": {
-                        "conversation_id": self.conversation_id,
-                        "user_id": str(user_id),
-                        "context": context_data
-                    }
-                }
-                
-                await websocket.send(json.dumps(init_data))
-                
-                # Wait for initialization confirmation
-                response = await websocket.recv()
-                response_data = json.loads(response)
-                
-                if response_data.get("type") != "metadata":
-                    logger.error(f"Expected metadata response, got: {response_data}")
-                    raise Exception(f"Expected metadata response, got: {response_data}")
-                
-                # Send the user message
-                text_message = {
-                    "type": "user_audio_chunk",
-                    "data": {
-                        "is_final": True,
-                        "text": message
-                    }
-                }
-                await websocket.send(json.dumps(text_message))
-                
-                # Process responses
-                full_response = ""
-                audio_chunks = []
-                
-                while True:
-                    response = await websocket.recv()
-                    response_data = json.loads(response)
-                    
-                    if response_data.get("type") == "agent_response":
-                        response_text = response_data.get("data", {}).get("text", "")
-                        full_response += response_text
-                        logger.debug(f"Received text response: {response_text[:50]}...")
-                    
-                    elif response_data.get("type") == "audio_response":
-                        # Decode base64 audio data
-                        audio_data = response_data.get("data", {}).get("audio")
-                        if audio_data:
-                            audio_chunks.append(base64.b64decode(audio_data))
-                            logger.debug("Received audio chunk")
-                    
-                    # Check if this is the end of the response
-                    if response_data.get("data", {}).get("is_final", False):
-                        logger.debug("Received final response marker")
-                        break
-                
-                # Combine audio chunks
-                combined_audio = b''.join(audio_chunks) if audio_chunks else None
-                
-                logger.info(f"Completed processing message. Response length: {len(full_response)}")
-                
-                return {
-                    "text": full_response,
-                    "audio": combined_audio
-                }
+            async with upstream_admission.slot(self.priority):
+                # Connect to ElevenLabs WebSocket
+                websocket = await self._open_websocket(user_id, user_context, message)
+                try:
+                    await self._send_user_message(websocket, message)
+                    async with contextlib.aclosing(self._iter_response(websocket)) as events:
+                        async for event in events:
+                            yield event
+                finally:
+                    await websocket.close()
                 
+        except AdmissionTimeout as e:
+            logger.error(f"ElevenLabs request for user {user_id} not admitted: {str(e)}")
+            yield {
+                "type": "error",
+                "text": "I'm sorry, our counselors are very busy right now. Please try again in a moment."
+            }
         except Exception as e:
             logger.error(f"Error in ElevenLabs conversation: {str(e)}")
-            return {
-                "text": "I'm sorry, I encountered an error processing your request. Please try again.",
-                "audio": None
+            yield {
+                "type": "error",
+                "text": "I'm sorry, I encountered an error processing your request. Please try again."
             }
     
     async def end_conversation(self) -> None:
         """Close the conversation with the ElevenLabs agent"""
         logger.info(f"Ending conversation {self.conversation_id}")
-        # In a production environment, you might want to send a closing message
-        # or perform cleanup operations
+        await self._close_websocket()
+    
+    async def _stream_persistent(self, message: str, user_id: int, user_context: Optional[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Run a turn over the conversation's upstream socket, reconnecting once if it dropped before any output"""
+        if user_context is not None:
+            self._user_context = user_context
+        self._user_id = user_id
+        
+        if self._websocket is None or self._websocket.closed:
+            await self._connect()
+        
+        started = False
+        completed = False
+        try:
+            try:
+                await self._send_user_message(self._websocket, message)
+                async with contextlib.aclosing(self._iter_response(self._websocket)) as events:
+                    async for event in events:
+                        started = True
+                        yield event
+            except websockets.ConnectionClosed:
+                if started:
+                    raise
+                logger.warning(f"ElevenLabs connection dropped for conversation {self.conversation_id}, reconnecting")
+                await self._connect()
+                await self._send_user_message(self._websocket, message)
+                async with contextlib.aclosing(self._iter_response(self._websocket)) as events:
+                    async for event in events:
+                        yield event
+            completed = True
+        finally:
+            if not completed:
+                # Don't reuse a socket left in the middle of a turn
+                await self._close_websocket()
+    
+    async def _connect(self) -> None:
+        """(Re)open the persistent upstream socket for this conversation"""
+        await self._close_websocket()
+        self._websocket = await self._open_websocket(self._user_id, self._user_context)
+        logger.info(f"Opened ElevenLabs connection for conversation {self.conversation_id}")
+    
+    async def _close_websocket(self) -> None:
+        """Close the persistent upstream socket if one is open"""
+        if self._websocket is None:
+            return
+        try:
+            await self._websocket.close()
+        except Exception as e:
+            logger.warning(f"Error closing ElevenLabs conversation {self.conversation_id}: {str(e)}")
+        finally:
+            self._websocket = None
+    
+    async def _open_websocket(self, user_id: int, user_context: Optional[Dict[str, Any]], message: Optional[str] = None):
+        """Connect to ElevenLabs and complete the client_data / metadata handshake"""
+        headers = {"xi-api-key": self.api_key}
+        websocket = await websockets.connect(self.websocket_url, extra_headers=headers)
+        
+        try:
+            # Initialize conversation with metadata
+            await websocket.send(self._client_data_message(user_id, user_context, message))
+            
+            # Wait for initialization confirmation
+            response = await websocket.recv()
+            response_data = json.loads(response)
+            
+            if response_data.get("type") != "metadata":
+                logger.error(f"Expected metadata response, got: {response_data}")
+                raise Exception(f"Expected metadata response, got: {response_data}")
+        except Exception:
+            await websocket.close()
+            raise
+        
+        return websocket
+    
+    def _client_data_message(self, user_id: int, user_context: Optional[Dict[str, Any]], message: Optional[str] = None) -> str:
+        """Serialize the client_data message, splicing in the pre-serialized user context"""
+        if isinstance(user_context, UserContext):
+            context_json = user_context.context_json()
+        else:
+            context_json = json.dumps(build_context_data(user_context))
+        
+        if message is not None:
+            context_json = f'{context_json[:-1]}, "message": {json.dumps(message)}}}'
+        
+        return (
+            f'{{"type": "client_data", "data": {{"conversation_id": {json.dumps(self.conversation_id)}, '
+            f'"user_id": {json.dumps(str(user_id))}, "context": {context_json}}}}}'
+        )
+    
+    async def _send_user_message(self, websocket, message: str) -> None:
+        """Send the user message for a single turn"""
+        text_message = {
+            "type": "user_audio_chunk",
+            "data": {
+                "is_final": True,
+                "text": message
+            }
+        }
+        await websocket.send(json.dumps(text_message))
+    
+    async def _iter_response(self, websocket) -> AsyncIterator[Dict[str, Any]]:
+        """Yield agent text and audio events until the final response marker"""
+        response_length = 0
+        
+        while True:
+            response = await websocket.recv()
+            response_data = json.loads(response)
+            
+            if response_data.get("type") == "agent_response":
+                response_text = response_data.get("data", {}).get("text", "")
+                if response_text:
+                    response_length += len(response_text)
+                    logger.debug(f"Received text response: {response_text[:50]}...")
+                    yield {"type": "text", "text": response_text}
+            
+            elif response_data.get("type") == "audio_response":
+                # Decode base64 audio data
+                audio_data = response_data.get("data", {}).get("audio")
+                if audio_data:
+                    logger.debug("Received audio chunk")
+                    yield {"type": "audio", "audio": base64.b64decode(audio_data)}
+            
+            # Check if this is the end of the response
+            if response_data.get("data", {}).get("is_final", False):
+                logger.debug("Received final response marker")
+                break
+        
+        logger.info(f"Completed processing message. Response length: {response_length}")
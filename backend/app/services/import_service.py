@@ -0,0 +1,459 @@
+import asyncio
+import csv
+import io
+import logging
+import os
+import time
+import zipfile
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Set, Tuple
+from sqlalchemy import delete, exists, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.storage import StagedUpload, UploadTooLarge, discard_file, store_blob
+from app.models.user import (
+    PsychometricData, ReportBlob, ReportImport, ReportImportItem, ReportImportItemStatus, ReportImportStatus, User
+)
+from app.services.counseling_service import invalidate_user_context
+from app.services.report_extraction import report_extractor
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ManifestRow = Tuple[str, Optional[str], Optional[int]]  # file, email, user_id
+
+class ManifestError(ValueError):
+    """Raised for a manifest that is not a CSV with a file column and an email or user_id column"""
+
+class ImportLeaseLost(Exception):
+    """Raised when another run took over an import whose lease this run let expire"""
+
+class ImportLease:
+    """
+    A run's exclusive hold on an import. It is claimed with a conditional UPDATE, so
+    concurrent runs of one import, from the API or the CLI, cannot both process its pending
+    items, and renewed in every transaction that writes the run's progress. A crashed run's
+    lease runs out after REPORT_IMPORT_LEASE_SECONDS.
+    """
+
+    def __init__(self, import_id: int, expires_at: datetime):
+        self.import_id = import_id
+        self.expires_at = expires_at
+
+    @classmethod
+    async def claim(cls, db: AsyncSession, import_id: int) -> Optional["ImportLease"]:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=settings.REPORT_IMPORT_LEASE_SECONDS)
+        result = await db.execute(
+            update(ReportImport)
+            .where(
+                ReportImport.id == import_id,
+                or_(ReportImport.lease_expires_at.is_(None), ReportImport.lease_expires_at < now)
+            )
+            .values(lease_expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return cls(import_id, expires_at) if result.rowcount else None
+
+    async def renew(self, db: AsyncSession) -> None:
+        """Extend the lease in the caller's transaction; raises ImportLeaseLost if it was taken over"""
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.REPORT_IMPORT_LEASE_SECONDS)
+        result = await db.execute(
+            update(ReportImport)
+            .where(ReportImport.id == self.import_id, ReportImport.lease_expires_at == self.expires_at)
+            .values(lease_expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            raise ImportLeaseLost(f"Import {self.import_id} was taken over by another run")
+        self.expires_at = expires_at
+
+    async def release(self, db: AsyncSession) -> None:
+        await db.execute(
+            update(ReportImport)
+            .where(ReportImport.id == self.import_id, ReportImport.lease_expires_at == self.expires_at)
+            .values(lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+def parse_manifest(text: str) -> List[ManifestRow]:
+    """Rows of a CSV manifest mapping report files to students by email or user_id"""
+    reader = csv.DictReader(io.StringIO(text))
+    columns = {(name or "").strip().lower() for name in reader.fieldnames or []}
+    if "file" not in columns or not columns & {"email", "user_id"}:
+        raise ManifestError("Manifest needs a file column and an email or user_id column")
+
+    rows = []
+    for line_number, row in enumerate(reader, start=2):
+        row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+        if not row.get("file"):
+            raise ManifestError(f"Line {line_number}: missing file")
+        user_id = row.get("user_id")
+        if user_id and not user_id.isdigit():
+            raise ManifestError(f"Line {line_number}: user_id must be a number")
+        if not (user_id or row.get("email")):
+            raise ManifestError(f"Line {line_number}: missing email or user_id")
+        rows.append((row["file"], row.get("email") or None, int(user_id) if user_id else None))
+    if not rows:
+        raise ManifestError("Manifest has no rows")
+    return rows
+
+class ReportSource:
+    """Report files of an import, read from a zip archive or a directory"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._archive = None
+        if not os.path.isdir(path):
+            self._archive = zipfile.ZipFile(path)
+            members = [info for info in self._archive.infolist() if not info.is_dir()]
+            self._members = {info.filename: info for info in members}
+            # Archives often wrap the files in a folder; match on the bare name when it is unambiguous
+            basenames = Counter(os.path.basename(info.filename) for info in members)
+            self._by_basename = {
+                os.path.basename(info.filename): info for info in members
+                if basenames[os.path.basename(info.filename)] == 1
+            }
+
+    def open(self, name: str) -> BinaryIO:
+        if self._archive is not None:
+            info = self._members.get(name) or self._by_basename.get(os.path.basename(name))
+            if info is None:
+                raise FileNotFoundError(f"{name} not found in archive")
+            return self._archive.open(info)
+
+        root = os.path.realpath(self.path)
+        path = os.path.realpath(os.path.join(root, name))
+        if os.path.commonpath([root, path]) != root:
+            raise FileNotFoundError(f"{name} is outside the import directory")
+        return open(path, "rb")
+
+    def close(self) -> None:
+        if self._archive is not None:
+            self._archive.close()
+
+def _store_report(source: ReportSource, name: str) -> StagedUpload:
+    with source.open(name) as report:
+        return store_blob(report, settings.REPORTS_DIR, settings.REPORT_MAX_BYTES, settings.UPLOAD_CHUNK_BYTES)
+
+async def create_import(db: AsyncSession, source: str, rows: List[ManifestRow], created_by: Optional[int] = None) -> ReportImport:
+    """
+    Record an import and one pending item per manifest row. Rows naming an unknown
+    student are failed right away.
+    """
+    emails = {email.lower() for _, email, user_id in rows if email and user_id is None}
+    user_ids = {user_id for _, _, user_id in rows if user_id is not None}
+    users_by_email, known_ids = {}, set()
+    for chunk in _chunks(sorted(emails), 500):
+        result = await db.execute(select(User.id, User.email).where(User.email.in_(chunk)))
+        users_by_email.update({email.lower(): user_id for user_id, email in result})
+    for chunk in _chunks(sorted(user_ids), 500):
+        result = await db.execute(select(User.id).where(User.id.in_(chunk)))
+        known_ids.update(result.scalars())
+
+    items = []
+    for file_name, email, user_id in rows:
+        if user_id is None:
+            user_id = users_by_email.get(email.lower())
+            error = None if user_id else f"No user with email {email}"
+        else:
+            error = None if user_id in known_ids else f"No user with id {user_id}"
+        items.append({
+            "file_name": file_name,
+            "email": email,
+            "user_id": user_id if error is None else None,
+            "status": ReportImportItemStatus.FAILED if error else ReportImportItemStatus.PENDING,
+            "error": error
+        })
+
+    report_import = ReportImport(
+        created_by=created_by,
+        source=source,
+        total=len(items),
+        imported=0,
+        failed=sum(1 for item in items if item["error"])
+    )
+    db.add(report_import)
+    await db.flush()
+    await db.execute(insert(ReportImportItem), [{"import_id": report_import.id, **item} for item in items])
+    await db.commit()
+    logger.info(f"Report import {report_import.id} created with {len(items)} reports from {source}")
+    return report_import
+
+async def get_import(db: AsyncSession, import_id: int) -> Optional[ReportImport]:
+    return await db.get(ReportImport, import_id)
+
+async def run_import(db: AsyncSession, import_id: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Process the pending items of an import, yielding a progress event per report.
+
+    Files are copied into report storage one by one and each distinct report starts
+    extracting on the report extractor's pool as soon as it lands. Extracted reports are
+    written in batches: one transaction bulk-inserts their psychometric data and
+    marks the items imported. Only committed work is marked done, so running an interrupted
+    import again picks up exactly the items that were left. The run holds the import's
+    lease throughout; while another run holds it this only yields an error.
+    """
+    report_import = await db.get(ReportImport, import_id)
+    if report_import is None:
+        yield {"event": "error", "import_id": import_id, "error": "Import not found"}
+        return
+    lease = await ImportLease.claim(db, import_id)
+    if lease is None:
+        yield {"event": "error", "import_id": import_id, "error": "Import is already running"}
+        return
+    await db.refresh(report_import)
+
+    result = await db.execute(
+        select(ReportImportItem)
+        .where(ReportImportItem.import_id == import_id, ReportImportItem.status == ReportImportItemStatus.PENDING)
+        .order_by(ReportImportItem.id)
+    )
+    items = result.scalars().all()
+    yield {"event": "started", **_progress(report_import), "pending": len(items)}
+
+    source: Optional[ReportSource] = None
+    blob_data: Dict[str, Optional[dict]] = {}  # extraction result of every blob seen, None until extracted
+    blob_paths: Dict[str, str] = {}
+    extractions: Dict[asyncio.Task, str] = {}
+    waiting: Dict[str, List[ReportImportItem]] = {}
+    batch: List[Tuple[ReportImportItem, Optional[dict], Optional[str]]] = []
+    try:
+        # Copy files into storage, extracting each distinct report as soon as it lands
+        staged_count = 0
+        for item in items:
+            if item.report_sha256 is None:
+                try:
+                    if source is None:
+                        source = await asyncio.to_thread(ReportSource, report_import.source)
+                    staged = await asyncio.to_thread(_store_report, source, item.file_name)
+                except (OSError, UploadTooLarge, zipfile.BadZipFile) as e:
+                    batch.append((item, None, str(e)))
+                    continue
+                item.report_sha256 = staged.sha256
+                if staged.sha256 not in blob_data:
+                    blob = await db.get(ReportBlob, staged.sha256)
+                    if blob is None:
+                        blob = ReportBlob(sha256=staged.sha256, path=staged.path, size=staged.size)
+                        db.add(blob)
+                    blob_data[blob.sha256] = blob.extracted_data
+                    blob_paths[blob.sha256] = blob.path
+                staged_count += 1
+                if staged_count % settings.REPORT_IMPORT_BATCH_SIZE == 0:
+                    await lease.renew(db)
+                    await db.commit()
+            elif item.report_sha256 not in blob_data:
+                # Staged before an interruption
+                blob = await db.get(ReportBlob, item.report_sha256)
+                blob_data[blob.sha256] = blob.extracted_data
+                blob_paths[blob.sha256] = blob.path
+
+            sha256 = item.report_sha256
+            if blob_data[sha256] is not None:
+                batch.append((item, blob_data[sha256], None))
+                continue
+            if sha256 not in waiting:
+                extractions[asyncio.ensure_future(report_extractor.extract(blob_paths[sha256], key=sha256))] = sha256
+                waiting[sha256] = []
+            waiting[sha256].append(item)
+        await lease.renew(db)
+        await db.commit()
+
+        # Write extracted reports in batches as they complete
+        batch_started = time.monotonic()
+        while extractions or batch:
+            if extractions:
+                timeout = max(0.0, batch_started + settings.REPORT_IMPORT_FLUSH_SECONDS - time.monotonic()) if batch else None
+                done, _ = await asyncio.wait(extractions, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if done and not batch:
+                    batch_started = time.monotonic()
+                for task in done:
+                    sha256 = extractions.pop(task)
+                    error = task.exception()
+                    data = None if error else task.result()
+                    for item in waiting.pop(sha256):
+                        batch.append((item, data, f"Extraction failed: {error}" if error else None))
+
+            if batch and (
+                not extractions
+                or len(batch) >= settings.REPORT_IMPORT_BATCH_SIZE
+                or time.monotonic() - batch_started >= settings.REPORT_IMPORT_FLUSH_SECONDS
+            ):
+                for event in await _write_batch(db, report_import, lease, batch, blob_data, blob_paths):
+                    yield event
+                batch = []
+                batch_started = time.monotonic()
+
+        remaining = await db.scalar(
+            select(ReportImportItem.id)
+            .where(ReportImportItem.import_id == import_id, ReportImportItem.status == ReportImportItemStatus.PENDING)
+            .limit(1)
+        )
+        if remaining is None:
+            report_import.status = ReportImportStatus.COMPLETED
+            report_import.finished_at = datetime.utcnow()
+            await lease.renew(db)
+            await db.commit()
+            if source is not None:
+                source.close()
+                source = None
+            await asyncio.to_thread(_remove_uploaded_archive, report_import.source)
+        logger.info(f"Report import {import_id}: {report_import.imported} imported, {report_import.failed} failed of {report_import.total}")
+        yield {"event": "finished", **_progress(report_import), "status": report_import.status}
+
+    except Exception as e:
+        logger.error(f"Error in report import {import_id}: {str(e)}")
+        await db.rollback()
+        yield {"event": "error", "import_id": import_id, "error": str(e)}
+    finally:
+        for task in extractions:
+            task.cancel()
+        if source is not None:
+            source.close()
+        try:
+            await lease.release(db)
+        except Exception as e:
+            logger.error(f"Error releasing report import {import_id}: {str(e)}")
+
+# Background import runs in this process, and the queues of the progress streams following them
+_import_runs: Dict[int, asyncio.Task] = {}
+_import_followers: Dict[int, Set[asyncio.Queue]] = {}
+
+def follow_import(import_id: int) -> asyncio.Queue:
+    """
+    Run an import in the background, unless this process is running it already, and
+    return a queue of its progress events ending with None. The run does not depend on
+    anyone reading the queue, so a client that disconnects does not stop it.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    _import_followers.setdefault(import_id, set()).add(queue)
+    if import_id not in _import_runs:
+        task = asyncio.create_task(_run_in_background(import_id))
+        _import_runs[import_id] = task
+        task.add_done_callback(lambda _: _import_runs.pop(import_id, None))
+    return queue
+
+def unfollow_import(import_id: int, queue: asyncio.Queue) -> None:
+    _import_followers.get(import_id, set()).discard(queue)
+
+async def _run_in_background(import_id: int) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            async for event in run_import(db, import_id):
+                for queue in _import_followers.get(import_id, ()):
+                    queue.put_nowait(event)
+    finally:
+        for queue in _import_followers.pop(import_id, ()):
+            queue.put_nowait(None)
+
+async def cancel_import_runs() -> None:
+    """Stop this process's background imports on shutdown; their leases are released and they can be resumed"""
+    for task in list(_import_runs.values()):
+        task.cancel()
+    await asyncio.gather(*_import_runs.values(), return_exceptions=True)
+
+async def _write_batch(db: AsyncSession, report_import: ReportImport, lease: ImportLease, batch,
+                       blob_data: Dict[str, Optional[dict]], blob_paths: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Commit a batch of extracted or failed items; returns their progress events"""
+    succeeded = [(item, data) for item, data, error in batch if error is None]
+
+    # Cache new extraction results on their blobs
+    for sha256 in {item.report_sha256 for item, _ in succeeded if blob_data.get(item.report_sha256) is None}:
+        data = next(data for item, data in succeeded if item.report_sha256 == sha256)
+        await db.execute(update(ReportBlob).where(ReportBlob.sha256 == sha256).values(extracted_data=data))
+        blob_data[sha256] = data
+
+    if succeeded:
+        result = await db.execute(
+            insert(PsychometricData).returning(PsychometricData.id, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": item.user_id,
+                    "interests": data["interests"],
+                    "skills": data["skills"],
+                    "personality_type": data["personality_type"],
+                    "aptitude": data["aptitude"],
+                    "recommended_careers": data["recommended_careers"],
+                    "subjects_interested": data["subjects_interested"],
+                    "report_url": blob_paths[item.report_sha256],
+                    "report_sha256": item.report_sha256
+                }
+                for item, data in succeeded
+            ]
+        )
+        for (item, _), psychometric_data_id in zip(succeeded, result.scalars().all()):
+            item.status = ReportImportItemStatus.IMPORTED
+            item.psychometric_data_id = psychometric_data_id
+
+    for item, _, error in batch:
+        if error is not None:
+            item.status = ReportImportItemStatus.FAILED
+            item.error = error
+    # Counted in SQL; "fetch" brings the totals back onto report_import for the progress events
+    await db.execute(
+        update(ReportImport)
+        .where(ReportImport.id == report_import.id)
+        .values(
+            imported=ReportImport.imported + len(succeeded),
+            failed=ReportImport.failed + len(batch) - len(succeeded)
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+
+    # Files that turned out not to be readable reports are not kept
+    unreadable = {item.report_sha256 for item, _, error in batch if error and item.report_sha256 and blob_data.get(item.report_sha256) is None}
+    unreadable_paths = []
+    if unreadable:
+        result = await db.execute(
+            delete(ReportBlob)
+            .where(
+                ReportBlob.sha256.in_(unreadable),
+                ReportBlob.extracted_data.is_(None),
+                ~exists().where(PsychometricData.report_sha256 == ReportBlob.sha256)
+            )
+            .returning(ReportBlob.path)
+        )
+        unreadable_paths = result.scalars().all()
+    await lease.renew(db)
+    await db.commit()
+    for path in unreadable_paths:
+        await discard_file(path)
+
+    for user_id in {item.user_id for item, _ in succeeded}:
+        invalidate_user_context(user_id)
+    return [
+        {
+            "event": "item",
+            "file": item.file_name,
+            "email": item.email,
+            "user_id": item.user_id,
+            "status": item.status,
+            "psychometric_data_id": item.psychometric_data_id,
+            "error": item.error,
+            **_progress(report_import)
+        }
+        for item, _, _ in batch
+    ]
+
+def _progress(report_import: ReportImport) -> Dict[str, Any]:
+    return {
+        "import_id": report_import.id,
+        "total": report_import.total,
+        "imported": report_import.imported,
+        "failed": report_import.failed
+    }
+
+def _remove_uploaded_archive(source: str) -> None:
+    """Archives uploaded through the API are kept until their import completes"""
+    imports_dir = os.path.realpath(settings.REPORT_IMPORTS_DIR)
+    if os.path.isfile(source) and os.path.dirname(os.path.realpath(source)) == imports_dir:
+        os.remove(source)
+
+def _chunks(values: List, size: int):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
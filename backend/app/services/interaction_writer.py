@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Set
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import SessionInteraction
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class InteractionWriter:
+    """
+    Write-behind buffer for SessionInteraction rows. Interactions are queued and
+    flushed as one multi-row INSERT every batch_size rows or flush_interval seconds,
+    whichever comes first. Readers call flush() first to see every queued write; rows
+    a flush is still inserting count as pending, and flush() waits for that flush.
+    A batch the database rejects is written row by row, and rows it rejects on their
+    own (e.g. for a session deleted meanwhile) are logged and dropped rather than
+    retried forever; rows failing for any other reason stay queued.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Dict[str, Any]] = []
+        self._flushing: List[Dict[str, Any]] = []  # Taken off _pending, not committed yet
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._write_through: Set[asyncio.Task] = set()
+        self.dropped = 0
+
+    def add(self, session_id: int, question: str, answer: str) -> None:
+        """Queue an interaction, timestamped now so ordering survives batching"""
+        with self._pending_lock:
+            self._pending.append({
+                "session_id": session_id,
+                "question": question,
+                "answer": answer,
+                "timestamp": datetime.utcnow()
+            })
+            pending = len(self._pending)
+
+        if self._task is None:
+            # No background flusher (scripts, tests): write through, off the event loop if there is one
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush_sync()
+                return
+            task = loop.create_task(self.flush())
+            self._write_through.add(task)
+            task.add_done_callback(self._write_through_done)
+        elif pending >= self.batch_size:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _write_through_done(self, task: asyncio.Task) -> None:
+        self._write_through.discard(task)
+        if not task.cancelled():
+            # Already logged, rows stay queued for the next flush
+            task.exception()
+
+    def has_pending(self, session_id: Optional[int] = None) -> bool:
+        with self._pending_lock:
+            rows = self._pending + self._flushing
+        if session_id is None:
+            return bool(rows)
+        return any(row["session_id"] == session_id for row in rows)
+
+    def flush_sync(self) -> int:
+        """Insert every queued interaction in one statement; returns the number of rows written"""
+        with self._flush_lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+                self._flushing = rows
+            if not rows:
+                return 0
+
+            db = SessionLocal()
+            try:
+                db.execute(insert(SessionInteraction), rows)
+                db.commit()
+            except (IntegrityError, DataError) as e:
+                logger.warning(f"Batch of {len(rows)} session interactions rejected, writing them one by one: {str(e)}")
+                db.rollback()
+                return self._write_rows(db, rows)
+            except Exception as e:
+                logger.error(f"Error flushing {len(rows)} session interactions: {str(e)}")
+                db.rollback()
+                self._requeue(rows)
+                raise
+            finally:
+                db.close()
+                with self._pending_lock:
+                    self._flushing = []
+
+            logger.debug(f"Flushed {len(rows)} session interactions")
+            return len(rows)
+
+    def _write_rows(self, db, rows: List[Dict[str, Any]]) -> int:
+        """Write rows one by one after their batch was rejected, dropping the rows rejected on their own"""
+        written = 0
+        for index, row in enumerate(rows):
+            try:
+                db.execute(insert(SessionInteraction), [row])
+                db.commit()
+                written += 1
+            except (IntegrityError, DataError) as e:
+                db.rollback()
+                self.dropped += 1
+                logger.error(f"Dropped session interaction for session {row['session_id']} at {row['timestamp']}: {str(e)}")
+            except Exception as e:
+                logger.error(f"Error flushing session interactions: {str(e)}")
+                db.rollback()
+                self._requeue(rows[index:])
+                raise
+        return written
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        """Put rows back in front so they are retried on the next flush"""
+        with self._pending_lock:
+            self._pending[:0] = rows
+
+    async def flush(self) -> int:
+        """Flush queued interactions without blocking the event loop, after any flush in progress"""
+        if not self.has_pending():
+            return 0
+        return await asyncio.to_thread(self.flush_sync)
+
+    async def start(self) -> None:
+        """Start the background flusher on the running event loop"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Session interaction writer started")
+
+    async def stop(self) -> None:
+        """Stop the background flusher and write out everything still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info("Session interaction writer stopped")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Already logged, rows stay queued for the next attempt
+                await asyncio.sleep(self.flush_interval)
+
+interaction_writer = InteractionWriter(
+    batch_size=settings.INTERACTION_FLUSH_BATCH_SIZE,
+    flush_interval=settings.INTERACTION_FLUSH_INTERVAL_MS / 1000
+)
@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.email import stage_session_reminder
+from app.core.email_delivery import email_delivery
+from app.models.user import Session as SessionModel, SessionStatus, User
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def send_due_reminders(db: AsyncSession, session_ids: Optional[Iterable[int]] = None) -> List[int]:
+    """
+    Claim every scheduled session starting within the reminder lead time whose reminder
+    has not been sent, and stage its reminder email in the same transaction. The claim is a
+    conditional update of reminder_sent_at, so when several workers fire at once only one
+    of them gets each session. Returns the ids of the sessions reminded.
+    """
+    now = datetime.utcnow()
+    conditions = [
+        SessionModel.status == SessionStatus.SCHEDULED,
+        SessionModel.reminder_sent_at.is_(None),
+        SessionModel.scheduled_time > now,
+        SessionModel.scheduled_time <= now + timedelta(minutes=settings.SESSION_REMINDER_MINUTES)
+    ]
+    if session_ids is not None:
+        conditions.append(SessionModel.id.in_(list(session_ids)))
+
+    try:
+        result = await db.execute(
+            update(SessionModel)
+            .where(*conditions)
+            .values(reminder_sent_at=now)
+            .returning(SessionModel.id)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = [row.id for row in result]
+        if not claimed:
+            await db.commit()
+            return []
+
+        # Sessions and their students in one query
+        result = await db.execute(
+            select(SessionModel, User)
+            .join(User, SessionModel.user_id == User.id)
+            .where(SessionModel.id.in_(claimed))
+        )
+        for session, user in result.all():
+            await stage_session_reminder(db, user.email, {
+                "id": session.id,
+                "user_id": session.user_id,
+                "user_name": user.full_name,
+                "session_type": session.session_type,
+                "scheduled_time": session.scheduled_time,
+                "status": session.status
+            })
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Error sending session reminders: {str(e)}")
+        await db.rollback()
+        raise
+
+    await email_delivery.notify()
+    logger.info(f"Reminders staged for sessions {claimed}")
+    return claimed
+
+class ReminderScheduler:
+    """
+    Timer heap of upcoming session reminders. Loaded from the sessions table on startup
+    and kept current by the session service on create, reschedule and cancel; a periodic
+    resync picks up sessions booked through other workers. Firing goes through
+    send_due_reminders, so a reminder is sent once no matter how many workers hold a timer.
+    """
+
+    def __init__(self, lead: timedelta, horizon: timedelta, resync_interval: float, retry_delay: float):
+        self.lead = lead
+        self.horizon = horizon
+        self.resync_interval = resync_interval
+        self.retry_delay = retry_delay
+        self._heap = []  # (fire_at, session_id)
+        self._fire_at: Dict[int, datetime] = {}  # live timer per session, heap entries not matching are stale
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"fired": 0, "reminded": 0, "resyncs": 0}
+
+    def schedule(self, session_id: int, scheduled_time: datetime) -> None:
+        """Set or move the reminder timer of a session"""
+        fire_at = scheduled_time - self.lead
+        now = datetime.utcnow()
+        if scheduled_time <= now or fire_at > now + self.horizon:
+            # Past, or far enough out that a later resync loads it
+            self.cancel(session_id)
+            return
+        self._fire_at[session_id] = fire_at
+        heapq.heappush(self._heap, (fire_at, session_id))
+        if self._wakeup is not None and self._heap[0][1] == session_id:
+            self._wakeup.set()
+
+    def cancel(self, session_id: int) -> None:
+        """Drop the reminder timer of a session; its heap entry is discarded lazily"""
+        self._fire_at.pop(session_id, None)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        await self.resync()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Reminder scheduler started with {len(self._fire_at)} timers")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("Reminder scheduler stopped")
+
+    async def resync(self) -> None:
+        """Load every unsent reminder due within the horizon"""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(SessionModel.id, SessionModel.scheduled_time).where(
+                    SessionModel.status == SessionStatus.SCHEDULED,
+                    SessionModel.reminder_sent_at.is_(None),
+                    SessionModel.scheduled_time > now,
+                    SessionModel.scheduled_time <= now + self.horizon + self.lead
+                )
+            )
+            rows = result.all()
+        for session_id, scheduled_time in rows:
+            if self._fire_at.get(session_id) != scheduled_time - self.lead:
+                self.schedule(session_id, scheduled_time)
+        self._stats["resyncs"] += 1
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, session_id = heapq.heappop(self._heap)
+            if self._fire_at.get(session_id) == fire_at:
+                del self._fire_at[session_id]
+                due.append(session_id)
+        return due
+
+    def _next_fire_at(self) -> Optional[datetime]:
+        while self._heap and self._fire_at.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def _run(self) -> None:
+        next_resync = datetime.utcnow() + timedelta(seconds=self.resync_interval)
+        while True:
+            now = datetime.utcnow()
+            next_fire_at = self._next_fire_at()
+            until = min(next_resync, next_fire_at) if next_fire_at else next_resync
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, (until - now).total_seconds()))
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            now = datetime.utcnow()
+            due = self._pop_due(now)
+            if due:
+                self._stats["fired"] += len(due)
+                try:
+                    async with AsyncSessionLocal() as db:
+                        reminded = await send_due_reminders(db, due)
+                    self._stats["reminded"] += len(reminded)
+                except Exception:
+                    # Already logged; the claim rolled back, so try these again shortly
+                    retry_at = now + timedelta(seconds=self.retry_delay)
+                    for session_id in due:
+                        self._fire_at[session_id] = retry_at
+                        heapq.heappush(self._heap, (retry_at, session_id))
+
+            if now >= next_resync:
+                try:
+                    await self.resync()
+                except Exception as e:
+                    logger.error(f"Error resyncing reminder timers: {str(e)}")
+                next_resync = now + timedelta(seconds=self.resync_interval)
+
+    def metrics(self):
+        return {
+            "timers": len(self._fire_at),
+            "next_fire_at": self._next_fire_at(),
+            **self._stats
+        }
+
+reminder_scheduler = ReminderScheduler(
+    lead=timedelta(minutes=settings.SESSION_REMINDER_MINUTES),
+    horizon=timedelta(hours=settings.REMINDER_HORIZON_HOURS),
+    resync_interval=settings.REMINDER_RESYNC_SECONDS,
+    retry_delay=settings.REMINDER_RETRY_DELAY_SECONDS
+)
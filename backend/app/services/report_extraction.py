@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.services.report_parser import parse_report
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ExtractionTimeout(Exception):
+    """Raised when parsing a report takes longer than the per-job timeout"""
+
+    def __init__(self, timeout: float):
+        super().__init__(f"Report extraction timed out after {timeout} seconds")
+        self.timeout = timeout
+
+class ReportExtractor:
+    """
+    Parses report PDFs on a pool of max_workers processes, so extraction never runs on the
+    event loop. At most max_workers jobs are handed to the pool at once and the rest wait
+    here; concurrent jobs for the same content hash share one parse. A job running past the
+    timeout has its pool torn down, since a running worker process cannot be cancelled.
+    """
+
+    def __init__(self, max_workers: int, timeout: float, max_pages: int):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._jobs: Dict[str, asyncio.Future] = {}  # in-flight parses by content hash
+        self._queued = 0
+        self._in_flight = 0
+        self._stats = {
+            "jobs": 0,
+            "deduplicated": 0,
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "pool_restarts": 0,
+            "seconds_total": 0.0,
+            "seconds_max": 0.0,
+        }
+
+    async def extract(self, path: str, key: Optional[str] = None) -> Dict[str, Any]:
+        """Extract psychometric data from a report; key (its SHA-256) joins an identical parse in flight"""
+        if key is not None and key in self._jobs:
+            self._stats["deduplicated"] += 1
+            return await asyncio.shield(self._jobs[key])
+
+        job = asyncio.ensure_future(self._run(path))
+        if key is not None:
+            self._jobs[key] = job
+            job.add_done_callback(lambda _: self._jobs.pop(key, None))
+        # A caller going away must not cancel a parse others may be waiting on
+        return await asyncio.shield(job)
+
+    async def _run(self, path: str) -> Dict[str, Any]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        self._stats["jobs"] += 1
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            try:
+                result = await self._submit(path)
+            except BrokenProcessPool:
+                # Pool torn down under this job by another job's timeout; run it once more
+                result = await self._submit(path)
+            self._stats["completed"] += 1
+            return result
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self._stats["seconds_total"] += elapsed
+            self._stats["seconds_max"] = max(self._stats["seconds_max"], elapsed)
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def _submit(self, path: str) -> Dict[str, Any]:
+        pool = self._get_pool()
+        future = pool.submit(parse_report, path, self.max_pages)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            logger.error(f"Extraction of {path} timed out after {self.timeout} seconds, restarting workers")
+            self._restart_pool(pool)
+            raise ExtractionTimeout(self.timeout)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned rather than forked, so workers don't inherit the API process's
+            # event loop, database connections and background threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Report extractor started with {self.max_workers} worker processes")
+        return self._pool
+
+    def _restart_pool(self, pool: ProcessPoolExecutor) -> None:
+        if self._pool is pool:
+            self._pool = None
+            self._stats["pool_restarts"] += 1
+        # ProcessPoolExecutor has no public way to kill a worker mid-task
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "timeout_seconds": self.timeout,
+            "queued": self._queued,
+            "in_flight": self._in_flight,
+            **self._stats
+        }
+
+report_extractor = ReportExtractor(
+    max_workers=settings.REPORT_EXTRACT_WORKERS,
+    timeout=settings.REPORT_EXTRACT_TIMEOUT_SECONDS,
+    max_pages=settings.REPORT_EXTRACT_MAX_PAGES
+)
@@ -0,0 +1,120 @@
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from pypdf import PdfReader
+
+# Holland interest areas scored by the aptitude analysis, e.g. "Social    25%"
+INTEREST_AREAS = ("Realistic", "Investigative", "Artistic", "Social", "Enterprising", "Conventional")
+
+# Reports do not list skills; these are the strengths each interest area describes
+AREA_SKILLS = {
+    "Realistic": ["Mechanical Aptitude", "Hands-on Problem Solving", "Physical Coordination"],
+    "Investigative": ["Analytical Thinking", "Research", "Problem Solving"],
+    "Artistic": ["Creativity", "Design", "Self-expression"],
+    "Social": ["Communication", "Empathy", "Teamwork"],
+    "Enterprising": ["Leadership", "Persuasion", "Decision Making"],
+    "Conventional": ["Organization", "Attention to Detail", "Planning"],
+}
+
+BULLETS = ("", "•", "●", "▪", "◦")
+MBTI_PATTERN = r"[EI][SN][TF][JP]"
+
+class ReportParseError(Exception):
+    """Raised when a PDF has none of the sections of a psychometric report"""
+
+def parse_report(path: str, max_pages: int) -> Dict[str, Any]:
+    """
+    Extract psychometric data from the text of a report PDF. CPU-bound; runs in a worker
+    process of the report extractor.
+    """
+    reader = PdfReader(path)
+    pages = [page.extract_text() or "" for page in reader.pages[:max_pages]]
+    return extract_fields(report_lines(pages))
+
+def report_lines(pages: List[str]) -> List[str]:
+    """Stripped, non-empty lines of all pages without page numbers and running headers"""
+    page_lines = [[line.strip() for line in page.splitlines() if line.strip()] for page in pages]
+    occurrences = Counter(line for lines in page_lines for line in set(lines))
+    repeated = {line for line, count in occurrences.items() if len(pages) >= 3 and count > len(pages) // 2}
+    return [
+        line for lines in page_lines for line in lines
+        if line not in repeated and not line.isdigit()
+    ]
+
+def is_heading(line: str) -> bool:
+    return line.isupper() and len(line.split()) >= 2 and not line.startswith(BULLETS)
+
+def section(lines: List[str], title: str) -> List[str]:
+    """Lines after the first heading ending with title, up to the next heading"""
+    for index, line in enumerate(lines):
+        if is_heading(line) and line.endswith(title):
+            body = []
+            for following in lines[index + 1:]:
+                if is_heading(following):
+                    break
+                body.append(following)
+            return body
+    return []
+
+def unique(items: List[str]) -> List[str]:
+    seen = set()
+    return [item for item in items if not (item.lower() in seen or seen.add(item.lower()))]
+
+def interest_scores(lines: List[str]) -> Dict[str, int]:
+    scores = {}
+    for line in lines:
+        match = re.fullmatch(r"(\w+)\s+(\d{1,3})\s*%", line)
+        if match and match.group(1) in INTEREST_AREAS and match.group(1) not in scores:
+            scores[match.group(1)] = int(match.group(2))
+    return scores
+
+def personality_type(text: str) -> Optional[str]:
+    match = re.search(rf"TYPE PREFERENCES\s*[-–]\s*({MBTI_PATTERN})\b", text)
+    if match is None:
+        match = re.search(rf"\b({MBTI_PATTERN})\b", text)
+    return match.group(1) if match else None
+
+def bullet_items(lines: List[str]) -> List[str]:
+    """Bulleted list entries, joining entries that wrap onto the next line"""
+    items = []
+    in_list = False
+    for line in lines:
+        if line.startswith(BULLETS):
+            items.append(line.lstrip("".join(BULLETS)).strip())
+            in_list = True
+        elif in_list and "%" not in line and not line.endswith("."):
+            items[-1] = f"{items[-1]} {line}"
+        else:
+            in_list = False
+    return [item for item in items if item]
+
+def short_items(lines: List[str], max_words: int = 6) -> List[str]:
+    """Entries of a plain list, skipping the prose and score lines around it"""
+    return [
+        line for line in lines
+        if len(line.split()) <= max_words and "%" not in line and not line.endswith((".", ":"))
+    ]
+
+def extract_fields(lines: List[str]) -> Dict[str, Any]:
+    text = "\n".join(lines)
+    scores = interest_scores(lines)
+    interests = [area for area, score in sorted(scores.items(), key=lambda item: -item[1]) if score > 0]
+    if not interests:
+        match = re.search(r"primary traits are ([\w ,]+?)\s*\.", text)
+        if match:
+            interests = [area for area in re.split(r",\s*|\s+and\s+", match.group(1)) if area in INTEREST_AREAS]
+
+    personality = personality_type(text)
+    careers = unique(bullet_items(section(lines, "CAREERS FOR YOU")))
+    subjects = unique(short_items(section(lines, "CAREER CHOICES")))
+    if not (scores or personality or careers):
+        raise ReportParseError("No psychometric data found in report")
+
+    return {
+        "interests": interests,
+        "skills": unique([skill for area in interests for skill in AREA_SKILLS[area]]),
+        "personality_type": personality,
+        "aptitude": {area.lower(): score for area, score in scores.items()},
+        "recommended_careers": careers,
+        "subjects_interested": subjects,
+    }
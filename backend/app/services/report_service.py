@@ -1,136 +1,301 @@
 import os
 import json
+import uuid
+import contextlib
+import hashlib
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from fastapi import UploadFile
-from sqlalchemy.orm import Session
-from typing import List
-from app.models.user import PsychometricData, CareerRoadmap, ForeignStudyRoadmap, User
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from app.models.user import PsychometricData, ReportBlob, ReportJob, ReportJobStatus, CareerRoadmap, ForeignStudyRoadmap, User
 from app.services.elevenlabs_service import ElevenLabsConversationalAI
+from app.core.admission import Priority
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.storage import UploadTooLarge, stream_upload, commit_upload, content_path, discard_file
+from app.services.counseling_service import invalidate_user_context
+from app.services.report_extraction import report_extractor
+from app.services.roadmap_parser import RoadmapStreamParser, CAREER_SECTIONS, FOREIGN_STUDY_SECTIONS
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def upload_psychometric_report(db: Session, user_id: int, file: UploadFile):
+# Called with each roadmap section (key, value) as soon as the agent has finished it
+SectionCallback = Callable[[str, Any], Awaitable[None]]
+
+# Career roadmap id per (user id, profile snapshot), so regenerating an unchanged profile is free
+career_roadmap_cache = TTLCache(
+    maxsize=settings.ROADMAP_CACHE_SIZE,
+    ttl=settings.ROADMAP_CACHE_TTL_SECONDS
+)
+
+# Foreign study roadmap sections per (profile snapshot, country)
+country_roadmap_cache = TTLCache(
+    maxsize=settings.FOREIGN_STUDY_CACHE_SIZE,
+    ttl=settings.FOREIGN_STUDY_CACHE_TTL_SECONDS
+)
+
+async def upload_psychometric_report(db: AsyncSession, user_id: int, file: UploadFile):
     """
-    Upload and process a psychometric test report
+    Upload and process a psychometric test report. Returns the psychometric data, or for
+    uploads over REPORT_SYNC_EXTRACT_MAX_BYTES a ReportJob that finishes in the background.
     """
     try:
         # Check if user exists
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             logger.error(f"User with ID {user_id} not found")
             return None
         
-        # Create directory if it doesn't exist
-        os.makedirs("data/reports", exist_ok=True)
-        
-        # Save file to disk
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        file_location = f"data/reports/{user_id}_{timestamp}.pdf"
-        
-        with open(file_location, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
-        logger.info(f"Saved psychometric report for user {user_id} at {file_location}")
-        
-        # Extract data from the PDF (simulated)
-        extracted_data = await extract_data_from_pdf(file_location)
-        
-        # Create psychometric data record
-        psychometric_data = PsychometricData(
-            user_id=user_id,
-            interests=extracted_data["interests"],
-            skills=extracted_data["skills"],
-            personality_type=extracted_data["personality_type"],
-            aptitude=extracted_data["aptitude"],
-            recommended_careers=extracted_data["recommended_careers"],
-            subjects_interested=extracted_data["subjects_interested"],
-            report_url=file_location
+        # Stream the upload to a temp file while hashing it
+        staged = await stream_upload(
+            file,
+            settings.REPORTS_DIR,
+            max_bytes=settings.REPORT_MAX_BYTES,
+            chunk_size=settings.UPLOAD_CHUNK_BYTES
         )
         
-        db.add(psychometric_data)
-        db.commit()
-        db.refresh(psychometric_data)
+        blob = await db.get(ReportBlob, staged.sha256)
+        if blob is not None and blob.extracted_data is not None:
+            # Identical report already stored and extracted
+            await discard_file(staged.path)
+            logger.info(f"Reusing stored report {staged.sha256} for user {user_id}")
+            psychometric_data = await attach_report(db, user_id, blob)
+            invalidate_user_context(user_id)
+            return psychometric_data
+        
+        # Move the file into place atomically under its content hash
+        file_location = content_path(settings.REPORTS_DIR, staged.sha256)
+        await commit_upload(staged, file_location)
+        logger.info(f"Saved psychometric report for user {user_id} at {file_location} ({staged.size} bytes)")
+        
+        if staged.size > settings.REPORT_SYNC_EXTRACT_MAX_BYTES:
+            job = ReportJob(
+                id=uuid.uuid4().hex,
+                user_id=user_id,
+                report_sha256=staged.sha256,
+                attempts=1,
+                lease_expires_at=report_job_lease()
+            )
+            db.add(job)
+            await db.commit()
+            start_extraction_job(job.id, job.attempts, user_id, staged.sha256, file_location, staged.size)
+            logger.info(f"Extracting report {staged.sha256} of user {user_id} in background job {job.id}")
+            return job
+        
+        try:
+            extracted_data = await report_extractor.extract(file_location, key=staged.sha256)
+        except Exception:
+            if blob is None:
+                # Not a report we can read; don't keep the file
+                await discard_file(file_location)
+            raise
+        psychometric_data = await store_extracted_report(db, user_id, staged.sha256, file_location, staged.size, extracted_data)
         
         logger.info(f"Psychometric data created for user {user_id}")
         return psychometric_data
         
+    except UploadTooLarge:
+        logger.error(f"Psychometric report of user {user_id} exceeds {settings.REPORT_MAX_BYTES} bytes")
+        raise
     except Exception as e:
         logger.error(f"Error processing psychometric report: {str(e)}")
-        db.rollback()
+        await db.rollback()
         return None
 
-async def extract_data_from_pdf(file_path):
+async def store_extracted_report(db: AsyncSession, user_id: int, sha256: str, path: str, size: int, extracted_data: dict) -> PsychometricData:
+    """Cache an extraction result on the report's blob and create the user's psychometric data from it"""
+    blob = await db.get(ReportBlob, sha256)
+    if blob is None:
+        blob = ReportBlob(sha256=sha256, path=path, size=size)
+        db.add(blob)
+    blob.path = path
+    blob.extracted_data = extracted_data
+    
+    psychometric_data = await attach_report(db, user_id, blob)
+    invalidate_user_context(user_id)
+    return psychometric_data
+
+# Background extraction jobs running in this process
+_extraction_jobs: Set[asyncio.Task] = set()
+
+def report_job_lease() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.REPORT_JOB_LEASE_SECONDS)
+
+def start_extraction_job(job_id: str, attempt: int, user_id: int, sha256: str, path: str, size: int) -> None:
+    task = asyncio.create_task(run_extraction_job(job_id, attempt, user_id, sha256, path, size))
+    _extraction_jobs.add(task)
+    task.add_done_callback(_extraction_jobs.discard)
+
+async def run_extraction_job(job_id: str, attempt: int, user_id: int, sha256: str, path: str, size: int) -> None:
+    heartbeat = asyncio.create_task(renew_extraction_lease(job_id, attempt))
+    try:
+        async with AsyncSessionLocal() as db:
+            try:
+                extracted_data = await report_extractor.extract(path, key=sha256)
+                psychometric_data = await store_extracted_report(db, user_id, sha256, path, size, extracted_data)
+                await finish_extraction_job(db, job_id, ReportJobStatus.COMPLETED, psychometric_data_id=psychometric_data.id)
+                logger.info(f"Report job {job_id} completed for user {user_id}")
+            except asyncio.CancelledError:
+                # Shutting down; release the job so the next worker to start picks it up again
+                await db.rollback()
+                await db.execute(
+                    update(ReportJob)
+                    .where(ReportJob.id == job_id, ReportJob.status == ReportJobStatus.PENDING)
+                    .values(lease_expires_at=None)
+                )
+                await db.commit()
+                raise
+            except Exception as e:
+                logger.error(f"Error in report job {job_id}: {str(e)}")
+                await db.rollback()
+                await finish_extraction_job(db, job_id, ReportJobStatus.FAILED, error=str(e))
+    finally:
+        heartbeat.cancel()
+
+async def renew_extraction_lease(job_id: str, attempt: int) -> None:
+    """Extend a running job's lease, so it is only restarted once this worker stops renewing it"""
+    while True:
+        await asyncio.sleep(settings.REPORT_JOB_LEASE_SECONDS / 3)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(ReportJob)
+                    .where(
+                        ReportJob.id == job_id,
+                        ReportJob.attempts == attempt,
+                        ReportJob.status == ReportJobStatus.PENDING
+                    )
+                    .values(lease_expires_at=report_job_lease())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error renewing lease of report job {job_id}: {str(e)}")
+
+async def finish_extraction_job(db: AsyncSession, job_id: str, status: ReportJobStatus, **values) -> None:
+    await db.execute(
+        update(ReportJob)
+        .where(ReportJob.id == job_id)
+        .values(status=status, lease_expires_at=None, finished_at=datetime.utcnow(), **values)
+    )
+    await db.commit()
+
+async def reclaim_extraction_jobs(job_id: Optional[str] = None) -> int:
+    """
+    Restart pending jobs whose lease ran out or was released, i.e. whose worker died or shut
+    down before finishing them: all of them at startup, or just job_id when it is polled.
+    The conditional UPDATE hands each job to one worker. A job started
+    REPORT_JOB_MAX_ATTEMPTS times is failed instead. Returns the number restarted.
+    """
+    stale = (ReportJob.status == ReportJobStatus.PENDING) & or_(
+        ReportJob.lease_expires_at.is_(None),
+        ReportJob.lease_expires_at < datetime.utcnow()
+    )
+    if job_id is not None:
+        stale = stale & (ReportJob.id == job_id)
+
+    restarted = 0
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(ReportJob)
+            .where(stale)
+            .values(attempts=ReportJob.attempts + 1, lease_expires_at=report_job_lease())
+            .returning(ReportJob.id, ReportJob.user_id, ReportJob.report_sha256, ReportJob.attempts)
+            .execution_options(synchronize_session=False)
+        )
+        jobs = result.all()
+        await db.commit()
+
+        for job in jobs:
+            path = content_path(settings.REPORTS_DIR, job.report_sha256)
+            if job.attempts > settings.REPORT_JOB_MAX_ATTEMPTS:
+                await finish_extraction_job(db, job.id, ReportJobStatus.FAILED, error=f"Gave up after {settings.REPORT_JOB_MAX_ATTEMPTS} attempts")
+            elif not os.path.isfile(path):
+                await finish_extraction_job(db, job.id, ReportJobStatus.FAILED, error="Report file is missing")
+            else:
+                start_extraction_job(job.id, job.attempts, job.user_id, job.report_sha256, path, os.path.getsize(path))
+                restarted += 1
+                logger.info(f"Restarted report job {job.id} (attempt {job.attempts})")
+    return restarted
+
+async def cancel_extraction_jobs() -> None:
+    """Stop the background jobs of this process on shutdown, releasing them for the next worker"""
+    for task in list(_extraction_jobs):
+        task.cancel()
+    await asyncio.gather(*_extraction_jobs, return_exceptions=True)
+
+async def get_report_job(db: AsyncSession, job_id: str):
     """
-    Extract psychometric data from PDF file
-    In a real implementation, this would use a PDF parsing library
+    Get a background report extraction job, restarting it if its worker went away
     """
-    # This is a placeholder for actual PDF parsing logic
-    # In a production environment, you would use libraries like PyPDF2, pdfplumber, or
-    # a specialized API for extracting structured data from PDFs
+    job = await db.get(ReportJob, job_id)
+    if job is not None and job.status == ReportJobStatus.PENDING and (
+        job.lease_expires_at is None or job.lease_expires_at < datetime.utcnow()
+    ):
+        await reclaim_extraction_jobs(job_id)
+        await db.refresh(job)
+    return job
+
+async def attach_report(db: AsyncSession, user_id: int, blob: ReportBlob, retry: bool = True) -> PsychometricData:
+    """Create a psychometric data record referencing a stored report"""
+    extracted_data = blob.extracted_data
+    psychometric_data = PsychometricData(
+        user_id=user_id,
+        interests=extracted_data["interests"],
+        skills=extracted_data["skills"],
+        personality_type=extracted_data["personality_type"],
+        aptitude=extracted_data["aptitude"],
+        recommended_careers=extracted_data["recommended_careers"],
+        subjects_interested=extracted_data["subjects_interested"],
+        report_url=blob.path,
+        report_sha256=blob.sha256
+    )
+    db.add(psychometric_data)
     
-    # For demonstration, return dummy data
-    return {
-        "interests": ["Technology", "Science", "Art", "Business"],
-        "skills": ["Programming", "Problem Solving", "Communication", "Leadership"],
-        "personality_type": "INTJ",
-        "aptitude": {
-            "verbal": 85,
-            "numerical": 90,
-            "abstract": 75,
-            "spatial": 80,
-            "mechanical": 70
-        },
-        "recommended_careers": [
-            "Software Engineer", 
-            "Data Scientist", 
-            "UX Designer", 
-            "Business Analyst",
-            "Research Scientist"
-        ],
-        "subjects_interested": [
-            "Computer Science",
-            "Mathematics",
-            "Physics",
-            "Design"
-        ]
-    }
+    try:
+        await db.commit()
+    except IntegrityError:
+        if not retry:
+            raise
+        # A concurrent upload of the same report inserted the blob first; reference theirs
+        await db.rollback()
+        blob = await db.get(ReportBlob, psychometric_data.report_sha256)
+        return await attach_report(db, user_id, blob, retry=False)
+    
+    await db.refresh(psychometric_data)
+    return psychometric_data
 
-async def generate_career_roadmap(db: Session, user_id: int):
+async def generate_career_roadmap(db: AsyncSession, user_id: int, psychometric_data_id: Optional[int] = None, on_section: Optional[SectionCallback] = None):
     """
-    Generate a career roadmap based on psychometric data using ElevenLabs
+    Generate a career roadmap based on psychometric data using ElevenLabs, from the given
+    psychometric snapshot or else the latest one. on_section receives every section as
+    soon as it has streamed in.
     """
     try:
-        # Get latest psychometric data
-        psychometric_data = db.query(PsychometricData).filter(
-            PsychometricData.user_id == user_id
-        ).order_by(PsychometricData.uploaded_at.desc()).first()
+        if psychometric_data_id is not None:
+            psychometric_data = await db.get(PsychometricData, psychometric_data_id)
+        else:
+            # Get latest psychometric data
+            psychometric_data = await get_latest_psychometric_data(db, user_id)
         
         if not psychometric_data:
             logger.error(f"No psychometric data found for user {user_id}")
             return None
         
         # Get user details
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         
         # Create context for the AI
-        user_context = {
-            "name": user.full_name,
-            "grade_class": user.grade_class,
-            "expectations": user.expectations,
-            "interests": psychometric_data.interests,
-            "skills": psychometric_data.skills,
-            "personality_type": psychometric_data.personality_type,
-            "aptitude": psychometric_data.aptitude,
-            "recommended_careers": psychometric_data.recommended_careers,
-            "subjects_interested": psychometric_data.subjects_interested
-        }
+        user_context = roadmap_context(user, psychometric_data)
         
         # Use ElevenLabs to generate roadmap
-        elevenlabs_ai = ElevenLabsConversationalAI()
+        elevenlabs_ai = ElevenLabsConversationalAI(priority=Priority.BATCH)
         await elevenlabs_ai.start_conversation(user_context)
         
         # Create a specific prompt for roadmap generation
@@ -149,141 +314,96 @@ async def generate_career_roadmap(db: Session, user_id: int):
         long_term_career_path, educational_requirements, skill_development, potential_challenges.
         """
         
-        response = await elevenlabs_ai.process_message(roadmap_prompt, user_id, user_context)
-        
-        # Try to parse the response as JSON
-        try:
-            # Extract JSON from the text response
-            json_text = response["text"]
-            # Find JSON-like content between curly braces
-            start_idx = json_text.find('{')
-            end_idx = json_text.rfind('}') + 1
-            
-            if start_idx >= 0 and end_idx > start_idx:
-                json_content = json_text[start_idx:end_idx]
-                roadmap_data = json.loads(json_content)
-            else:
-                # If no JSON structure found, create a structured format
-                roadmap_data = {
-                    "short_term_goals": json_text.split("Short-term goals")[1].split("Medium-term goals")[0].strip() if "Short-term goals" in json_text else "",
-                    "medium_term_goals": json_text.split("Medium-term goals")[1].split("Long-term career path")[0].strip() if "Medium-term goals" in json_text else "",
-                    "long_term_career_path": json_text.split("Long-term career path")[1].split("Educational requirements")[0].strip() if "Long-term career path" in json_text else "",
-                    "educational_requirements": json_text.split("Educational requirements")[1].split("Skill development")[0].strip() if "Educational requirements" in json_text else "",
-                    "skill_development": json_text.split("Skill development")[1].split("Potential challenges")[0].strip() if "Skill development" in json_text else "",
-                    "potential_challenges": json_text.split("Potential challenges")[1].strip() if "Potential challenges" in json_text else ""
-                }
-        except Exception as e:
-            logger.error(f"Error parsing roadmap JSON: {str(e)}")
-            # If JSON parsing fails, create a simple structure
-            roadmap_data = {
-                "roadmap_text": response["text"],
-                "error": str(e)
-            }
+        roadmap_data = await stream_roadmap(elevenlabs_ai, roadmap_prompt, user_id, user_context, CAREER_SECTIONS, on_section)
+        if roadmap_data is None:
+            return None
         
         # Create roadmap record
         roadmap = CareerRoadmap(
             user_id=user_id,
-            roadmap_data=roadmap_data
+            roadmap_data=roadmap_data,
+            context_key=context_key(user_context)
         )
         
         db.add(roadmap)
-        db.commit()
-        db.refresh(roadmap)
+        await db.commit()
+        await db.refresh(roadmap)
+        career_roadmap_cache.set((user_id, roadmap.context_key), roadmap.id)
         
         logger.info(f"Career roadmap generated for user {user_id}")
         return roadmap
         
     except Exception as e:
         logger.error(f"Error generating career roadmap: {str(e)}")
-        db.rollback()
+        await db.rollback()
         return None
 
-async def generate_foreign_study_roadmap(db: Session, user_id: int, target_countries: List[str]):
+async def generate_foreign_study_roadmap(db: AsyncSession, user_id: int, target_countries: List[str], on_section: Optional[SectionCallback] = None):
     """
-    Generate a foreign study roadmap based on psychometric data and target countries
+    Generate a foreign study roadmap based on psychometric data and target countries.
+    Every country is a separate agent turn, at most FOREIGN_STUDY_PARALLEL_COUNTRIES at a
+    time, cached per profile snapshot and country. Each section of the roadmap maps the
+    countries to their part of it; on_section receives a section again whenever another
+    country has finished it.
     """
+    # One turn per country, however often it is listed
+    countries: Dict[str, str] = {}
+    for country in filter(None, (country.strip() for country in target_countries)):
+        countries.setdefault(country.casefold(), country)
+    target_countries = list(countries.values())
+    
     try:
         # Get latest psychometric data
-        psychometric_data = db.query(PsychometricData).filter(
-            PsychometricData.user_id == user_id
-        ).order_by(PsychometricData.uploaded_at.desc()).first()
+        psychometric_data = await get_latest_psychometric_data(db, user_id)
         
         if not psychometric_data:
             logger.error(f"No psychometric data found for user {user_id}")
             return None
         
         # Get user details
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         
         # Create context for the AI
-        user_context = {
-            "name": user.full_name,
-            "grade_class": user.grade_class,
-            "expectations": user.expectations,
-            "interests": psychometric_data.interests,
-            "skills": psychometric_data.skills,
-            "personality_type": psychometric_data.personality_type,
-            "aptitude": psychometric_data.aptitude,
-            "recommended_careers": psychometric_data.recommended_careers,
-            "subjects_interested": psychometric_data.subjects_interested,
-            "target_countries": target_countries
-        }
+        user_context = roadmap_context(user, psychometric_data)
+        profile_key = context_key(user_context)
         
-        # Use ElevenLabs to generate roadmap
-        elevenlabs_ai = ElevenLabsConversationalAI()
-        await elevenlabs_ai.start_conversation(user_context)
+        roadmap_data: Dict[str, Any] = {}
         
-        # Create a specific prompt for foreign study roadmap generation
-        countries_str = ", ".join(target_countries)
-        roadmap_prompt = f"""
-        Based on my profile as a {user_context['grade_class']} student interested in studying in {countries_str},
-        with interests in {', '.join(user_context['interests'][:3])}, skills in {', '.join(user_context['skills'][:3])},
-        and recommended careers including {', '.join(user_context['recommended_careers'][:3])},
-        please create a detailed foreign study roadmap with the following sections:
-        
-        1. Application requirements and timeline for each country
-        2. Recommended universities and programs
-        3. Standardized tests and language requirements
-        4. Scholarship opportunities
-        5. Visa process overview
-        6. Estimated costs and financial planning
-        7. Cultural adaptation tips
-        
-        Format the response as a structured JSON object with these exact keys: application_requirements, 
-        recommended_universities, standardized_tests, scholarship_opportunities, visa_process, 
-        estimated_costs, cultural_adaptation.
-        """
+        async def merge(country: str, key: str, value: Any) -> None:
+            roadmap_data.setdefault(key, {})[country] = value
+            if on_section is not None:
+                await on_section(key, dict(roadmap_data[key]))
         
-        response = await elevenlabs_ai.process_message(roadmap_prompt, user_id, user_context)
+        limit = asyncio.Semaphore(settings.FOREIGN_STUDY_PARALLEL_COUNTRIES)
         
-        # Try to parse the response as JSON
-        try:
-            # Extract JSON from the text response
-            json_text = response["text"]
-            # Find JSON-like content between curly braces
-            start_idx = json_text.find('{')
-            end_idx = json_text.rfind('}') + 1
+        async def country_roadmap(country: str) -> Optional[Dict[str, Any]]:
+            cache_key = (profile_key, country.casefold())
+            cached = country_roadmap_cache.get(cache_key)
+            if cached is not None:
+                for key, value in cached.items():
+                    await merge(country, key, value)
+                return cached
             
-            if start_idx >= 0 and end_idx > start_idx:
-                json_content = json_text[start_idx:end_idx]
-                roadmap_data = json.loads(json_content)
-            else:
-                # If no JSON structure found, create a structured format
-                roadmap_data = {
-                    "application_requirements": extract_section(json_text, "Application requirements"),
-                    "recommended_universities": extract_section(json_text, "Recommended universities"),
-                    "standardized_tests": extract_section(json_text, "Standardized tests"),
-                    "scholarship_opportunities": extract_section(json_text, "Scholarship opportunities"),
-                    "visa_process": extract_section(json_text, "Visa process"),
-                    "estimated_costs": extract_section(json_text, "Estimated costs"),
-                    "cultural_adaptation": extract_section(json_text, "Cultural adaptation")
-                }
-        except Exception as e:
-            logger.error(f"Error parsing foreign study roadmap JSON: {str(e)}")
-            roadmap_data = {
-                "roadmap_text": response["text"],
-                "error": str(e)
-            }
+            async with limit:
+                country_data = await generate_country_roadmap(
+                    user_id,
+                    user_context,
+                    country,
+                    lambda key, value: merge(country, key, value)
+                )
+            if country_data is not None:
+                country_roadmap_cache.set(cache_key, country_data)
+            return country_data
+        
+        results = await asyncio.gather(*(country_roadmap(country) for country in target_countries))
+        if any(country_data is None for country_data in results):
+            # Countries that did succeed are cached, so a retry only asks for the rest
+            return None
+        
+        # Sections completed only at the end of a response were not merged while streaming
+        for country, country_data in zip(target_countries, results):
+            for key, value in country_data.items():
+                roadmap_data.setdefault(key, {})[country] = value
         
         # Add target countries to the roadmap data
         roadmap_data["target_countries"] = target_countries
@@ -295,50 +415,142 @@ async def generate_foreign_study_roadmap(db: Session, user_id: int, target_count
         )
         
         db.add(roadmap)
-        db.commit()
-        db.refresh(roadmap)
+        await db.commit()
+        await db.refresh(roadmap)
         
         logger.info(f"Foreign study roadmap generated for user {user_id}")
         return roadmap
         
     except Exception as e:
         logger.error(f"Error generating foreign study roadmap: {str(e)}")
-        db.rollback()
+        await db.rollback()
         return None
 
-def extract_section(text, section_name):
-    """Helper function to extract sections from text"""
-    try:
-        start_idx = text.find(section_name)
-        if start_idx == -1:
-            return ""
-            
-        # Find the next section
-        next_sections = ["Application requirements", "Recommended universities", 
-                        "Standardized tests", "Scholarship opportunities", 
-                        "Visa process", "Estimated costs", "Cultural adaptation"]
-        next_sections.remove(section_name)
-        
-        end_idx = len(text)
-        for next_section in next_sections:
-            next_idx = text.find(next_section, start_idx + len(section_name))
-            if next_idx != -1 and next_idx < end_idx:
-                end_idx = next_idx
-        
-        # Extract the content
-        content = text[start_idx + len(section_name):end_idx].strip()
-        return content
-    except Exception:
-        return ""
+async def generate_country_roadmap(
+    user_id: int,
+    user_context: Dict[str, Any],
+    country: str,
+    on_section: Optional[SectionCallback] = None
+) -> Optional[Dict[str, Any]]:
+    """Foreign study roadmap sections for one country, or None when the agent turn failed"""
+    country_context = {**user_context, "target_countries": [country]}
+    elevenlabs_ai = ElevenLabsConversationalAI(priority=Priority.BATCH)
+    await elevenlabs_ai.start_conversation(country_context)
+    
+    roadmap_prompt = f"""
+    Based on my profile as a {user_context['grade_class']} student interested in studying in {country},
+    with interests in {', '.join(user_context['interests'][:3])}, skills in {', '.join(user_context['skills'][:3])},
+    and recommended careers including {', '.join(user_context['recommended_careers'][:3])},
+    please create a detailed foreign study roadmap for {country} with the following sections:
+    
+    1. Application requirements and timeline
+    2. Recommended universities and programs
+    3. Standardized tests and language requirements
+    4. Scholarship opportunities
+    5. Visa process overview
+    6. Estimated costs and financial planning
+    7. Cultural adaptation tips
+    
+    Format the response as a structured JSON object with these exact keys: application_requirements, 
+    recommended_universities, standardized_tests, scholarship_opportunities, visa_process, 
+    estimated_costs, cultural_adaptation.
+    """
+    
+    return await stream_roadmap(elevenlabs_ai, roadmap_prompt, user_id, country_context, FOREIGN_STUDY_SECTIONS, on_section)
+
+def roadmap_context(user: User, psychometric_data: PsychometricData) -> Dict[str, Any]:
+    """Profile and psychometric data a roadmap is generated from"""
+    return {
+        "name": user.full_name,
+        "grade_class": user.grade_class,
+        "expectations": user.expectations,
+        "interests": psychometric_data.interests,
+        "skills": psychometric_data.skills,
+        "personality_type": psychometric_data.personality_type,
+        "aptitude": psychometric_data.aptitude,
+        "recommended_careers": psychometric_data.recommended_careers,
+        "subjects_interested": psychometric_data.subjects_interested
+    }
+
+async def get_cached_career_roadmap(db: AsyncSession, user_id: int, psychometric_data: PsychometricData) -> Optional[CareerRoadmap]:
+    """
+    The roadmap last generated for the user from the same profile and psychometric data,
+    if it is younger than ROADMAP_CACHE_TTL_SECONDS
+    """
+    user = await db.get(User, user_id)
+    key = context_key(roadmap_context(user, psychometric_data))
+    roadmap_id = career_roadmap_cache.get((user_id, key))
+    if roadmap_id is not None:
+        roadmap = await db.get(CareerRoadmap, roadmap_id)
+        if roadmap is not None:
+            return roadmap
+    
+    # Generated by another worker's dispatcher, or before this worker started
+    ttl = settings.ROADMAP_CACHE_TTL_SECONDS
+    result = await db.execute(
+        select(CareerRoadmap).where(
+            CareerRoadmap.user_id == user_id,
+            CareerRoadmap.context_key == key,
+            CareerRoadmap.created_at >= datetime.utcnow() - timedelta(seconds=ttl)
+        ).order_by(CareerRoadmap.created_at.desc()).limit(1)
+    )
+    roadmap = result.scalars().first()
+    if roadmap is not None:
+        age = (datetime.utcnow() - roadmap.created_at).total_seconds()
+        career_roadmap_cache.set((user_id, key), roadmap.id, ttl=ttl - age)
+    return roadmap
+
+def context_key(user_context: Dict[str, Any]) -> str:
+    """Stable hash of the profile and psychometric data a roadmap is generated from"""
+    serialized = json.dumps(user_context, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+async def stream_roadmap(
+    elevenlabs_ai: ElevenLabsConversationalAI,
+    prompt: str,
+    user_id: int,
+    user_context: Dict[str, Any],
+    sections: Dict[str, str],
+    on_section: Optional[SectionCallback] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Parse the agent's roadmap response while it streams in, passing completed sections to
+    on_section. Returns the roadmap data, or None when the turn failed.
+    """
+    parser = RoadmapStreamParser(sections)
+    async with contextlib.aclosing(elevenlabs_ai.stream_message(prompt, user_id, user_context)) as events:
+        async for event in events:
+            if event["type"] == "error":
+                logger.error(f"Roadmap response for user {user_id} failed: {event['text']}")
+                return None
+            if event["type"] != "text":
+                continue
+            for key, value in parser.feed(event["text"]):
+                if on_section is not None:
+                    await on_section(key, value)
+    return parser.close()
+
+async def get_latest_psychometric_data(db: AsyncSession, user_id: int):
+    """
+    Get the most recent psychometric data for a user
+    """
+    result = await db.execute(
+        select(PsychometricData).where(
+            PsychometricData.user_id == user_id
+        ).order_by(PsychometricData.uploaded_at.desc()).limit(1)
+    )
+    return result.scalars().first()
 
-def get_user_roadmaps(db: Session, user_id: int):
+async def get_user_roadmaps(db: AsyncSession, user_id: int):
     """
     Get all career roadmaps for a user
     """
-    return db.query(CareerRoadmap).filter(CareerRoadmap.user_id == user_id).order_by(CareerRoadmap.created_at.desc()).all()
+    result = await db.execute(select(CareerRoadmap).where(CareerRoadmap.user_id == user_id).order_by(CareerRoadmap.created_at.desc()))
+    return result.scalars().all()
 
-def get_user_foreign_study_roadmaps(db: Session, user_id: int):
+async def get_user_foreign_study_roadmaps(db: AsyncSession, user_id: int):
     """
     Get all foreign study roadmaps for a user
     """
-    return db.query(ForeignStudyRoadmap).filter(ForeignStudyRoadmap.user_id == user_id).order_by(ForeignStudyRoadmap.created_at.desc()).all()
+    result = await db.execute(select(ForeignStudyRoadmap).where(ForeignStudyRoadmap.user_id == user_id).order_by(ForeignStudyRoadmap.created_at.desc()))
+    return result.scalars().all()
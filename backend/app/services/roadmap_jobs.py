@@ -0,0 +1,322 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import RoadmapJob, RoadmapJobStatus
+from app.services.report_service import generate_career_roadmap, get_cached_career_roadmap, get_latest_psychometric_data
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RoadmapJobQueue:
+    """
+    Career roadmap generation as queued jobs in the roadmap_jobs table. Requests return a
+    job id right away; a dispatcher in every API worker claims due jobs and generates at
+    most `workers` roadmaps at a time. A request for a user and psychometric snapshot that
+    already has an unfinished job gets that job instead of a new one. Running jobs publish
+    each roadmap section as soon as it has streamed in.
+    """
+
+    def __init__(self, workers: int, poll_interval: float, timeout: float, max_attempts: int):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        # A claimed job not finished by then (crashed worker) is picked up again
+        self.lease = timeout + 60
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._stats = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "forced_refreshes": 0,
+            "completed": 0,
+            "failed": 0,
+            "reclaimed": 0
+        }
+
+    async def submit(self, db: AsyncSession, user_id: int, force_refresh: bool = False, retry: bool = True) -> Optional[RoadmapJob]:
+        """
+        Queue a roadmap for the user's latest psychometric data, or return the unfinished job
+        already queued for it. Unless force_refresh is set, a roadmap generated recently from
+        the same profile is returned as an already completed job instead. None when the user
+        has no psychometric data.
+        """
+        psychometric_data = await get_latest_psychometric_data(db, user_id)
+        if psychometric_data is None:
+            return None
+
+        if force_refresh:
+            self._stats["forced_refreshes"] += 1
+        else:
+            roadmap = await get_cached_career_roadmap(db, user_id, psychometric_data)
+            if roadmap is not None:
+                self._stats["cache_hits"] += 1
+                return await self._completed(db, user_id, psychometric_data.id, roadmap.id)
+            self._stats["cache_misses"] += 1
+
+        active_key = f"{user_id}:{psychometric_data.id}"
+        job = await self._active_job(db, active_key)
+        if job is not None:
+            self._stats["deduplicated"] += 1
+            return job
+
+        job = RoadmapJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            psychometric_data_id=psychometric_data.id,
+            active_key=active_key
+        )
+        db.add(job)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent request queued the same roadmap first
+            await db.rollback()
+            job = await self._active_job(db, active_key)
+            if job is not None:
+                self._stats["deduplicated"] += 1
+                return job
+            if not retry:
+                raise
+            # and it finished in between; submit once more
+            return await self.submit(db, user_id, force_refresh=force_refresh, retry=False)
+
+        self._stats["submitted"] += 1
+        logger.info(f"Roadmap job {job.id} queued for user {user_id}")
+        await self.notify()
+        return job
+
+    async def _completed(self, db: AsyncSession, user_id: int, psychometric_data_id: int, roadmap_id: int) -> RoadmapJob:
+        """
+        The completed job that produced an existing roadmap, so it can be polled like any
+        other. A job is only recorded when no job for this psychometric data produced it,
+        so repeated requests for an unchanged profile do not add rows.
+        """
+        result = await db.execute(
+            select(RoadmapJob)
+            .where(
+                RoadmapJob.user_id == user_id,
+                RoadmapJob.psychometric_data_id == psychometric_data_id,
+                RoadmapJob.roadmap_id == roadmap_id,
+                RoadmapJob.status == RoadmapJobStatus.COMPLETED
+            )
+            .order_by(RoadmapJob.finished_at.desc())
+            .limit(1)
+        )
+        job = result.scalars().first()
+        if job is not None:
+            return job
+
+        now = datetime.utcnow()
+        job = RoadmapJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            psychometric_data_id=psychometric_data_id,
+            status=RoadmapJobStatus.COMPLETED,
+            roadmap_id=roadmap_id,
+            started_at=now,
+            finished_at=now
+        )
+        db.add(job)
+        await db.commit()
+        return job
+
+    async def _active_job(self, db: AsyncSession, active_key: str) -> Optional[RoadmapJob]:
+        result = await db.execute(select(RoadmapJob).where(RoadmapJob.active_key == active_key))
+        return result.scalars().first()
+
+    async def get(self, db: AsyncSession, job_id: str) -> Optional[RoadmapJob]:
+        return await db.get(RoadmapJob, job_id)
+
+    async def notify(self) -> None:
+        """Tell the dispatcher a job was queued"""
+        if self._task is None:
+            # No dispatcher (scripts, tests): generate right away
+            await self.drain()
+        else:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start the dispatcher; it immediately picks up jobs left pending by a previous run"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Roadmap job dispatcher started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Stop the dispatcher; jobs it was running go back to pending for the next worker"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        logger.info("Roadmap job dispatcher stopped")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._fill()
+            except Exception as e:
+                logger.error(f"Error claiming roadmap jobs: {str(e)}")
+
+    async def _fill(self) -> None:
+        """Claim as many due jobs as there are idle workers and start them"""
+        idle = self.workers - len(self._running)
+        if idle <= 0:
+            return
+        for job in await self._claim(idle):
+            task = asyncio.create_task(self._process(job))
+            self._running.add(task)
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if self._wakeup is not None:
+            # A worker is free; look for more jobs
+            self._wakeup.set()
+
+    async def drain(self) -> int:
+        """Process due jobs until none are left, `workers` at a time; returns the number processed"""
+        processed = 0
+        while True:
+            jobs = await self._claim(self.workers)
+            if not jobs:
+                return processed
+            await asyncio.gather(*(self._process(job) for job in jobs))
+            processed += len(jobs)
+
+    async def _claim(self, limit: int) -> list:
+        """
+        Mark up to limit due jobs running under a lease, oldest first. Due are pending jobs
+        and running ones whose lease ran out; concurrent dispatchers skip locked rows.
+        """
+        now = datetime.utcnow()
+        claimable = or_(
+            RoadmapJob.status == RoadmapJobStatus.PENDING,
+            (RoadmapJob.status == RoadmapJobStatus.RUNNING) & (RoadmapJob.lease_expires_at < now)
+        )
+        due = (
+            select(RoadmapJob.id)
+            .where(claimable)
+            .order_by(RoadmapJob.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(RoadmapJob)
+                .where(RoadmapJob.id.in_(due.scalar_subquery()), claimable)
+                .values(
+                    status=RoadmapJobStatus.RUNNING,
+                    attempts=RoadmapJob.attempts + 1,
+                    started_at=now,
+                    sections=None,
+                    lease_expires_at=now + timedelta(seconds=self.lease)
+                )
+                .returning(RoadmapJob.id, RoadmapJob.user_id, RoadmapJob.psychometric_data_id, RoadmapJob.attempts)
+                .execution_options(synchronize_session=False)
+            )
+            jobs = result.all()
+            await db.commit()
+        return jobs
+
+    async def _process(self, job) -> None:
+        if job.attempts > 1:
+            self._stats["reclaimed"] += 1
+        if job.attempts > self.max_attempts:
+            await self._finish(job.id, RoadmapJobStatus.FAILED, error=f"Gave up after {self.max_attempts} attempts")
+            self._stats["failed"] += 1
+            return
+
+        sections: Dict[str, Any] = {}
+
+        async def publish(key: str, value: Any) -> None:
+            # Progress is best effort; a failed write must not fail the roadmap
+            sections[key] = value
+            try:
+                await self._record(job.id, sections=dict(sections))
+            except Exception as e:
+                logger.error(f"Error saving sections of roadmap job {job.id}: {str(e)}")
+
+        try:
+            async with AsyncSessionLocal() as db:
+                roadmap = await asyncio.wait_for(
+                    generate_career_roadmap(db, job.user_id, psychometric_data_id=job.psychometric_data_id, on_section=publish),
+                    timeout=self.timeout
+                )
+        except asyncio.CancelledError:
+            # Shutting down; leave the job for the next dispatcher
+            await self._record(job.id, status=RoadmapJobStatus.PENDING, lease_expires_at=None)
+            raise
+        except asyncio.TimeoutError:
+            roadmap = None
+            error = f"Roadmap generation timed out after {self.timeout:g} seconds"
+        except Exception as e:
+            roadmap = None
+            error = str(e)
+        else:
+            error = "Failed to generate career roadmap"
+
+        if roadmap is None:
+            await self._finish(job.id, RoadmapJobStatus.FAILED, error=error)
+            self._stats["failed"] += 1
+            logger.error(f"Roadmap job {job.id} failed: {error}")
+            return
+        # The roadmap holds the sections from here on
+        await self._finish(job.id, RoadmapJobStatus.COMPLETED, roadmap_id=roadmap.id, sections=None)
+        self._stats["completed"] += 1
+        logger.info(f"Roadmap job {job.id} completed for user {job.user_id}")
+
+    async def _finish(self, job_id: str, status: RoadmapJobStatus, **values) -> None:
+        # Clearing active_key lets the next request for this snapshot start a new job
+        await self._record(
+            job_id,
+            status=status,
+            active_key=None,
+            lease_expires_at=None,
+            finished_at=datetime.utcnow(),
+            **values
+        )
+
+    async def _record(self, job_id: str, **values) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(RoadmapJob).where(RoadmapJob.id == job_id).values(**values))
+            await db.commit()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "dispatcher_running": self._task is not None,
+            **self._stats
+        }
+
+roadmap_jobs = RoadmapJobQueue(
+    workers=settings.ROADMAP_JOB_WORKERS,
+    poll_interval=settings.ROADMAP_JOB_POLL_SECONDS,
+    timeout=settings.ROADMAP_JOB_TIMEOUT_SECONDS,
+    max_attempts=settings.ROADMAP_JOB_MAX_ATTEMPTS
+)
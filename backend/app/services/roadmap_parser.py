@@ -0,0 +1,182 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Roadmap keys and the headings the agent uses for them when it answers in prose
+CAREER_SECTIONS = {
+    "short_term_goals": "Short-term goals",
+    "medium_term_goals": "Medium-term goals",
+    "long_term_career_path": "Long-term career path",
+    "educational_requirements": "Educational requirements",
+    "skill_development": "Skill development",
+    "potential_challenges": "Potential challenges",
+}
+
+FOREIGN_STUDY_SECTIONS = {
+    "application_requirements": "Application requirements",
+    "recommended_universities": "Recommended universities",
+    "standardized_tests": "Standardized tests",
+    "scholarship_opportunities": "Scholarship opportunities",
+    "visa_process": "Visa process",
+    "estimated_costs": "Estimated costs",
+    "cultural_adaptation": "Cultural adaptation",
+}
+
+# List numbering and markdown in front of a prose heading, e.g. "2. **Medium-term goals**"
+HEADING_PREFIX = "#*0123456789.) \t-"
+CLOSERS = {"{": "}", "[": "]"}
+
+Section = Tuple[str, Any]
+
+def normalize(text: str) -> str:
+    """Lowercase with - and _ as spaces, so "Short-term goals" matches short_term_goals"""
+    return text.lower().replace("-", " ").replace("_", " ")
+
+def parse_value(text: str) -> Any:
+    """A JSON value, or its text when it is not valid JSON"""
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text.strip('"').strip()
+
+class RoadmapStreamParser:
+    """
+    Splits a roadmap response into its sections while the agent is still streaming it,
+    reading every character once. In a JSON object each top-level value is complete at the
+    comma or brace that ends it. Responses without one fall back to the prose headings of
+    `sections`, a section ending where the next heading starts. Malformed values are kept
+    as text, and close() salvages a value cut off by the end of the response.
+    """
+
+    def __init__(self, sections: Dict[str, str]):
+        self.sections = sections
+        self._headings = [(normalize(heading), key) for key, heading in sections.items()]
+        self._parts: List[str] = []
+
+        # JSON object scanner: before the object, reading a key, reading a value, done
+        self._state = "before"
+        self._token: List[str] = []
+        self._key: Optional[str] = None
+        self._nesting: List[str] = []  # Closers of the brackets open in the current value
+        self._in_string = False
+        self._escaped = False
+        self.json_sections: Dict[str, Any] = {}
+
+        # Prose scanner, line by line
+        self._line: List[str] = []
+        self._prose_key: Optional[str] = None
+        self._prose_body: List[str] = []
+        self.prose_sections: Dict[str, str] = {}
+
+    def feed(self, fragment: str) -> List[Section]:
+        """Consume the next fragment of the response; returns the sections it completed"""
+        self._parts.append(fragment)
+        completed: List[Section] = []
+        for char in fragment:
+            if self._state != "done":
+                self._scan_json(char, completed)
+            if char == "\n":
+                self._end_line(completed)
+            else:
+                self._line.append(char)
+        return completed
+
+    def close(self) -> Dict[str, Any]:
+        """The roadmap data of the whole response"""
+        if self._state == "value":
+            self._salvage_value()
+        self._end_line([])
+        self._end_prose_section([])
+
+        if self.json_sections:
+            return dict(self.json_sections)
+        if self.prose_sections:
+            return {key: self.prose_sections.get(key, "") for key in self.sections}
+        return {"roadmap_text": "".join(self._parts)}
+
+    def _scan_json(self, char: str, completed: List[Section]) -> None:
+        if self._state == "before":
+            if char == "{":
+                self._state = "key"
+            return
+
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+            self._token.append(char)
+            return
+
+        if char == '"':
+            self._in_string = True
+            self._token.append(char)
+        elif self._state == "key":
+            if char == ":":
+                self._key = parse_value("".join(self._token)) if self._token else ""
+                self._key = str(self._key).strip("'")
+                self._token = []
+                self._state = "value"
+            elif char == ",":
+                # Stray or trailing comma
+                self._token = []
+            elif char == "}":
+                self._state = "done"
+            elif not char.isspace():
+                self._token.append(char)
+        elif char in CLOSERS:
+            self._nesting.append(CLOSERS[char])
+            self._token.append(char)
+        elif self._nesting:
+            if char in "]}":
+                self._nesting.pop()
+            self._token.append(char)
+        elif char in ",}":
+            value = parse_value("".join(self._token))
+            self.json_sections[self._key] = value
+            completed.append((self._key, value))
+            self._token = []
+            self._state = "key" if char == "," else "done"
+        else:
+            self._token.append(char)
+
+    def _salvage_value(self) -> None:
+        """Close the strings and brackets left open by a truncated value"""
+        text = "".join(self._token).rstrip("\\")
+        closers = ('"' if self._in_string else "") + "".join(reversed(self._nesting))
+        try:
+            value = json.loads(text.strip() + closers)
+        except ValueError:
+            value = parse_value(text)
+        self.json_sections[self._key] = value
+        self._state = "done"
+
+    def _end_line(self, completed: List[Section]) -> None:
+        line = "".join(self._line)
+        self._line = []
+        stripped = line.strip().lstrip(HEADING_PREFIX)
+        normalized = normalize(stripped)
+        for heading, key in self._headings:
+            if normalized.startswith(heading):
+                self._end_prose_section(completed)
+                self._prose_key = key
+                # Text after "Heading (next 1-2 years):" on the same line starts the section
+                rest = stripped[len(heading):]
+                rest = rest.split(":", 1)[1] if ":" in rest else ""
+                self._prose_body = [rest.strip(" *")] if rest.strip(" *") else []
+                return
+        if self._prose_key is not None:
+            self._prose_body.append(line)
+
+    def _end_prose_section(self, completed: List[Section]) -> None:
+        if self._prose_key is None:
+            return
+        body = "\n".join(self._prose_body).strip()
+        self.prose_sections[self._prose_key] = body
+        # Prose headings also turn up inside JSON values; only report them for prose answers
+        if self._state == "before":
+            completed.append((self._prose_key, body))
+        self._prose_key = None
+        self._prose_body = []
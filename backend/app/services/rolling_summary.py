@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import select, update
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import Session as SessionModel, SessionInteraction, SessionStatus
+from app.services.counseling_service import get_user_context
+from app.services.interaction_writer import interaction_writer
+from app.services.session_summary import update_summary
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RollingSummarizer:
+    """
+    Keeps Session.rolling_summary current while a conversation goes on. Every `every_turns`
+    turns a session has in this worker, the turns its summary does not cover yet are folded
+    into it in the background, for at most `workers` sessions at a time. The row's
+    summarized_turns records the coverage, so ending a session only reads the turns after it.
+    Turn counts only trigger updates and expire once a session goes idle for `idle_seconds`,
+    so sessions that are abandoned instead of ended are not tracked forever.
+    """
+
+    def __init__(self, every_turns: int, workers: int, max_sessions: int, idle_seconds: float):
+        self.every_turns = every_turns
+        self.workers = workers
+        self._turns = TTLCache(maxsize=max_sessions, ttl=idle_seconds)  # Turns per session since its last update was started
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._stats = {"updates": 0, "turns_summarized": 0, "skipped": 0, "failed": 0}
+
+    def notify(self, session_id: int) -> None:
+        """Count a turn of the session, and start an update once every_turns have built up"""
+        if self._limit is None or self.every_turns <= 0:
+            return
+        turns = self._turns.get(session_id, 0) + 1
+        if turns < self.every_turns or session_id in self._tasks:
+            self._turns.set(session_id, turns)
+            return
+
+        self._turns.set(session_id, 0)
+        task = asyncio.create_task(self._run(session_id))
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+
+    def discard(self, session_id: int) -> None:
+        """Forget the turn count of a session that ended"""
+        self._turns.invalidate(session_id)
+
+    async def start(self) -> None:
+        if self._limit is not None:
+            return
+        self._limit = asyncio.Semaphore(self.workers)
+        logger.info(f"Rolling session summaries every {self.every_turns} turns")
+
+    async def stop(self) -> None:
+        """Stop taking turns and cancel running updates; the next end-session reads those turns"""
+        self._limit = None
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._turns.clear()
+        logger.info("Rolling session summaries stopped")
+
+    async def _run(self, session_id: int) -> None:
+        async with self._limit:
+            try:
+                await self.update(session_id)
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.error(f"Error updating rolling summary of session {session_id}: {str(e)}")
+
+    async def update(self, session_id: int) -> bool:
+        """
+        Fold the turns of an in-progress session that its rolling summary does not cover into
+        it. False when there were fewer than every_turns of them, or another worker updated
+        the summary first.
+        """
+        if interaction_writer.has_pending(session_id):
+            await interaction_writer.flush()
+
+        # No connection is held while the agent writes the summary
+        async with AsyncSessionLocal() as db:
+            session = await db.get(SessionModel, session_id)
+            if session is None or session.status != SessionStatus.IN_PROGRESS:
+                return False
+            covered = session.summarized_turns
+            result = await db.execute(
+                select(SessionInteraction)
+                .where(SessionInteraction.session_id == session_id)
+                .order_by(SessionInteraction.timestamp, SessionInteraction.id)
+                .offset(covered)
+            )
+            interactions = result.scalars().all()
+            if len(interactions) < self.every_turns:
+                self._stats["skipped"] += 1
+                return False
+            user_context = await get_user_context(db, session.user_id)
+            user_id, summary = session.user_id, session.rolling_summary
+
+        summary = await update_summary(summary, interactions, user_id, user_context)
+
+        async with AsyncSessionLocal() as db:
+            # Conditional on the coverage read above, so a concurrent update is not overwritten
+            result = await db.execute(
+                update(SessionModel)
+                .where(
+                    SessionModel.id == session_id,
+                    SessionModel.summarized_turns == covered,
+                    SessionModel.status == SessionStatus.IN_PROGRESS
+                )
+                .values(
+                    rolling_summary=summary,
+                    summarized_turns=covered + len(interactions),
+                    rolling_summary_at=datetime.utcnow()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        if result.rowcount == 0:
+            self._stats["skipped"] += 1
+            return False
+
+        self._stats["updates"] += 1
+        self._stats["turns_summarized"] += len(interactions)
+        logger.info(f"Rolling summary of session {session_id} now covers {covered + len(interactions)} turns")
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "every_turns": self.every_turns,
+            "running": len(self._tasks),
+            "sessions_tracked": len(self._turns),
+            **self._stats
+        }
+
+rolling_summaries = RollingSummarizer(
+    every_turns=settings.SESSION_ROLLING_SUMMARY_TURNS,
+    workers=settings.SESSION_ROLLING_SUMMARY_WORKERS,
+    max_sessions=settings.SESSION_ROLLING_SUMMARY_TRACKED,
+    idle_seconds=settings.SESSION_ROLLING_SUMMARY_IDLE_SECONDS
+)
@@ -1,32 +1,38 @@
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from app.models.user import Session as SessionModel, SessionStatus, User
 from app.schemas.user import SessionCreate, SessionUpdate
-from app.core.email import send_session_confirmation, send_session_reminder
+from app.core.email import stage_session_confirmation
+from app.core.email_delivery import email_delivery
+from app.services.reminder_scheduler import reminder_scheduler, send_due_reminders
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_session(db: Session, session_id: int):
-    return db.query(SessionModel).filter(SessionModel.id == session_id).first()
+async def get_session(db: AsyncSession, session_id: int):
+    return await db.get(SessionModel, session_id)
 
-def get_sessions_by_user(db: Session, user_id: int):
-    return db.query(SessionModel).filter(SessionModel.user_id == user_id).all()
+async def get_sessions_by_user(db: AsyncSession, user_id: int):
+    result = await db.execute(select(SessionModel).where(SessionModel.user_id == user_id))
+    return result.scalars().all()
 
-def get_upcoming_sessions(db: Session, minutes: int = 5):
-    """Get sessions starting in the specified number of minutes"""
+async def get_upcoming_sessions(db: AsyncSession, minutes: int = 5):
+    """Get sessions starting in the specified number of minutes that have not been reminded yet"""
     now = datetime.utcnow()
     target_time = now + timedelta(minutes=minutes)
     
-    return db.query(SessionModel).filter(
+    result = await db.execute(select(SessionModel).where(
         SessionModel.scheduled_time >= now,
         SessionModel.scheduled_time <= target_time,
-        SessionModel.status == SessionStatus.SCHEDULED
-    ).all()
+        SessionModel.status == SessionStatus.SCHEDULED,
+        SessionModel.reminder_sent_at.is_(None)
+    ))
+    return result.scalars().all()
 
-async def create_session(db: Session, session: SessionCreate):
+async def create_session(db: AsyncSession, session: SessionCreate):
     try:
         logger.info(f"Creating new {session.session_type} session for user {session.user_id}")
         
@@ -38,13 +44,12 @@ async def create_session(db: Session, session: SessionCreate):
             status=session.status
         )
         db.add(db_session)
-        db.commit()
-        db.refresh(db_session)
+        await db.flush()
         
         # Get user details for email
-        user = db.query(User).filter(User.id == session.user_id).first()
+        user = await db.get(User, session.user_id)
         
-        # Send confirmation email
+        # Stage the confirmation email in the same transaction; the dispatcher sends it after commit
         session_data = {
             "id": db_session.id,
             "user_id": db_session.user_id,
@@ -54,65 +59,80 @@ async def create_session(db: Session, session: SessionCreate):
             "status": db_session.status
         }
         
-        await send_session_confirmation(user.email, session_data)
+        await stage_session_confirmation(db, user.email, session_data)
+        await db.commit()
+        await db.refresh(db_session)
+        await email_delivery.notify()
+        if db_session.status == SessionStatus.SCHEDULED:
+            reminder_scheduler.schedule(db_session.id, db_session.scheduled_time)
         
         logger.info(f"Session created with ID: {db_session.id}")
         return db_session
     except Exception as e:
         logger.error(f"Error creating session: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise
 
-def update_session(db: Session, session_id: int, session: SessionUpdate):
+async def update_session(db: AsyncSession, session_id: int, session: SessionUpdate):
     try:
-        db_session = get_session(db, session_id)
+        db_session = await get_session(db, session_id)
         if not db_session:
             logger.error(f"Session {session_id} not found")
             return None
             
         update_data = session.dict(exclude_unset=True)
         
+        # A moved session gets a fresh reminder
+        if update_data.get("scheduled_time", db_session.scheduled_time) != db_session.scheduled_time:
+            db_session.reminder_sent_at = None
+        
         for key, value in update_data.items():
             setattr(db_session, key, value)
         
-        db.commit()
-        db.refresh(db_session)
+        await db.commit()
+        await db.refresh(db_session)
+        
+        if db_session.status == SessionStatus.SCHEDULED and db_session.reminder_sent_at is None:
+            reminder_scheduler.schedule(db_session.id, db_session.scheduled_time)
+        else:
+            reminder_scheduler.cancel(db_session.id)
         
         logger.info(f"Session {session_id} updated with status: {db_session.status}")
         return db_session
     except Exception as e:
         logger.error(f"Error updating session {session_id}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise
 
-def start_session(db: Session, session_id: int):
+async def start_session(db: AsyncSession, session_id: int):
     """
     Mark a session as in progress
     """
     try:
-        db_session = get_session(db, session_id)
+        db_session = await get_session(db, session_id)
         if not db_session:
             logger.error(f"Session {session_id} not found")
             return None
             
         db_session.status = SessionStatus.IN_PROGRESS
         
-        db.commit()
-        db.refresh(db_session)
+        await db.commit()
+        await db.refresh(db_session)
+        reminder_scheduler.cancel(session_id)
         
         logger.info(f"Session {session_id} marked as in progress")
         return db_session
     except Exception as e:
         logger.error(f"Error starting session {session_id}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise
 
-def complete_session(db: Session, session_id: int, transcript: str, summary: str = None):
+async def complete_session(db: AsyncSession, session_id: int, transcript: str, summary: str = None):
     """
     Mark a session as completed and save the transcript and summary
     """
     try:
-        db_session = get_session(db, session_id)
+        db_session = await get_session(db, session_id)
         if not db_session:
             logger.error(f"Session {session_id} not found")
             return None
@@ -121,22 +141,23 @@ def complete_session(db: Session, session_id: int, transcript: str, summary: str
         db_session.transcript = transcript
         db_session.summary = summary
         
-        db.commit()
-        db.refresh(db_session)
+        await db.commit()
+        await db.refresh(db_session)
+        reminder_scheduler.cancel(session_id)
         
         logger.info(f"Session {session_id} marked as completed")
         return db_session
     except Exception as e:
         logger.error(f"Error completing session {session_id}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise
 
-def cancel_session(db: Session, session_id: int, reason: str = None):
+async def cancel_session(db: AsyncSession, session_id: int, reason: str = None):
     """
     Mark a session as cancelled
     """
     try:
-        db_session = get_session(db, session_id)
+        db_session = await get_session(db, session_id)
         if not db_session:
             logger.error(f"Session {session_id} not found")
             return None
@@ -147,40 +168,20 @@ def cancel_session(db: Session, session_id: int, reason: str = None):
         if reason:
             db_session.summary = f"Cancelled: {reason}"
         
-        db.commit()
-        db.refresh(db_session)
+        await db.commit()
+        await db.refresh(db_session)
+        reminder_scheduler.cancel(session_id)
         
         logger.info(f"Session {session_id} cancelled")
         return db_session
     except Exception as e:
         logger.error(f"Error cancelling session {session_id}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise
 
-async def send_session_reminders(db: Session):
+async def send_session_reminders(db: AsyncSession):
     """
     Send reminders for sessions starting soon
+    Each session is reminded once; normally fired by reminder_scheduler
     """
-    upcoming_sessions = get_upcoming_sessions(db)
-    
-    for session in upcoming_sessions:
-        try:
-            # Get user details
-            user = db.query(User).filter(User.id == session.user_id).first()
-            
-            # Prepare session data
-            session_data = {
-                "id": session.id,
-                "user_id": session.user_id,
-                "user_name": user.full_name,
-                "session_type": session.session_type,
-                "scheduled_time": session.scheduled_time,
-                "status": session.status
-            }
-            
-            # Send reminder email
-            await send_session_reminder(user.email, session_data)
-            
-            logger.info(f"Reminder sent for session {session.id}")
-        except Exception as e:
-            logger.error(f"Error sending reminder for session {session.id}: {str(e)}")
+    return await send_due_reminders(db)
@@ -0,0 +1,180 @@
+import asyncio
+import contextlib
+import logging
+from typing import Any, Dict, Iterable, List
+from app.core.admission import Priority
+from app.core.config import settings
+from app.services.elevenlabs_service import ElevenLabsConversationalAI
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rough length of a token of English text; chunk budgets only need to be approximate
+CHARS_PER_TOKEN = 4
+
+# Stored when a session ends without a summary the agent could write
+SUMMARY_UNAVAILABLE = "A summary could not be generated for this session. The full transcript has been saved."
+
+class SummaryError(Exception):
+    """Raised when the agent fails to summarize part of a session"""
+
+def format_turn(interaction) -> str:
+    return f"Student: {interaction.question}\nCounselor: {interaction.answer}\n\n"
+
+def build_transcript(interactions: Iterable[Any]) -> str:
+    """Transcript of a session's interactions, joined in one pass"""
+    return "".join(format_turn(interaction) for interaction in interactions)
+
+def pack(texts: Iterable[str], max_chars: int) -> List[str]:
+    """
+    Concatenate consecutive texts into chunks of at most max_chars, in order. A text is
+    only split when it is longer than a chunk on its own.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for text in texts:
+        for start in range(0, len(text), max_chars):
+            piece = text[start:start + max_chars]
+            if current and size + len(piece) > max_chars:
+                chunks.append("".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+async def ask(prompt: str, user_id: int, user_context: Dict[str, Any]) -> str:
+    """One agent turn; raises SummaryError instead of returning the agent's apology"""
+    elevenlabs_ai = ElevenLabsConversationalAI(priority=Priority.BATCH)
+    await elevenlabs_ai.start_conversation(user_context)
+    parts = []
+    async with contextlib.aclosing(elevenlabs_ai.stream_message(prompt, user_id, user_context)) as events:
+        async for event in events:
+            if event["type"] == "error":
+                raise SummaryError(event["text"])
+            if event["type"] == "text":
+                parts.append(event["text"])
+    return "".join(parts)
+
+def session_summary_prompt(transcript: str) -> str:
+    return f"""
+    Please provide a concise summary of this counseling session. Focus on the main topics discussed,
+    advice given, and next steps recommended. Format it as a professional session summary that could
+    be shared with the student.
+
+    Here's the transcript:
+    {transcript}
+    """
+
+def part_summary_prompt(part: int, parts: int, excerpt: str) -> str:
+    return f"""
+    This is part {part} of {parts} of a counseling session transcript. Summarize it in a few sentences,
+    keeping the topics discussed, advice given and next steps agreed. Do not add an introduction.
+
+    Here's the excerpt:
+    {excerpt}
+    """
+
+def combine_summaries_prompt(summaries: str) -> str:
+    return f"""
+    These are summaries of consecutive parts of a counseling session, in order. Combine them into one
+    summary of those parts, keeping the topics discussed, advice given and next steps agreed.
+
+    {summaries}
+    """
+
+def final_summary_prompt(summaries: str) -> str:
+    return f"""
+    Please provide a concise summary of this counseling session. Focus on the main topics discussed,
+    advice given, and next steps recommended. Format it as a professional session summary that could
+    be shared with the student.
+
+    The session is given as summaries of its consecutive parts, in order:
+    {summaries}
+    """
+
+def rolling_summary_prompt(summary: str, label: str, recent: str) -> str:
+    return f"""
+    Here is a running summary of a counseling session that is still going on, followed by {label}.
+    Update the summary so it also covers them, keeping the topics discussed, advice given and next
+    steps agreed. Reply with the updated summary only.
+
+    Summary so far:
+    {summary}
+
+    {label.capitalize()}:
+    {recent}
+    """
+
+def finished_summary_prompt(summary: str, label: str, recent: str) -> str:
+    return f"""
+    Please provide a concise summary of this counseling session. Focus on the main topics discussed,
+    advice given, and next steps recommended. Format it as a professional session summary that could
+    be shared with the student.
+
+    The session is given as a running summary followed by {label}.
+
+    Summary so far:
+    {summary}
+
+    {label.capitalize()}:
+    {recent}
+    """
+
+def transcript_chunks(interactions: Iterable[Any]) -> List[str]:
+    """The transcript in chunks of whole turns within SESSION_SUMMARY_CHUNK_TOKENS"""
+    max_chars = settings.SESSION_SUMMARY_CHUNK_TOKENS * CHARS_PER_TOKEN
+    return pack((format_turn(interaction) for interaction in interactions), max_chars)
+
+async def summarize_parts(chunks: List[str], user_id: int, user_context: Dict[str, Any]) -> str:
+    """
+    Summarize the chunks of a transcript concurrently (map), then combine the summaries
+    until they fit one chunk (reduce). Returns the part summaries, in order.
+    """
+    max_chars = settings.SESSION_SUMMARY_CHUNK_TOKENS * CHARS_PER_TOKEN
+    limit = asyncio.Semaphore(settings.SESSION_SUMMARY_PARALLEL_CHUNKS)
+
+    async def summarize(prompt: str) -> str:
+        async with limit:
+            return await ask(prompt, user_id, user_context)
+
+    summaries = await asyncio.gather(*(
+        summarize(part_summary_prompt(part, len(chunks), chunk))
+        for part, chunk in enumerate(chunks, 1)
+    ))
+    logger.info(f"Summarized a transcript of user {user_id} in {len(chunks)} parts")
+
+    while len(summaries) > 1:
+        groups = pack((f"{summary.strip()}\n\n" for summary in summaries), max_chars)
+        if len(groups) == 1 or len(groups) >= len(summaries):
+            break
+        summaries = await asyncio.gather(*(summarize(combine_summaries_prompt(group)) for group in groups))
+
+    return "".join(f"{summary.strip()}\n\n" for summary in summaries)
+
+async def summarize_session(interactions: List[Any], user_id: int, user_context: Dict[str, Any]) -> str:
+    """
+    Summarize a whole session. A transcript within SESSION_SUMMARY_CHUNK_TOKENS is summarized
+    in one turn; a longer one is summarized in parts first (see summarize_parts).
+    """
+    chunks = transcript_chunks(interactions)
+    if len(chunks) <= 1:
+        return await ask(session_summary_prompt("".join(chunks)), user_id, user_context)
+    summaries = await summarize_parts(chunks, user_id, user_context)
+    return await ask(final_summary_prompt(summaries), user_id, user_context)
+
+async def update_summary(summary: str, interactions: List[Any], user_id: int, user_context: Dict[str, Any], final: bool = False) -> str:
+    """
+    Fold the turns that followed a running summary into it, in one agent turn unless they
+    are longer than a chunk. With final set the result is the session's closing summary.
+    """
+    chunks = transcript_chunks(interactions)
+    if len(chunks) <= 1:
+        label, recent = "the turns since", "".join(chunks) or "(none)"
+    else:
+        label, recent = "summaries of the parts since", await summarize_parts(chunks, user_id, user_context)
+    prompt = finished_summary_prompt if final else rolling_summary_prompt
+    return await ask(prompt(summary or "(nothing yet)", label, recent), user_id, user_context)
@@ -1,38 +1,52 @@
 import logging
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.counseling_service import invalidate_user_context
+from app.core.security import invalidate_principal, user_active_cache
+from app.core.hashing import password_hasher
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+async def get_password_hash(password: str) -> str:
+    return await password_hasher.hash(password)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    verified, _ = await password_hasher.verify_and_update(plain_password, hashed_password)
+    return verified
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
 
-def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+async def is_user_active(db: AsyncSession, user_id: int) -> bool:
+    """
+    Whether the user may still use their tokens; cached briefly so claims-only authorization
+    rarely reads the database, but shared through it so every worker sees a deactivation
+    """
+    active = user_active_cache.get(user_id)
+    if active is None:
+        active = bool(await db.scalar(select(User.is_active).where(User.id == user_id)))
+        user_active_cache.set(user_id, active)
+    return active
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100, role: UserRole = None):
-    query = db.query(User)
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, role: UserRole = None):
+    query = select(User)
     if role:
-        query = query.filter(User.role == role)
-    return query.offset(skip).limit(limit).all()
+        query = query.where(User.role == role)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.scalars().all()
 
-def create_user(db: Session, user: UserCreate):
+async def create_user(db: AsyncSession, user: UserCreate):
     try:
         logger.debug(f"Creating user with email: {user.email}")
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash(user.password)
         db_user = User(
             email=user.email,
             hashed_password=hashed_password,
@@ -43,46 +57,84 @@ def create_user(db: Session, user: UserCreate):
             role=user.role
         )
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         logger.debug(f"User created successfully: {user.email}")
         return db_user
     except Exception as e:
         logger.error(f"Error creating user: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise
 
-def update_user(db: Session, user_id: int, user: UserUpdate):
+async def update_user(db: AsyncSession, user_id: int, user: UserUpdate):
     try:
-        db_user = get_user(db, user_id)
+        db_user = await get_user(db, user_id)
         if not db_user:
             logger.error(f"User {user_id} not found")
             return None
-            
+
+        previous_email = db_user.email
         update_data = user.dict(exclude_unset=True)
-        
+
         if "password" in update_data:
-            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
-        
+            update_data["hashed_password"] = await get_password_hash(update_data.pop("password"))
+
         for key, value in update_data.items():
             setattr(db_user, key, value)
-        
-        db.commit()
-        db.refresh(db_user)
+
+        await db.commit()
+        await db.refresh(db_user)
+        invalidate_user_context(user_id)
+        invalidate_principal(previous_email, db_user.email)
+        user_active_cache.invalidate(user_id)
         logger.info(f"User {user_id} updated successfully")
         return db_user
     except Exception as e:
         logger.error(f"Error updating user {user_id}: {str(e)}")
-        db.rollback()
+        await db.rollback()
+        raise
+
+async def deactivate_user(db: AsyncSession, user_id: int):
+    """Deactivate a user; their outstanding tokens stop working on every worker within PRINCIPAL_CACHE_TTL_SECONDS"""
+    try:
+        db_user = await get_user(db, user_id)
+        if not db_user:
+            logger.error(f"User {user_id} not found")
+            return None
+
+        db_user.is_active = False
+        await db.commit()
+        await db.refresh(db_user)
+        invalidate_principal(db_user.email)
+        user_active_cache.invalidate(user_id)
+        logger.info(f"User {user_id} deactivated")
+        return db_user
+    except Exception as e:
+        logger.error(f"Error deactivating user {user_id}: {str(e)}")
+        await db.rollback()
         raise
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await get_user_by_email(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not verified:
         return False
+    if new_hash is not None:
+        # Stored hash predates the current cost parameters, upgrade it while we have the password
+        try:
+            user.hashed_password = new_hash
+            await db.commit()
+            logger.info(f"Rehashed password of user {user.id}")
+        except Exception as e:
+            logger.error(f"Error rehashing password of user {user.id}: {str(e)}")
+            await db.rollback()
+            await db.refresh(user)
     return user
 
-def get_counselors(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).filter(User.role == UserRole.COUNSELOR).offset(skip).limit(limit).all()
+async def get_counselors(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(
+        select(User).where(User.role == UserRole.COUNSELOR).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
@@ -0,0 +1,104 @@
+"""
+Report extraction throughput benchmark
+
+Parses every PDF in a folder of sample reports (repeated --repeat times) through
+the report extractor's process pool at several pool sizes, and reports reports
+per second and per-report latency percentiles next to a serial in-process
+baseline. Also reports the worst event loop stall seen while the pool is busy,
+which is what the API's other requests would wait. Runs without the API;
+workers are warmed up before timing.
+
+Usage (from backend/):
+    python -m benchmarks.extract_throughput --folder data/reports --repeat 10 --workers 1 2 4
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+from typing import Dict, List
+
+from app.services.report_extraction import ReportExtractor
+from app.services.report_parser import parse_report
+from benchmarks.load_counseling import percentile
+
+def summary(count: int, elapsed: float, latencies: List[float]) -> Dict:
+    return {
+        "reports": count,
+        "elapsed_seconds": round(elapsed, 3),
+        "reports_per_second": round(count / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+        },
+    }
+
+def run_serial(paths: List[str], max_pages: int) -> Dict:
+    latencies = []
+    started = time.perf_counter()
+    for path in paths:
+        parse_started = time.perf_counter()
+        parse_report(path, max_pages)
+        latencies.append(time.perf_counter() - parse_started)
+    return summary(len(paths), time.perf_counter() - started, latencies)
+
+async def watch_loop(stop: asyncio.Event, lags: List[float], interval: float = 0.01) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+async def run_pool(paths: List[str], workers: int, args) -> Dict:
+    extractor = ReportExtractor(max_workers=workers, timeout=args.timeout, max_pages=args.max_pages)
+    latencies, failures = [], []
+
+    async def extract(path: str) -> None:
+        started = time.perf_counter()
+        try:
+            await extractor.extract(path)
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            failures.append(type(e).__name__)
+
+    try:
+        # Spawn every worker process before timing
+        await asyncio.gather(*(extractor.extract(paths[0]) for _ in range(workers)))
+
+        lags, stop = [], asyncio.Event()
+        watcher = asyncio.create_task(watch_loop(stop, lags))
+        started = time.perf_counter()
+        await asyncio.gather(*(extract(path) for path in paths))
+        result = summary(len(latencies), time.perf_counter() - started, latencies)
+        stop.set()
+        await watcher
+    finally:
+        extractor.shutdown()
+    result["failures"] = len(failures)
+    result["timeouts"] = extractor.metrics()["timeouts"]
+    result["max_loop_stall_ms"] = round(max(lags, default=0.0) * 1000, 1)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Report extraction throughput benchmark")
+    parser.add_argument("--folder", default="data/reports", help="folder of sample report PDFs")
+    parser.add_argument("--repeat", type=int, default=5, help="times every report is parsed")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 2])
+    parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--skip-serial", action="store_true")
+    args = parser.parse_args()
+
+    samples = sorted(glob.glob(os.path.join(args.folder, "**", "*.pdf"), recursive=True))
+    if not samples:
+        parser.error(f"no PDF files in {args.folder}")
+    paths = samples * args.repeat
+
+    result = {"sample_reports": len(samples), "cpu_count": os.cpu_count()}
+    if not args.skip_serial:
+        result["serial"] = run_serial(paths, args.max_pages)
+    result["pool"] = {str(workers): asyncio.run(run_pool(paths, workers, args)) for workers in args.workers}
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Local stand-in for the ElevenLabs Conversational AI WebSocket
+
+Speaks the protocol ElevenLabsConversationalAI expects: a client_data message
+answered by metadata, then for every user_audio_chunk a stream of
+agent_response / audio_response messages ending with is_final.
+
+Usage (from backend/):
+    python -m benchmarks.fake_convai_server --port 8765 --first-token-latency 0.3 --error-rate 0.01
+    ELEVENLABS_WS_URL=ws://127.0.0.1:8765 ELEVENLABS_API_KEY=fake ELEVENLABS_AGENT_ID=fake python run.py
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import random
+from dataclasses import dataclass
+
+import websockets
+
+logger = logging.getLogger("fake_convai")
+
+@dataclass
+class FakeConvaiConfig:
+    handshake_latency: float = 0.05  # seconds before the metadata reply
+    first_token_latency: float = 0.3  # seconds before the first agent_response
+    chunk_interval: float = 0.02  # seconds between streamed chunks
+    jitter: float = 0.1  # +/- fraction applied to every delay
+    text_chunks: int = 20
+    words_per_chunk: int = 4
+    audio_chunks: int = 10
+    audio_chunk_bytes: int = 4096
+    error_rate: float = 0.0  # probability a turn returns an error message instead of a response
+    drop_rate: float = 0.0  # probability the connection is dropped mid-turn
+    seed: int = None
+
+WORDS = (
+    "career goals skills interests university programs engineering design data science "
+    "research communication leadership mathematics physics biology economics internship"
+).split()
+
+class FakeConvaiServer:
+    def __init__(self, config: FakeConvaiConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.connections = 0
+        self.turns = 0
+
+    async def sleep(self, delay: float) -> None:
+        if delay <= 0:
+            return
+        spread = delay * self.config.jitter
+        await asyncio.sleep(max(0.0, delay + self.random.uniform(-spread, spread)))
+
+    async def handler(self, websocket, path=None) -> None:
+        self.connections += 1
+        try:
+            init = json.loads(await websocket.recv())
+            if init.get("type") != "client_data":
+                await websocket.send(json.dumps({"type": "error", "data": {"message": "Expected client_data"}}))
+                return
+
+            await self.sleep(self.config.handshake_latency)
+            await websocket.send(json.dumps({
+                "type": "metadata",
+                "data": {"conversation_id": init.get("data", {}).get("conversation_id")}
+            }))
+
+            async for raw in websocket:
+                message = json.loads(raw)
+                if message.get("type") == "user_audio_chunk":
+                    await self.respond(websocket, message.get("data", {}).get("text", ""))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def respond(self, websocket, text: str) -> None:
+        self.turns += 1
+        await self.sleep(self.config.first_token_latency)
+
+        if self.random.random() < self.config.error_rate:
+            await websocket.send(json.dumps({"type": "error", "data": {"message": "Injected error", "is_final": True}}))
+            return
+
+        drop_at = self.random.randrange(self.config.text_chunks) if self.random.random() < self.config.drop_rate else None
+        audio_every = max(1, self.config.text_chunks // max(1, self.config.audio_chunks))
+        audio_sent = 0
+
+        for index in range(self.config.text_chunks):
+            if index == drop_at:
+                await websocket.close(code=1011, reason="Injected drop")
+                return
+
+            words = " ".join(self.random.choice(WORDS) for _ in range(self.config.words_per_chunk))
+            await websocket.send(json.dumps({"type": "agent_response", "data": {"text": words + " "}}))
+
+            if audio_sent < self.config.audio_chunks and index % audio_every == 0:
+                audio = base64.b64encode(os.urandom(self.config.audio_chunk_bytes)).decode("utf-8")
+                await websocket.send(json.dumps({"type": "audio_response", "data": {"audio": audio}}))
+                audio_sent += 1
+
+            await self.sleep(self.config.chunk_interval)
+
+        await websocket.send(json.dumps({"type": "agent_response", "data": {"text": "", "is_final": True}}))
+
+async def serve(config: FakeConvaiConfig, host: str, port: int) -> None:
+    server = FakeConvaiServer(config)
+    async with websockets.serve(server.handler, host, port, max_size=None):
+        logger.info(f"Fake convai server listening on ws://{host}:{port}")
+        await asyncio.Future()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ElevenLabs convai stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    defaults = FakeConvaiConfig()
+    for field, value in vars(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value) if value is not None else int, default=value)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = FakeConvaiConfig(**{field: getattr(args, field) for field in vars(defaults)})
+    asyncio.run(serve(config, args.host, args.port))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Local SMTP stand-in
+
+Accepts plain SMTP (EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT) without
+TLS, optionally slow or flaky, and logs every accepted message plus how many
+connections delivered them, so connection reuse and retries are visible.
+
+Usage (from backend/):
+    python -m benchmarks.fake_smtp_server --port 1025 --command-latency 0.2 --reject-rate 0.1
+    EMAIL_HOST=127.0.0.1 EMAIL_PORT=1025 EMAIL_USE_TLS=false python run.py
+"""
+import argparse
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+
+logger = logging.getLogger("fake_smtp")
+
+@dataclass
+class FakeSMTPConfig:
+    connect_latency: float = 0.2  # seconds before the greeting, i.e. TCP + TLS setup cost
+    command_latency: float = 0.01  # seconds before every reply
+    reject_rate: float = 0.0  # probability a message is answered with a temporary failure
+    drop_rate: float = 0.0  # probability the connection is closed instead of accepting a message
+    seed: int = None
+
+class FakeSMTPServer:
+    def __init__(self, config: FakeSMTPConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.connections = 0
+        self.messages = 0
+
+    async def reply(self, writer: asyncio.StreamWriter, line: str) -> None:
+        await asyncio.sleep(self.config.command_latency)
+        writer.write(f"{line}\r\n".encode("utf-8"))
+        await writer.drain()
+
+    async def handler(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        connection = self.connections
+        await asyncio.sleep(self.config.connect_latency)
+        await self.reply(writer, "220 fake-smtp ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.decode("utf-8", "replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+
+                if verb == "EHLO":
+                    writer.write(b"250-fake-smtp\r\n250-AUTH PLAIN LOGIN\r\n")
+                    await self.reply(writer, "250 8BITMIME")
+                elif verb == "AUTH":
+                    await self.reply(writer, "235 Authentication successful")
+                elif verb in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                    await self.reply(writer, "250 OK")
+                elif verb == "DATA":
+                    await self.reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    if self.random.random() < self.config.drop_rate:
+                        logger.info(f"Dropping connection {connection}")
+                        return
+                    if self.random.random() < self.config.reject_rate:
+                        await self.reply(writer, "451 Temporary failure, try again later")
+                        continue
+                    self.messages += 1
+                    logger.info(f"Accepted message {self.messages} on connection {connection} ({self.connections} connections total)")
+                    await self.reply(writer, "250 OK queued")
+                elif verb == "QUIT":
+                    await self.reply(writer, "221 Bye")
+                    return
+                else:
+                    await self.reply(writer, "502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+async def serve(config: FakeSMTPConfig, host: str, port: int) -> None:
+    server = FakeSMTPServer(config)
+    async with await asyncio.start_server(server.handler, host, port):
+        logger.info(f"Fake SMTP server listening on {host}:{port}")
+        await asyncio.Future()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    defaults = FakeSMTPConfig()
+    for field, value in vars(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value) if value is not None else int, default=value)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = FakeSMTPConfig(**{field: getattr(args, field) for field in vars(defaults)})
+    asyncio.run(serve(config, args.host, args.port))
+
+if __name__ == "__main__":
+    main()
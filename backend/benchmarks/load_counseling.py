@@ -0,0 +1,173 @@
+"""
+End-to-end load benchmark for the counseling turn path
+
+Drives N concurrent students through /api/counseling/ws/{session_id} and/or
+/api/counseling/interact of a running API and reports turn latency percentiles
+and throughput. Run the API against benchmarks.fake_convai_server so no
+ElevenLabs quota is used.
+
+Usage (from backend/):
+    python -m benchmarks.fake_convai_server --port 8765 &
+    ELEVENLABS_WS_URL=ws://127.0.0.1:8765 ELEVENLABS_API_KEY=fake ELEVENLABS_AGENT_ID=fake \\
+        uvicorn app.main:app --port 8000 &
+    python -m benchmarks.load_counseling --students 50 --turns 5 --mode both
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+QUESTIONS = [
+    "What careers match my interests?",
+    "Which subjects should I focus on next year?",
+    "How do I prepare for engineering entrance exams?",
+    "Is data science a good fit for my personality type?",
+    "What skills should I build this summer?",
+]
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def report(name: str, latencies: List[float], errors: int, elapsed: float, ttft: Optional[List[float]] = None) -> Dict:
+    result = {
+        "mode": name,
+        "turns": len(latencies),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_turns_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+        }
+    }
+    if ttft:
+        result["time_to_first_token_ms"] = {
+            "p50": round(percentile(ttft, 50) * 1000, 1),
+            "p95": round(percentile(ttft, 95) * 1000, 1),
+            "p99": round(percentile(ttft, 99) * 1000, 1),
+        }
+    return result
+
+async def create_student(client: httpx.AsyncClient, run_id: str, index: int) -> Dict:
+    """Register a student, log in and book an AI session"""
+    email = f"bench_{run_id}_{index}@example.com"
+    password = "bench-password"
+    response = await client.post("/api/users/", json={
+        "email": email,
+        "password": password,
+        "full_name": f"Bench Student {index}",
+        "grade_class": "12",
+        "contact": "0000000000",
+    })
+    response.raise_for_status()
+    user = response.json()
+
+    response = await client.post("/api/users/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    token = response.json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post("/api/sessions/", headers=headers, json={
+        "user_id": user["id"],
+        "session_type": "AI",
+        "scheduled_time": (datetime.utcnow() + timedelta(hours=1)).isoformat(),
+    })
+    response.raise_for_status()
+    return {"user_id": user["id"], "session_id": response.json()["id"], "headers": headers}
+
+async def websocket_student(ws_url: str, student: Dict, turns: int, think_time: float,
+                            latencies: List[float], ttft: List[float], errors: List[int]) -> None:
+    url = f"{ws_url}/api/counseling/ws/{student['session_id']}?stream=true&audio=binary"
+    async with websockets.connect(url, max_size=None) as websocket:
+        await websocket.recv()  # system greeting
+        for turn in range(turns):
+            started = time.perf_counter()
+            first_token = None
+            await websocket.send(QUESTIONS[turn % len(QUESTIONS)])
+            while True:
+                frame = await websocket.recv()
+                if isinstance(frame, bytes):
+                    continue
+                event = json.loads(frame)
+                if event.get("type") == "response_delta" and first_token is None:
+                    first_token = time.perf_counter() - started
+                elif event.get("type") == "error":
+                    errors.append(1)
+                    return
+                elif event.get("type") == "response":
+                    break
+            latencies.append(time.perf_counter() - started)
+            ttft.append(first_token if first_token is not None else latencies[-1])
+            await asyncio.sleep(think_time)
+
+async def http_student(client: httpx.AsyncClient, student: Dict, turns: int, think_time: float,
+                       latencies: List[float], errors: List[int]) -> None:
+    for turn in range(turns):
+        started = time.perf_counter()
+        response = await client.post("/api/counseling/interact", headers=student["headers"], json={
+            "session_id": student["session_id"],
+            "question": QUESTIONS[turn % len(QUESTIONS)],
+        })
+        if response.status_code != 200:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(think_time)
+
+async def run_benchmark(args) -> List[Dict]:
+    run_id = uuid.uuid4().hex[:8]
+    ws_url = args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+    limits = httpx.Limits(max_connections=args.students * 2, max_keepalive_connections=args.students)
+    results = []
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        students = await asyncio.gather(*(create_student(client, run_id, i) for i in range(args.students)))
+
+        if args.mode in ("ws", "both"):
+            latencies, ttft, errors = [], [], []
+            started = time.perf_counter()
+            outcomes = await asyncio.gather(*(
+                websocket_student(ws_url, student, args.turns, args.think_time, latencies, ttft, errors)
+                for student in students
+            ), return_exceptions=True)
+            errors.extend(1 for outcome in outcomes if isinstance(outcome, Exception))
+            results.append(report("websocket", latencies, len(errors), time.perf_counter() - started, ttft))
+
+        if args.mode in ("http", "both"):
+            latencies, errors = [], []
+            started = time.perf_counter()
+            outcomes = await asyncio.gather(*(
+                http_student(client, student, args.turns, args.think_time, latencies, errors)
+                for student in students
+            ), return_exceptions=True)
+            errors.extend(1 for outcome in outcomes if isinstance(outcome, Exception))
+            results.append(report("http", latencies, len(errors), time.perf_counter() - started))
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Counseling turn latency benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between a student's turns")
+    parser.add_argument("--mode", choices=["ws", "http", "both"], default="both")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    for result in asyncio.run(run_benchmark(args)):
+        print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Login storm benchmark
+
+Registers N students against a running API, then logs them all in at once
+(optionally several rounds) and reports login latency percentiles and
+throughput. While the storm runs, a probe keeps calling GET /api/users/me so
+the latency of unrelated routes under hashing load is reported too. Compare
+runs with different PASSWORD_HASH_WORKERS / PASSWORD_HASH_EXECUTOR settings.
+
+Usage (from backend/):
+    PASSWORD_HASH_WORKERS=4 uvicorn app.main:app --port 8000 &
+    python -m benchmarks.load_login --students 200 --concurrency 200 --rounds 3
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.load_counseling import percentile
+
+PASSWORD = "bench-password"
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(latencies, 50) * 1000, 1),
+        "p95": round(percentile(latencies, 95) * 1000, 1),
+        "p99": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+async def register(client: httpx.AsyncClient, run_id: str, index: int) -> str:
+    email = f"login_{run_id}_{index}@example.com"
+    response = await client.post("/api/users/", json={
+        "email": email,
+        "password": PASSWORD,
+        "full_name": f"Login Student {index}",
+        "grade_class": "12",
+        "contact": "0000000000",
+    })
+    response.raise_for_status()
+    return email
+
+async def login(client: httpx.AsyncClient, email: str, gate: asyncio.Semaphore,
+                latencies: List[float], errors: List[int]) -> None:
+    async with gate:
+        started = time.perf_counter()
+        response = await client.post("/api/users/login", data={"username": email, "password": PASSWORD})
+        if response.status_code != 200:
+            errors.append(1)
+            return
+        latencies.append(time.perf_counter() - started)
+
+async def probe(client: httpx.AsyncClient, headers: Dict[str, str], stop: asyncio.Event,
+                latencies: List[float], interval: float) -> None:
+    """Cheap authenticated route, measures how much the storm slows everything else"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/api/users/me", headers=headers)
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+async def run_benchmark(args) -> Dict:
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=args.concurrency + 1, max_keepalive_connections=args.concurrency + 1)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        emails = []
+        for start in range(0, args.students, 20):
+            emails += await asyncio.gather(*(
+                register(client, run_id, i) for i in range(start, min(start + 20, args.students))
+            ))
+
+        response = await client.post("/api/users/login", data={"username": emails[0], "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+        latencies, errors, probe_latencies = [], [], []
+        gate = asyncio.Semaphore(args.concurrency)
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe(client, headers, stop, probe_latencies, args.probe_interval))
+
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            await asyncio.gather(*(login(client, email, gate, latencies, errors) for email in emails))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await prober
+
+    return {
+        "logins": len(latencies),
+        "errors": len(errors),
+        "concurrency": args.concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_logins_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "login_latency_ms": latency_summary(latencies),
+        "probe_requests": len(probe_latencies),
+        "probe_latency_ms": latency_summary(probe_latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput under concurrency")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=100, help="logins in flight at once")
+    parser.add_argument("--rounds", type=int, default=1, help="times every student logs in")
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="seconds between /me probes")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run_benchmark(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Session summarization benchmark
+
+Builds synthetic sessions of several lengths (500+ turns) and compares, per length:
+- transcript building by repeated string concatenation against build_transcript
+- the old single-turn summary of transcript[:1000] against summarize_session's
+  map-reduce over the whole transcript, in wall time, upstream turns and the share
+  of the transcript the summarizer saw
+
+Runs without the API or a database; agent turns go to an in-process
+benchmarks.fake_convai_server, so the latency settings below stand in for ElevenLabs.
+
+Usage (from backend/):
+    python -m benchmarks.summarize_sessions --turns 500 1000 2000 --first-token-latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+import websockets
+
+from app.core.config import settings
+from app.services.session_summary import CHARS_PER_TOKEN, ask, build_transcript, pack, format_turn, session_summary_prompt, summarize_session
+from benchmarks.fake_convai_server import FakeConvaiConfig, FakeConvaiServer, WORDS
+from benchmarks.load_counseling import QUESTIONS
+
+USER_CONTEXT = {"name": "Benchmark Student", "grade_class": "12", "expectations": "Choose a university"}
+
+def make_session(turns: int, answer_words: int, seed: int) -> List[SimpleNamespace]:
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            question=rng.choice(QUESTIONS),
+            answer=" ".join(rng.choice(WORDS) for _ in range(answer_words))
+        )
+        for _ in range(turns)
+    ]
+
+def concatenated_transcript(interactions: List[SimpleNamespace]) -> str:
+    """How end_counseling_session used to build the transcript"""
+    transcript = ""
+    for interaction in interactions:
+        transcript += f"Student: {interaction.question}\n"
+        transcript += f"Counselor: {interaction.answer}\n\n"
+    return transcript
+
+def best_of(runs: int, build, interactions) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        build(interactions)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+async def timed_turns(server: FakeConvaiServer, summarize) -> Dict:
+    turns = server.turns
+    started = time.perf_counter()
+    summary = await summarize()
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "upstream_turns": server.turns - turns,
+        "summary_chars": len(summary),
+    }
+
+async def run_session(server: FakeConvaiServer, turns: int, args) -> Dict:
+    interactions = make_session(turns, args.answer_words, args.seed)
+    transcript = build_transcript(interactions)
+    assert transcript == concatenated_transcript(interactions)
+
+    legacy = await timed_turns(
+        server,
+        lambda: ask(session_summary_prompt(f"{transcript[:1000]}..."), 1, USER_CONTEXT)
+    )
+    legacy["transcript_share"] = round(min(1.0, 1000 / len(transcript)), 4)
+
+    map_reduce = await timed_turns(server, lambda: summarize_session(interactions, 1, USER_CONTEXT))
+    map_reduce["chunks"] = len(pack((format_turn(interaction) for interaction in interactions), settings.SESSION_SUMMARY_CHUNK_TOKENS * CHARS_PER_TOKEN))
+    map_reduce["transcript_share"] = 1.0
+
+    return {
+        "turns": turns,
+        "transcript_chars": len(transcript),
+        "build_transcript_ms": {
+            "concatenation": round(best_of(args.repeat, concatenated_transcript, interactions) * 1000, 2),
+            "join": round(best_of(args.repeat, build_transcript, interactions) * 1000, 2),
+        },
+        "summary": {"single_turn_first_1000_chars": legacy, "map_reduce": map_reduce},
+    }
+
+async def run(args) -> Dict:
+    config = FakeConvaiConfig(
+        first_token_latency=args.first_token_latency,
+        chunk_interval=args.chunk_interval,
+        audio_chunks=0,
+        seed=args.seed,
+    )
+    server = FakeConvaiServer(config)
+    async with websockets.serve(server.handler, "127.0.0.1", 0, max_size=None) as ws_server:
+        port = ws_server.sockets[0].getsockname()[1]
+        settings.ELEVENLABS_WS_URL = f"ws://127.0.0.1:{port}"
+        settings.ELEVENLABS_API_KEY = "fake"
+        settings.ELEVENLABS_AGENT_ID = "fake"
+        settings.SESSION_SUMMARY_CHUNK_TOKENS = args.chunk_tokens
+        settings.SESSION_SUMMARY_PARALLEL_CHUNKS = args.parallel_chunks
+        sessions = [await run_session(server, turns, args) for turns in args.turns]
+
+    return {
+        "chunk_tokens": args.chunk_tokens,
+        "parallel_chunks": args.parallel_chunks,
+        "first_token_latency": args.first_token_latency,
+        "sessions": sessions,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Session summarization benchmark")
+    parser.add_argument("--turns", type=int, nargs="+", default=[500, 1000, 2000])
+    parser.add_argument("--answer-words", type=int, default=60)
+    parser.add_argument("--chunk-tokens", type=int, default=settings.SESSION_SUMMARY_CHUNK_TOKENS)
+    parser.add_argument("--parallel-chunks", type=int, default=settings.SESSION_SUMMARY_PARALLEL_CHUNKS)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--chunk-interval", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3, help="transcript builds timed per session, best kept")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # Every agent turn logs its prompt
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
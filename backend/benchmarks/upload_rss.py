@@ -0,0 +1,127 @@
+"""
+Concurrent psychometric upload benchmark
+
+Registers a student against a running API and posts N report uploads of a given
+size at once to /api/reports/psychometric, sampling the API process's resident
+memory (from /proc, Linux only) while they run. Reports upload latency and the
+server's RSS before, at peak and after.
+
+Usage (from backend/):
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.upload_rss --server-pid $! --uploads 20 --size-mb 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.load_counseling import percentile
+
+def rss_kb(pid: int, field: str = "VmRSS") -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+async def sample_rss(pid: int, stop: asyncio.Event, samples: List[int], interval: float) -> None:
+    while not stop.is_set():
+        value = rss_kb(pid)
+        if value is not None:
+            samples.append(value)
+        await asyncio.sleep(interval)
+
+async def login(client: httpx.AsyncClient) -> Dict[str, str]:
+    email = f"upload_{uuid.uuid4().hex[:8]}@example.com"
+    password = "bench-password"
+    response = await client.post("/api/users/", json={
+        "email": email,
+        "password": password,
+        "full_name": "Upload Student",
+        "grade_class": "12",
+        "contact": "0000000000",
+    })
+    response.raise_for_status()
+    response = await client.post("/api/users/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+async def upload(client: httpx.AsyncClient, headers: Dict[str, str], path: str,
+                 latencies: List[float], statuses: Dict[int, int]) -> None:
+    started = time.perf_counter()
+    with open(path, "rb") as report:
+        response = await client.post(
+            "/api/reports/psychometric",
+            headers=headers,
+            files={"file": ("report.pdf", report, "application/pdf")}
+        )
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    if response.status_code == 200:
+        latencies.append(time.perf_counter() - started)
+
+async def run_benchmark(args) -> Dict:
+    path = f"/tmp/upload_rss_{os.getpid()}.pdf"
+    with open(path, "wb") as report:
+        report.write(b"%PDF-1.4\n")
+        for _ in range(args.size_mb):
+            report.write(os.urandom(1024 * 1024))
+
+    latencies, statuses, samples = [], {}, []
+    stop = asyncio.Event()
+    try:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+            headers = await login(client)
+            rss_before = rss_kb(args.server_pid) if args.server_pid else None
+            sampler = asyncio.create_task(sample_rss(args.server_pid, stop, samples, args.sample_interval)) if args.server_pid else None
+
+            started = time.perf_counter()
+            await asyncio.gather(*(upload(client, headers, path, latencies, statuses) for _ in range(args.uploads)))
+            elapsed = time.perf_counter() - started
+
+            stop.set()
+            if sampler:
+                await sampler
+    finally:
+        os.remove(path)
+
+    result = {
+        "uploads": args.uploads,
+        "size_mb": args.size_mb,
+        "statuses": statuses,
+        "elapsed_seconds": round(elapsed, 3),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+        },
+    }
+    if args.server_pid:
+        result["server_rss_mb"] = {
+            "before": round(rss_before / 1024, 1) if rss_before else None,
+            "peak_sampled": round(max(samples) / 1024, 1) if samples else None,
+            "after": round((rss_kb(args.server_pid) or 0) / 1024, 1),
+            "high_water_mark": round((rss_kb(args.server_pid, "VmHWM") or 0) / 1024, 1),
+        }
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent upload memory benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--server-pid", type=int, help="API process to sample RSS from")
+    parser.add_argument("--uploads", type=int, default=10, help="concurrent uploads")
+    parser.add_argument("--size-mb", type=int, default=10, help="size of every uploaded report")
+    parser.add_argument("--sample-interval", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run_benchmark(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
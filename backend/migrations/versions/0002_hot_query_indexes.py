@@ -0,0 +1,36 @@
+"""hot query indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:41:02.118301
+
+Composite indexes for the per-user and per-session lookups ordered by time,
+and for the upcoming-session scan by status and start time
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_psychometric_data_user_id_uploaded_at', 'psychometric_data', ['user_id', 'uploaded_at'], unique=False)
+    op.create_index('ix_session_interactions_session_id_timestamp', 'session_interactions', ['session_id', 'timestamp'], unique=False)
+    op.create_index('ix_sessions_user_id_scheduled_time', 'sessions', ['user_id', 'scheduled_time'], unique=False)
+    op.create_index('ix_sessions_status_scheduled_time', 'sessions', ['status', 'scheduled_time'], unique=False)
+    op.create_index('ix_career_roadmaps_user_id_created_at', 'career_roadmaps', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_foreign_study_roadmaps_user_id_created_at', 'foreign_study_roadmaps', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_foreign_study_roadmaps_user_id_created_at', table_name='foreign_study_roadmaps')
+    op.drop_index('ix_career_roadmaps_user_id_created_at', table_name='career_roadmaps')
+    op.drop_index('ix_sessions_status_scheduled_time', table_name='sessions')
+    op.drop_index('ix_sessions_user_id_scheduled_time', table_name='sessions')
+    op.drop_index('ix_session_interactions_session_id_timestamp', table_name='session_interactions')
+    op.drop_index('ix_psychometric_data_user_id_uploaded_at', table_name='psychometric_data')
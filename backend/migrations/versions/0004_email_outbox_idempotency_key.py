@@ -0,0 +1,28 @@
+"""email outbox idempotency key
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:46:18.215907
+
+Idempotency key per outbox row so a domain event stages its email at most once
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('email_outbox', sa.Column('idempotency_key', sa.String(), nullable=True))
+    op.create_index('ix_email_outbox_idempotency_key', 'email_outbox', ['idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_idempotency_key', table_name='email_outbox')
+    op.drop_column('email_outbox', 'idempotency_key')
@@ -0,0 +1,26 @@
+"""session reminder sent at
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:49:37.604112
+
+Persisted flag recording that a session's reminder was sent, so it is sent once
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('reminder_sent_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('sessions', 'reminder_sent_at')
@@ -0,0 +1,120 @@
+"""content addressed reports
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 12:53:08.392714
+
+Report PDFs are stored once per content hash in report_blobs and referenced
+from psychometric_data. Existing reports are hashed where they are and
+recorded as blobs; identical files share one blob with a reference count.
+No file is moved or deleted here: python -m app.relocate_reports moves them
+into the content-addressed layout once this revision has been committed.
+
+"""
+import hashlib
+import os
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# Report paths are stored relative to backend/, whatever directory alembic runs from
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+EXTRACTED_FIELDS = ('interests', 'skills', 'personality_type', 'aptitude', 'recommended_careers', 'subjects_interested')
+
+report_blobs = sa.table(
+    'report_blobs',
+    sa.column('sha256', sa.String),
+    sa.column('path', sa.String),
+    sa.column('size', sa.Integer),
+    sa.column('ref_count', sa.Integer),
+    sa.column('extracted_data', sa.JSON(none_as_null=True)),
+    sa.column('created_at', sa.DateTime),
+)
+
+psychometric_data = sa.table(
+    'psychometric_data',
+    sa.column('id', sa.Integer),
+    sa.column('report_url', sa.String),
+    sa.column('report_sha256', sa.String),
+    sa.column('interests', sa.JSON),
+    sa.column('skills', sa.JSON),
+    sa.column('personality_type', sa.String),
+    sa.column('aptitude', sa.JSON),
+    sa.column('recommended_careers', sa.JSON),
+    sa.column('subjects_interested', sa.JSON),
+)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as report:
+        for chunk in iter(lambda: report.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def upgrade() -> None:
+    op.create_table('report_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('extracted_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.add_column('psychometric_data', sa.Column('report_sha256', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_psychometric_data_report_sha256'), 'psychometric_data', ['report_sha256'], unique=False)
+
+    # Offline (--sql) upgrades cannot read the reports; app.relocate_reports backfills them
+    if op.get_context().as_sql:
+        return
+
+    connection = op.get_bind()
+    blobs = {}
+    hashes = {}
+
+    rows = connection.execute(sa.select(psychometric_data).order_by(psychometric_data.c.id)).mappings().all()
+    for row in rows:
+        path = row['report_url']
+        if not path:
+            continue
+        if path not in hashes:
+            location = os.path.join(BACKEND_DIR, path)
+            hashes[path] = file_sha256(location) if os.path.isfile(location) else None
+        sha256 = hashes[path]
+        if sha256 is None:
+            continue
+        if sha256 not in blobs:
+            blobs[sha256] = {
+                'sha256': sha256,
+                'path': path,
+                'size': os.path.getsize(os.path.join(BACKEND_DIR, path)),
+                'ref_count': 0,
+                'extracted_data': {field: row[field] for field in EXTRACTED_FIELDS},
+                'created_at': datetime.utcnow(),
+            }
+        blobs[sha256]['ref_count'] += 1
+        connection.execute(
+            psychometric_data.update()
+            .where(psychometric_data.c.id == row['id'])
+            .values(report_sha256=sha256)
+        )
+
+    if blobs:
+        op.bulk_insert(report_blobs, list(blobs.values()))
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_psychometric_data_report_sha256'), table_name='psychometric_data')
+    op.drop_column('psychometric_data', 'report_sha256')
+    op.drop_table('report_blobs')
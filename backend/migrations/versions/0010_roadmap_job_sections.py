@@ -0,0 +1,26 @@
+"""roadmap job sections
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 13:05:43.255858
+
+Roadmap sections a running job has finished so far, for progressive display
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('roadmap_jobs', sa.Column('sections', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('roadmap_jobs', 'sections')
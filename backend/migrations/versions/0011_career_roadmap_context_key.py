@@ -0,0 +1,28 @@
+"""career roadmap context key
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 13:21:07.114052
+
+Hash of the profile a career roadmap was generated from, to reuse it while unchanged
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('career_roadmaps', sa.Column('context_key', sa.String(length=64), nullable=True))
+    op.create_index('ix_career_roadmaps_user_id_context_key', 'career_roadmaps', ['user_id', 'context_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_career_roadmaps_user_id_context_key', table_name='career_roadmaps')
+    op.drop_column('career_roadmaps', 'context_key')
@@ -0,0 +1,30 @@
+"""session rolling summary
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 13:33:43.728674
+
+Live session summary, updated every few turns while the session is in progress
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('rolling_summary', sa.Text(), nullable=True))
+    op.add_column('sessions', sa.Column('summarized_turns', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('sessions', sa.Column('rolling_summary_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('sessions', 'rolling_summary_at')
+    op.drop_column('sessions', 'summarized_turns')
+    op.drop_column('sessions', 'rolling_summary')
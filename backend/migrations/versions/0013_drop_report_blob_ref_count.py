@@ -0,0 +1,30 @@
+"""drop report blob ref count
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 13:48:12.417306
+
+Blobs are referenced by psychometric_data.report_sha256; nothing kept the stored count in step
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_column('report_blobs', 'ref_count')
+
+
+def downgrade() -> None:
+    op.add_column('report_blobs', sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE report_blobs SET ref_count = ("
+        "SELECT COUNT(*) FROM psychometric_data WHERE psychometric_data.report_sha256 = report_blobs.sha256)"
+    )
@@ -0,0 +1,26 @@
+"""report import lease
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18 13:55:31.602118
+
+Lease held by the run processing a bulk import, so concurrent runs cannot process the same items
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('report_imports', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('report_imports', 'lease_expires_at')
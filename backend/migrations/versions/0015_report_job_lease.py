@@ -0,0 +1,28 @@
+"""report job lease
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-18 13:37:26.482020
+
+Lease and attempt count of background report extractions, so jobs whose worker died are restarted
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('report_jobs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('report_jobs', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('report_jobs', 'lease_expires_at')
+    op.drop_column('report_jobs', 'attempts')
@@ -18,6 +18,7 @@ import { psychometricApi } from '../../services/api';
 const UploadForm = ({ onUploadSuccess }) => {
   const [file, setFile] = useState(null);
   const [uploading, setUploading] = useState(false);
+  const [processing, setProcessing] = useState(false);
   const [progress, setProgress] = useState(0);
   const toast = useToast();
 
@@ -79,7 +80,7 @@ const UploadForm = ({ onUploadSuccess }) => {
         });
       }, 500);
       
-      const response = await psychometricApi.uploadReport(file);
+      const response = await psychometricApi.uploadReport(file, () => setProcessing(true));
       
       clearInterval(progressInterval);
       setProgress(100);
@@ -105,6 +106,7 @@ const UploadForm = ({ onUploadSuccess }) => {
       });
     } finally {
       setUploading(false);
+      setProcessing(false);
       setProgress(0);
     }
   };
@@ -157,7 +159,7 @@ const UploadForm = ({ onUploadSuccess }) => {
         colorScheme="brand"
         onClick={handleUpload}
         isLoading={uploading}
-        loadingText="Uploading..."
+        loadingText={processing ? 'Processing...' : 'Uploading...'}
         isDisabled={!file || uploading}
       >
         Upload Report
@@ -9,6 +9,7 @@ const ChatWindow = ({
   setNewMessage,
   sendMessage,
   isTyping,
+  partialResponse,
   isConnected,
   isRecording,
   toggleRecording,
@@ -18,7 +19,7 @@ const ChatWindow = ({
   // Scroll to bottom when messages change
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
-  }, [messages]);
+  }, [messages, partialResponse]);
 
   const handleSend = (e) => {
     e.preventDefault();
@@ -56,7 +57,15 @@ const ChatWindow = ({
           />
         ))}
         
-        {isTyping && (
+        {partialResponse && (
+          <ChatMessage
+            message={partialResponse}
+            isUser={false}
+            timestamp={new Date()}
+          />
+        )}
+        
+        {isTyping && !partialResponse && (
           <Flex align="center" className="typing-indicator">
             <Text fontSize="sm" color="gray.500" mr={2}>
               AI is typing
@@ -1,17 +1,23 @@
 import { useState, useEffect, useRef, useCallback } from 'react';
 
+// Binary audio frames start with a 9-byte header: turn id (uint32), sequence (uint32), codec (uint8)
+const AUDIO_FRAME_HEADER_SIZE = 9;
+
 const useWebSocket = (url) => {
   const [isConnected, setIsConnected] = useState(false);
   const [messages, setMessages] = useState([]);
   const [error, setError] = useState(null);
   const [isTyping, setIsTyping] = useState(false);
+  const [partialResponse, setPartialResponse] = useState('');
   const wsRef = useRef(null);
+  const audioChunksRef = useRef([]);
 
   // Connect to WebSocket
   useEffect(() => {
     if (!url) return;
 
     const ws = new WebSocket(url);
+    ws.binaryType = 'arraybuffer';
     wsRef.current = ws;
 
     ws.onopen = () => {
@@ -32,13 +38,30 @@ const useWebSocket = (url) => {
     };
 
     ws.onmessage = (event) => {
+      if (event.data instanceof ArrayBuffer) {
+        // Audio chunk sent as a binary frame
+        audioChunksRef.current.push(new Uint8Array(event.data, AUDIO_FRAME_HEADER_SIZE));
+        return;
+      }
+
       const data = JSON.parse(event.data);
       
       if (data.type === 'typing') {
         setIsTyping(data.status);
       } else if (data.type === 'error') {
         setError(data.text);
+      } else if (data.type === 'response_delta') {
+        // Streamed partial text for the turn in progress
+        setPartialResponse((prev) => prev + data.text);
+      } else if (data.type === 'audio_chunk') {
+        const bytes = Uint8Array.from(atob(data.audio), (c) => c.charCodeAt(0));
+        audioChunksRef.current.push(bytes);
       } else {
+        if (data.type === 'response' && audioChunksRef.current.length > 0) {
+          data.audio = new Blob(audioChunksRef.current, { type: 'audio/wav' });
+        }
+        audioChunksRef.current = [];
+        setPartialResponse('');
         setMessages((prevMessages) => [...prevMessages, data]);
         setIsTyping(false);
       }
@@ -65,6 +88,7 @@ const useWebSocket = (url) => {
     messages,
     error,
     isTyping,
+    partialResponse,
     sendMessage,
   };
 };
@@ -30,6 +30,8 @@ export default function CareerRoadmapPage() {
   const { user } = useAuth();
   const [roadmaps, setRoadmaps] = useState([]);
   const [selectedRoadmap, setSelectedRoadmap] = useState(null);
+  // Sections of the roadmap being generated, shown as they arrive
+  const [draftRoadmap, setDraftRoadmap] = useState(null);
   const [loading, setLoading] = useState(true);
   const [generating, setGenerating] = useState(false);
   const [error, setError] = useState(null);
@@ -75,7 +77,9 @@ export default function CareerRoadmapPage() {
     try {
       setGenerating(true);
       
-      const response = await psychometricApi.generateRoadmap();
+      const response = await psychometricApi.generateRoadmap((sections) => {
+        setDraftRoadmap({ roadmap_data: sections });
+      });
       
       toast({
         title: 'Roadmap generated',
@@ -85,8 +89,8 @@ export default function CareerRoadmapPage() {
         isClosable: true,
       });
       
-      // Add new roadmap to list and select it
-      setRoadmaps(prev => [response.data, ...prev]);
+      // Add the roadmap to the list (an unchanged profile returns the latest one again) and select it
+      setRoadmaps(prev => [response.data, ...prev.filter(r => r.id !== response.data.id)]);
       setSelectedRoadmap(response.data);
     } catch (error) {
       toast({
@@ -98,15 +102,18 @@ export default function CareerRoadmapPage() {
       });
     } finally {
       setGenerating(false);
+      setDraftRoadmap(null);
     }
   };
 
+  const shownRoadmap = draftRoadmap || selectedRoadmap;
+
   if (loading) {
     return <LoadingSpinner />;
   }
 
   // If no roadmaps, show prompt to generate one
-  if (roadmaps.length === 0) {
+  if (roadmaps.length === 0 && !draftRoadmap) {
     return (
       <Box>
         <PageHeader 
@@ -180,49 +187,49 @@ export default function CareerRoadmapPage() {
         </Box>
       )}
       
-      {selectedRoadmap && (
+      {shownRoadmap && (
         <Box>
           <Heading size="md" mb={2}>
             Career Roadmap
           </Heading>
           <Text color="gray.600" mb={6}>
-            Generated on {formatDate(selectedRoadmap.created_at)}
+            {draftRoadmap ? 'Generating...' : `Generated on ${formatDate(shownRoadmap.created_at)}`}
           </Text>
           
           <SimpleGrid columns={{ base: 1, lg: 2 }} spacing={8}>
             <RoadmapSection 
               title="Short-term Goals (1-2 years)"
-              content={selectedRoadmap.roadmap_data.short_term_goals}
+              content={shownRoadmap.roadmap_data.short_term_goals}
               icon={FiTarget}
             />
             
             <RoadmapSection 
               title="Medium-term Goals (3-5 years)"
-              content={selectedRoadmap.roadmap_data.medium_term_goals}
+              content={shownRoadmap.roadmap_data.medium_term_goals}
               icon={FiTrendingUp}
             />
             
             <RoadmapSection 
               title="Long-term Career Path"
-              content={selectedRoadmap.roadmap_data.long_term_career_path}
+              content={shownRoadmap.roadmap_data.long_term_career_path}
               icon={FiArrowRight}
             />
             
             <RoadmapSection 
               title="Educational Requirements"
-              content={selectedRoadmap.roadmap_data.educational_requirements}
+              content={shownRoadmap.roadmap_data.educational_requirements}
               icon={FiBook}
             />
             
             <RoadmapSection 
               title="Skill Development Recommendations"
-              content={selectedRoadmap.roadmap_data.skill_development}
+              content={shownRoadmap.roadmap_data.skill_development}
               icon={FiAward}
             />
             
             <RoadmapSection 
               title="Potential Challenges and Solutions"
-              content={selectedRoadmap.roadmap_data.potential_challenges}
+              content={shownRoadmap.roadmap_data.potential_challenges}
               icon={FiAlertTriangle}
             />
           </SimpleGrid>
@@ -52,13 +52,14 @@ export default function CounselingSessionPage() {
   
   // WebSocket connection for real-time chat
   const wsUrl = session?.status === 'in_progress' ? 
-    `ws://localhost:8000/api/counseling/ws/${sessionId}` : null;
+    `ws://localhost:8000/api/counseling/ws/${sessionId}?stream=true&audio=binary` : null;
   
   const {
     isConnected,
     messages: wsMessages,
     error: wsError,
     isTyping,
+    partialResponse,
     sendMessage,
   } = useWebSocket(wsUrl);
 
@@ -258,6 +259,7 @@ export default function CounselingSessionPage() {
                 setNewMessage={setNewMessage}
                 sendMessage={handleSendMessage}
                 isTyping={isTyping}
+                partialResponse={partialResponse}
                 isConnected={isConnected}
                 isRecording={isRecording}
                 toggleRecording={toggleRecording}
@@ -1,6 +1,11 @@
 import axios from 'axios';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+const ROADMAP_POLL_INTERVAL_MS = 2000;
+const REPORT_POLL_INTERVAL_MS = 1000;
+const REPORT_POLL_TIMEOUT_MS = 5 * 60 * 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
 
 // Set up axios defaults
 axios.defaults.baseURL = API_URL;
@@ -57,16 +62,53 @@ export const sessionApi = {
 };
 
 export const psychometricApi = {
-  uploadReport: (file) => {
+  // Large reports are answered with 202 and a background job; poll it until the data is ready.
+  // onProcessing is called once the upload has finished and extraction continues in the background.
+  uploadReport: async (file, onProcessing) => {
     const formData = new FormData();
     formData.append('file', file);
-    return axios.post('/api/reports/psychometric', formData, {
+    const response = await axios.post('/api/reports/psychometric', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
     });
+    if (response.status !== 202) {
+      return response;
+    }
+    if (onProcessing) {
+      onProcessing();
+    }
+    let job = response.data;
+    const deadline = Date.now() + REPORT_POLL_TIMEOUT_MS;
+    while (job.status === 'pending') {
+      if (Date.now() > deadline) {
+        throw { response: { data: { detail: 'Report processing is taking longer than expected. Please check back later.' } } };
+      }
+      await sleep(REPORT_POLL_INTERVAL_MS);
+      ({ data: job } = await axios.get(`/api/reports/psychometric/jobs/${job.id}`));
+    }
+    if (job.status === 'failed') {
+      throw { response: { data: { detail: job.error } } };
+    }
+    return { data: job.psychometric_data };
+  },
+  // Roadmaps are generated by a background job; poll it until the roadmap is ready.
+  // onSections receives the sections finished so far while the job is running.
+  generateRoadmap: async (onSections) => {
+    let { data: job } = await axios.post('/api/reports/roadmap');
+    while (job.status === 'pending' || job.status === 'running') {
+      await sleep(ROADMAP_POLL_INTERVAL_MS);
+      ({ data: job } = await axios.get(`/api/reports/roadmap/jobs/${job.id}`));
+      if (job.sections && onSections) {
+        onSections(job.sections);
+      }
+    }
+    if (job.status === 'failed') {
+      throw { response: { data: { detail: job.error } } };
+    }
+    return { data: job.roadmap };
   },
-  generateRoadmap: () => axios.post('/api/reports/roadmap'),
+  getRoadmapJob: (jobId) => axios.get(`/api/reports/roadmap/jobs/${jobId}`),
   getRoadmaps: () => axios.get('/api/reports/roadmaps'),
 };
 